@@ -7,370 +7,371 @@ ESTE SCRIPT BORRA COMPLETAMENTE LA BASE DE DATOS Y LA RECREA DESDE CERO
 🚨 NO EJECUTAR SI YA TIENES DATOS IMPORTANTES
 🚨 PARA ACTUALIZACIONES DIARIAS USA: run_daily_update.py
 ==================================
+
+Uso:
+    python DatabaseCreation/main_database.py              # Carga en memoria (concat + inserción por conjuntos)
+    python DatabaseCreation/main_database.py --streaming  # Detalle archivo por archivo, memoria acotada
 """
-import sqlite3
 import pandas as pd
 from pathlib import Path
 import glob
 import os
 from datetime import datetime
+import sys
 
-# ========== CONFIRMACIÓN DE SEGURIDAD ==========
-print("\n" + "=" * 70)
-print("⚠️  ADVERTENCIA: BORRADO COMPLETO DE BASE DE DATOS  ⚠️".center(70))
-print("=" * 70)
-print("\nEste script ELIMINARÁ:")
-print("  ❌ Tabla: consumos (todos los registros)")
-print("  ❌ Tabla: tickets_detalle (todos los registros)")
-print("\n💡 Para actualizaciones diarias usa: python run_daily_update.py\n")
-
-confirmacion = input("Escribe 'SI BORRAR' para confirmar el borrado completo: ")
-
-if confirmacion != "SI BORRAR":
-    print("\n✅ Operación cancelada por seguridad")
-    exit(0)
+# Agregar el directorio padre al path para importar módulos
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-print("\n" + "=" * 70)
-print("DATAKINGA - CARGA A BASE DE DATOS")
-print("=" * 70)
+from FunctionsGrouping.connection_functions import conectar, checkpoint, DB_PATH
+from FunctionsGrouping.reader_functions import leer_reporte, leer_reportes_paralelo
+from FunctionsGrouping.database_functions import (
+    upsert_consumos, numerar_lineas, tipar_tickets, separar_fecha_hora, insertar_tickets_nuevos,
+    preparar_cinta, upsert_cinta, asignar_turnos, actualizar_resumenes_diarios
+)
+from FunctionsGrouping.migration_functions import reiniciar_esquema, version_actual
+from FunctionsGrouping.parquet_functions import exportar_parquet
+from FunctionsGrouping.streaming_functions import cargar_detalle_streaming, memoria_pico_mb, TAMANO_LOTE
 
-# Ruta a la base de datos
-db_path = Path('DataBase/datakinga.db')
-print(f"\n📁 Base de datos: {db_path}")
-
-# Conectar a SQLite (se crea automáticamente si no existe)
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
-
-try:
-    # ========== CONSUMOS ==========
+# El código corre solo como script: los procesos del pool de parseo importan este archivo
+if __name__ == "__main__":
+    # Modo streaming: Tickets con Detalle se carga archivo por archivo (para backfills grandes)
+    MODO_STREAMING = '--streaming' in sys.argv[1:]
+    
+    # ========== CONFIRMACIÓN DE SEGURIDAD ==========
     print("\n" + "=" * 70)
-    print("PROCESANDO: CONSUMOS POR SUCURSAL")
+    print("⚠️  ADVERTENCIA: BORRADO COMPLETO DE BASE DE DATOS  ⚠️".center(70))
     print("=" * 70)
+    print("\nEste script ELIMINARÁ:")
+    print("  ❌ Tabla: consumos (todos los registros)")
+    print("  ❌ Tablas: fact_tickets, dim_producto, dim_sucursal (todos los registros)")
+    print("  ❌ Tabla: cinta_testigo (todos los registros)")
+    print("\n💡 Para actualizaciones diarias usa: python run_daily_update.py\n")
+    
+    confirmacion = input("Escribe 'SI BORRAR' para confirmar el borrado completo: ")
+    
+    if confirmacion != "SI BORRAR":
+        print("\n✅ Operación cancelada por seguridad")
+        exit(0)
+    
+    print("\n" + "=" * 70)
+    print("DATAKINGA - CARGA A BASE DE DATOS")
+    print("=" * 70)
+    
+    # Ruta a la base de datos
+    db_path = DB_PATH
+    print(f"\n📁 Base de datos: {db_path}")
     
-    # 1. BUSCAR TODOS LOS ARCHIVOS DE CONSUMOS
-    print("\n[1/3] BUSCANDO ARCHIVOS DE CONSUMOS")
-    consumos_folder = Path('DataBase/Consumos')
+    # Conectar a SQLite (se crea automáticamente si no existe; modo WAL)
+    conn = conectar(db_path)
+    cursor = conn.cursor()
     
-    if not consumos_folder.exists():
-        print(f"   ⚠️ No existe la carpeta {consumos_folder}")
-    else:
-        # Buscar archivos .xls o .xlsx
-        archivos = []
-        archivos.extend(glob.glob(str(consumos_folder / '*.xls')))
-        archivos.extend(glob.glob(str(consumos_folder / '*.xlsx')))
+    try:
+        # Tablas vacías con el esquema tipado de la última migración
+        cursor.execute("DROP TABLE IF EXISTS ingested_files")
+        reiniciar_esquema(conn)
+        print(f"✓ Esquema recreado en versión {version_actual(conn)}")
+        
+        # ========== CONSUMOS ==========
+        print("\n" + "=" * 70)
+        print("PROCESANDO: CONSUMOS POR SUCURSAL")
+        print("=" * 70)
+        
+        # 1. BUSCAR TODOS LOS ARCHIVOS DE CONSUMOS
+        print("\n[1/3] BUSCANDO ARCHIVOS DE CONSUMOS")
+        consumos_folder = Path('DataBase/Consumos')
         
-        if not archivos:
-            print(f"   ⚠️ No se encontraron archivos Excel en {consumos_folder}")
+        if not consumos_folder.exists():
+            print(f"   ⚠️ No existe la carpeta {consumos_folder}")
         else:
-            print(f"   ✓ {len(archivos)} archivos encontrados")
+            # Buscar archivos .xls o .xlsx
+            archivos = []
+            archivos.extend(glob.glob(str(consumos_folder / '*.xls')))
+            archivos.extend(glob.glob(str(consumos_folder / '*.xlsx')))
+            archivos.sort()
             
-            # 2. LEER Y COMBINAR TODOS LOS ARCHIVOS
-            print("\n[2/3] LEYENDO Y COMBINANDO ARCHIVOS")
-            
-            dataframes = []
-            
-            for archivo in archivos:
-                nombre_archivo = os.path.basename(archivo)
-                print(f"\n   Procesando: {nombre_archivo}")
-                
-                # Extraer nombre exacto de sucursal del archivo
-                # Formato esperado desde extraction_functions: consumos_NOMBRESUCURSAL_DD_MM_YYYY.xlsx
-                partes = nombre_archivo.replace('.xls', '').replace('.xlsx', '').split('_')
-                
-                if partes[0].lower() == 'consumos' and len(partes) >= 5:
-                    # Formato automático: consumos_SUCURSAL_DD_MM_YYYY
-                    nombre_sucursal = '_'.join(partes[1:-3])
-                else:
-                    # Formato manual: Consumo_SUCURSAL o similar
-                    nombre_sucursal = '_'.join(partes[1:])
+            if not archivos:
+                print(f"   ⚠️ No se encontraron archivos Excel en {consumos_folder}")
+            else:
+                print(f"   ✓ {len(archivos)} archivos encontrados")
                 
-                print(f"   Sucursal: {nombre_sucursal}")
+                # 2. LEER Y COMBINAR TODOS LOS ARCHIVOS
+                print("\n[2/3] LEYENDO Y COMBINANDO ARCHIVOS")
                 
-                # Leer archivo sin headers
-                df_raw = pd.read_excel(archivo, header=None)
+                dataframes = []
                 
-                # Extraer headers de la fila 3 (índice 3)
-                headers = df_raw.iloc[3].tolist()
+                # Parseo en paralelo (pool de procesos); los resultados vuelven en el orden de `archivos`
+                lecturas = leer_reportes_paralelo(archivos)
                 
-                # Extraer datos desde la fila 4 en adelante (índice 4+)
-                df_temp = df_raw.iloc[4:].copy()
-                df_temp.columns = headers
+                for lectura in lecturas:
+                    archivo = lectura['archivo']
+                    nombre_archivo = os.path.basename(archivo)
+                    print(f"\n   Procesando: {nombre_archivo}")
+                    
+                    # Extraer nombre exacto de sucursal del archivo
+                    # Formato esperado desde extraction_functions: consumos_NOMBRESUCURSAL_DD_MM_YYYY.xlsx
+                    partes = nombre_archivo.replace('.xls', '').replace('.xlsx', '').split('_')
+                    
+                    if partes[0].lower() == 'consumos' and len(partes) >= 5:
+                        # Formato automático: consumos_SUCURSAL_DD_MM_YYYY
+                        nombre_sucursal = '_'.join(partes[1:-3])
+                    else:
+                        # Formato manual: Consumo_SUCURSAL o similar
+                        nombre_sucursal = '_'.join(partes[1:])
+                    
+                    print(f"   Sucursal: {nombre_sucursal}")
+                    
+                    # Archivo ya leído (formato detectado, headers ubicados automáticamente)
+                    if lectura['error']:
+                        raise RuntimeError(f"No se pudo leer {nombre_archivo}: {lectura['error']}")
+                    df_temp = lectura['df']
+                    
+                    # Mantener solo las primeras 3 columnas
+                    df_temp = df_temp.iloc[:, :3].copy()
+                    df_temp.columns = ['Familia', 'Codigo', 'Articulo']
+                    
+                    # Agregar columna Sucursal
+                    df_temp['Sucursal'] = nombre_sucursal
+                    
+                    # Reset index
+                    df_temp = df_temp.reset_index(drop=True)
+                    
+                    dataframes.append(df_temp)
+                    print(f"   ✓ {len(df_temp)} registros procesados ({lectura['segundos']:.2f}s)")
                 
-                # Mantener solo las primeras 3 columnas
-                df_temp = df_temp.iloc[:, :3]
-                df_temp.columns = ['Familia', 'Codigo', 'Articulo']
+                # Combinar todos los DataFrames
+                df_final = pd.concat(dataframes, ignore_index=True)
                 
-                # Agregar columna Sucursal
-                df_temp['Sucursal'] = nombre_sucursal
+                # Agregar fecha de carga
+                fecha_carga = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                df_final['Fecha_Carga'] = fecha_carga
                 
-                # Reset index
-                df_temp = df_temp.reset_index(drop=True)
+                print(f"\n   Total combinado: {len(df_final)} registros de {len(archivos)} sucursales")
+                print(f"   Fecha de carga: {fecha_carga}")
+                print(f"\n   Primeras 5 filas:")
+                print(df_final.head(5).to_string(index=False))
                 
-                dataframes.append(df_temp)
-                print(f"   ✓ {len(df_temp)} registros procesados")
-            
-            # Combinar todos los DataFrames
-            df_final = pd.concat(dataframes, ignore_index=True)
-            
-            # Agregar fecha de carga
-            fecha_carga = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            df_final['Fecha_Carga'] = fecha_carga
-            
-            print(f"\n   Total combinado: {len(df_final)} registros de {len(archivos)} sucursales")
-            print(f"   Fecha de carga: {fecha_carga}")
-            print(f"\n   Primeras 5 filas:")
-            print(df_final.head(5).to_string(index=False))
+                # 3. CARGAR A SQLITE
+                print("\n[3/3] CARGANDO A SQLITE")
+                insertados, _ = upsert_consumos(conn, df_final)
+                print(f"   ✓ {insertados} registros insertados en tabla 'consumos' (una fila por Codigo, Articulo y Sucursal)")
+                print(f"   ✓ Columnas: Familia, Codigo, Articulo, Sucursal, Fecha_Carga")
+        
+        # ========== CINTA TESTIGO ==========
+        print("\n" + "=" * 70)
+        print("PROCESANDO: CINTA TESTIGO")
+        print("=" * 70)
+        
+        # Todas las Cintas van a su tabla; el Turno de los tickets se asigna por SQL
+        print("\n[1/1] CARGANDO CINTA TESTIGO")
+        cinta_folder = Path('DataBase/Cinta')
+        archivos_cinta = []
+        archivos_cinta.extend(glob.glob(str(cinta_folder / '*.xls')))
+        archivos_cinta.extend(glob.glob(str(cinta_folder / '*.xlsx')))
+        archivos_cinta.sort()
+        
+        if not archivos_cinta:
+            print(f"   ⚠️ No se encontró archivo de Cinta Testigo")
+        for archivo_cinta in archivos_cinta:
+            df_raw_cinta = leer_reporte(archivo_cinta, ['Número'])
+            df_cinta = preparar_cinta(df_raw_cinta)
             
-            # 3. CARGAR A SQLITE
-            print("\n[3/3] CARGANDO A SQLITE")
-            print("   ⚠️ BORRANDO tabla 'consumos' existente...")
-            cursor.execute("DROP TABLE IF EXISTS consumos")
-            print("   ⚠️ RECREANDO tabla 'consumos' desde cero...")
-            df_final.to_sql('consumos', conn, if_exists='replace', index=False)
-            print(f"   ✓ {len(df_final)} registros insertados en tabla 'consumos'")
-            print(f"   ✓ Columnas: Familia, Codigo, Articulo, Sucursal, Fecha_Carga")
+            if df_cinta is None:
+                print(f"   ⚠️ {os.path.basename(archivo_cinta)}: no se encontraron columnas Número y Turno")
+                print(f"   Columnas disponibles: {list(df_raw_cinta.columns)}")
+                continue
             
-            # Crear índice para búsqueda optimizada
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_consumos_lookup ON consumos(Codigo, Sucursal, Fecha_Carga)")
-            print(f"   ✓ Índice creado para búsquedas optimizadas")
-    
-    # ========== DETALLE ==========
-    print("\n" + "=" * 70)
-    print("PROCESANDO: TICKETS CON DETALLE")
-    print("=" * 70)
-    
-    # 1. BUSCAR TODOS LOS ARCHIVOS DE DETALLE
-    print("\n[1/4] BUSCANDO ARCHIVOS DE DETALLE")
-    detalle_folder = Path('DataBase/Detalle')
-    
-    if not detalle_folder.exists():
-        print(f"   ⚠️ No existe la carpeta {detalle_folder}")
-    else:
-        archivos_detalle = []
-        archivos_detalle.extend(glob.glob(str(detalle_folder / '*.xls')))
-        archivos_detalle.extend(glob.glob(str(detalle_folder / '*.xlsx')))
+            upsert_cinta(conn, df_cinta)
+            print(f"   ✓ {os.path.basename(archivo_cinta)}: {len(df_cinta)} tickets")
+        
+        # ========== DETALLE ==========
+        print("\n" + "=" * 70)
+        print("PROCESANDO: TICKETS CON DETALLE")
+        print("=" * 70)
         
-        if not archivos_detalle:
-            print(f"   ⚠️ No se encontraron archivos Excel en {detalle_folder}")
+        # 1. BUSCAR TODOS LOS ARCHIVOS DE DETALLE
+        pasos = 3 if MODO_STREAMING else 4
+        print(f"\n[1/{pasos}] BUSCANDO ARCHIVOS DE DETALLE")
+        detalle_folder = Path('DataBase/Detalle')
+        
+        if not detalle_folder.exists():
+            print(f"   ⚠️ No existe la carpeta {detalle_folder}")
         else:
-            print(f"   ✓ {len(archivos_detalle)} archivos encontrados")
-            for archivo in archivos_detalle:
-                print(f"      - {os.path.basename(archivo)}")
-            
-            # 2. LEER Y COMBINAR TODOS LOS ARCHIVOS
-            print("\n[2/4] LEYENDO Y COMBINANDO ARCHIVOS")
+            archivos_detalle = []
+            archivos_detalle.extend(glob.glob(str(detalle_folder / '*.xls')))
+            archivos_detalle.extend(glob.glob(str(detalle_folder / '*.xlsx')))
+            archivos_detalle.sort()
             
-            df_list = []
-            for i, archivo in enumerate(archivos_detalle):
-                # Extraer nombre exacto de sucursal del archivo
-                # Formatos soportados:
-                # 1. tickets_detalle_NOMBRESUCURSAL_DD_MM_YYYY_HH_MM_SS.xlsx
-                # 2. NOMBRESUCURSAL_DD_MM_YYYY.xlsx
-                nombre_archivo = os.path.basename(archivo).replace('.xlsx', '').replace('.xls', '')
-                partes = nombre_archivo.split('_')
-                
-                if partes[0].lower() == 'tickets' and len(partes) > 2:
-                    # Formato automático: tickets_detalle_SUCURSAL_DD_MM_YYYY_HH_MM_SS
-                    # partes = [tickets, detalle, SUCURSAL..., DD, MM, YYYY, HH, MM, SS]
-                    # Necesitamos todo entre posición 2 y los últimos 6 elementos (DD_MM_YYYY_HH_MM_SS)
-                    nombre_sucursal = '_'.join(partes[2:-6])
-                elif len(partes) >= 4 and partes[-3].isdigit() and partes[-2].isdigit() and partes[-1].isdigit():
-                    # Formato: SUCURSAL_DD_MM_YYYY (termina con fecha)
-                    # Tomar todo excepto los últimos 3 elementos (DD_MM_YYYY)
-                    nombre_sucursal = '_'.join(partes[:-3])
-                else:
-                    # Formato desconocido: tomar todo menos el primer elemento
-                    nombre_sucursal = '_'.join(partes[1:])
-                
-                print(f"\n   Procesando: {nombre_sucursal}")
+            if not archivos_detalle:
+                print(f"   ⚠️ No se encontraron archivos Excel en {detalle_folder}")
+            elif MODO_STREAMING:
+                print(f"   ✓ {len(archivos_detalle)} archivos encontrados")
                 
-                # Leer Excel sin procesar primero
-                df_raw = pd.read_excel(archivo, header=None)
+                # 2. PARSEAR → ENRIQUECER → VALIDAR → INSERTAR, ARCHIVO POR ARCHIVO
+                print(f"\n[2/3] CARGANDO EN STREAMING (lotes de {TAMANO_LOTE} filas, commit por archivo)")
+                resumen = cargar_detalle_streaming(conn, archivos_detalle)
+                print(f"\n   ✓ {resumen['insertadas']} registros insertados de {resumen['leidas']} leídos "
+                      f"({resumen['archivos']} archivos, {resumen['segundos']:.1f}s)")
                 
-                if i == 0:  # Solo mostrar para el primer archivo
-                    print(f"\n      DEBUG - Primeras 5 filas del archivo RAW:")
-                    print(df_raw.head(5).to_string(index=True))
-                
-                # Las primeras 3 filas son basura, la fila 3 (índice 3) tiene los encabezados
-                # Extraer los encabezados de la fila 3
-                headers = df_raw.iloc[3].tolist()
-                print(f"      Headers encontrados en fila 3: {headers}")
-                
-                # Tomar datos desde la fila 4 en adelante
-                df_temp = df_raw.iloc[4:].copy()
-                df_temp.columns = headers
-                
-                print(f"      Datos: {len(df_temp)} filas")
-                
-                # Eliminar columna Sucursal si existe (viene vacía del archivo)
-                if 'Sucursal' in df_temp.columns:
-                    df_temp = df_temp.drop(columns=['Sucursal'])
+                # 3. TURNO DESDE LA TABLA cinta_testigo
+                print("\n[3/3] ASIGNANDO TURNO DESDE CINTA TESTIGO")
+                lineas_con_turno = asignar_turnos(conn)
+                print(f"   ✓ {lineas_con_turno} registros con TURNO asignado")
+            else:
+                print(f"   ✓ {len(archivos_detalle)} archivos encontrados")
+                for archivo in archivos_detalle:
+                    print(f"      - {os.path.basename(archivo)}")
                 
-                # Agregar columna Sucursal con el valor correcto
-                df_temp['Sucursal'] = nombre_sucursal
-                print(f"      ✓ Columna 'Sucursal' configurada: {nombre_sucursal}")
+                # 2. LEER Y COMBINAR TODOS LOS ARCHIVOS
+                print("\n[2/4] LEYENDO Y COMBINANDO ARCHIVOS")
                 
-                # Reset index
-                df_temp = df_temp.reset_index(drop=True)
+                df_list = []
                 
-                df_list.append(df_temp)
-                print(f"      ✓ {len(df_temp)} filas agregadas")
-            
-            # Combinar todos los DataFrames
-            df_detalle = pd.concat(df_list, ignore_index=True)
-            print(f"\n   ✓ Total combinado: {len(df_detalle)} filas")
-            print(f"   ✓ Columnas finales: {list(df_detalle.columns)}")
-            
-            print(f"\n   Primeras 3 filas:")
-            print(df_detalle.head(3).to_string(index=False))
-            
-            # 3. AGREGAR COLUMNA TURNO DESDE CINTA TESTIGO
-            print("\n[3/4] AGREGANDO COLUMNA TURNO DESDE CINTA TESTIGO")
-            
-            # Buscar archivo de Cinta Testigo
-            cinta_folder = Path('DataBase/Cinta')
-            archivos_cinta = []
-            archivos_cinta.extend(glob.glob(str(cinta_folder / '*.xls')))
-            archivos_cinta.extend(glob.glob(str(cinta_folder / '*.xlsx')))
-            
-            if not archivos_cinta:
-                print(f"   ⚠️ No se encontró archivo de Cinta Testigo")
-            else:
-                archivo_cinta = max(archivos_cinta, key=os.path.getctime)
-                print(f"   ✓ Archivo Cinta encontrado: {os.path.basename(archivo_cinta)}")
+                # Parseo en paralelo (pool de procesos); los resultados vuelven en el orden de `archivos_detalle`
+                lecturas = leer_reportes_paralelo(archivos_detalle, ['Número'])
                 
-                # Leer Cinta Testigo
-                df_cinta_raw = pd.read_excel(archivo_cinta, header=None)
+                for i, lectura in enumerate(lecturas):
+                    archivo = lectura['archivo']
+                    
+                    # Extraer nombre exacto de sucursal del archivo
+                    # Formatos soportados:
+                    # 1. tickets_detalle_NOMBRESUCURSAL_DD_MM_YYYY_HH_MM_SS.xlsx
+                    # 2. NOMBRESUCURSAL_DD_MM_YYYY.xlsx
+                    nombre_archivo = os.path.basename(archivo).replace('.xlsx', '').replace('.xls', '')
+                    partes = nombre_archivo.split('_')
+                    
+                    if partes[0].lower() == 'tickets' and len(partes) > 2:
+                        # Formato automático: tickets_detalle_SUCURSAL_DD_MM_YYYY_HH_MM_SS
+                        # partes = [tickets, detalle, SUCURSAL..., DD, MM, YYYY, HH, MM, SS]
+                        # Necesitamos todo entre posición 2 y los últimos 6 elementos (DD_MM_YYYY_HH_MM_SS)
+                        nombre_sucursal = '_'.join(partes[2:-6])
+                    elif len(partes) >= 4 and partes[-3].isdigit() and partes[-2].isdigit() and partes[-1].isdigit():
+                        # Formato: SUCURSAL_DD_MM_YYYY (termina con fecha)
+                        # Tomar todo excepto los últimos 3 elementos (DD_MM_YYYY)
+                        nombre_sucursal = '_'.join(partes[:-3])
+                    else:
+                        # Formato desconocido: tomar todo menos el primer elemento
+                        nombre_sucursal = '_'.join(partes[1:])
+                    
+                    print(f"\n   Procesando: {nombre_sucursal}")
+                    
+                    # Archivo ya leído (formato detectado, headers ubicados automáticamente)
+                    if lectura['error']:
+                        raise RuntimeError(f"No se pudo leer {nombre_archivo}: {lectura['error']}")
+                    df_temp = lectura['df']
+                    
+                    if i == 0:  # Solo mostrar para el primer archivo
+                        print(f"\n      DEBUG - Primeras 5 filas del archivo:")
+                        print(df_temp.head(5).to_string(index=True))
+                    
+                    print(f"      Headers encontrados: {list(df_temp.columns)}")
+                    print(f"      Datos: {len(df_temp)} filas ({lectura['segundos']:.2f}s)")
+                    
+                    # Eliminar columna Sucursal si existe (viene vacía del archivo)
+                    if 'Sucursal' in df_temp.columns:
+                        df_temp = df_temp.drop(columns=['Sucursal'])
+                    
+                    # Agregar columna Sucursal con el valor correcto
+                    df_temp['Sucursal'] = nombre_sucursal
+                    print(f"      ✓ Columna 'Sucursal' configurada: {nombre_sucursal}")
+                    
+                    # Tipos de la tabla y ordinal del producto dentro del ticket (parte de la clave única)
+                    df_temp = numerar_lineas(tipar_tickets(df_temp).reset_index(drop=True))
+                    
+                    df_list.append(df_temp)
+                    print(f"      ✓ {len(df_temp)} filas agregadas")
                 
-                print(f"\n   DEBUG - Primeras 5 filas de Cinta RAW:")
-                print(df_cinta_raw.head(5).to_string(index=True))
+                # Combinar todos los DataFrames
+                df_detalle = pd.concat(df_list, ignore_index=True)
+                print(f"\n   ✓ Total combinado: {len(df_detalle)} filas")
+                print(f"   ✓ Columnas finales: {list(df_detalle.columns)}")
                 
-                # Extraer headers de la fila correcta (probar fila 3)
-                headers_cinta = df_cinta_raw.iloc[3].tolist()
-                print(f"\n   Headers Cinta en fila 3: {headers_cinta}")
+                print(f"\n   Primeras 3 filas:")
+                print(df_detalle.head(3).to_string(index=False))
                 
-                # Tomar datos desde la fila 4
-                df_cinta = df_cinta_raw.iloc[4:].copy()
-                df_cinta.columns = headers_cinta
-                df_cinta = df_cinta.reset_index(drop=True)
+                # 3. SEPARAR F.CIERRE EN FECHA Y HORA
+                print("\n[3/4] SEPARANDO F.CIERRE EN FECHA Y HORA")
                 
-                print(f"   ✓ Cinta Testigo: {len(df_cinta)} registros")
+                # Buscar columna F.Cierre o F. Cierre
+                fcierre_col = None
+                for col in df_detalle.columns:
+                    if 'cierre' in str(col).lower():
+                        fcierre_col = col
+                        break
                 
-                # Verificar que existan las columnas necesarias
-                if 'Número' in df_cinta.columns or 'NUMERO' in df_cinta.columns:
-                    # Normalizar nombre de columna
-                    numero_col = 'Número' if 'Número' in df_cinta.columns else 'NUMERO'
+                if fcierre_col:
+                    print(f"   ✓ Columna encontrada: '{fcierre_col}'")
                     
-                    if 'Turno' in df_cinta.columns or 'TURNO' in df_cinta.columns:
-                        turno_col = 'Turno' if 'Turno' in df_cinta.columns else 'TURNO'
-                        
-                        # Extraer solo Número y Turno
-                        df_turno = df_cinta[[numero_col, turno_col]].copy()
-                        df_turno.columns = ['Numero', 'Turno']
-                        
-                        print(f"   ✓ Columnas extraídas: Numero y Turno")
-                        print(f"\n   Ejemplo de datos:")
-                        print(df_turno.head(3).to_string(index=False))
-                        
-                        # Hacer merge con tickets_detalle
-                        # Primero verificar nombre de columna Número en detalle
-                        numero_detalle_col = None
-                        for col in df_detalle.columns:
-                            if col.lower() in ['número', 'numero']:
-                                numero_detalle_col = col
-                                break
-                        
-                        if numero_detalle_col:
-                            print(f"\n   Haciendo JOIN por columna '{numero_detalle_col}'...")
-                            
-                            # Renombrar temporalmente para el merge
-                            df_detalle_temp = df_detalle.rename(columns={numero_detalle_col: 'Numero'})
-                            
-                            # Merge left: mantener todos los registros de detalle
-                            df_detalle_final = df_detalle_temp.merge(
-                                df_turno[['Numero', 'Turno']], 
-                                on='Numero', 
-                                how='left'
-                            )
-                            
-                            # Restaurar nombre original de columna Numero
-                            df_detalle_final = df_detalle_final.rename(columns={'Numero': numero_detalle_col})
-                            
-                            df_detalle = df_detalle_final
-                            
-                            print(f"   ✓ Columna TURNO agregada")
-                            print(f"   ✓ Columnas finales: {list(df_detalle.columns)}")
-                        else:
-                            print(f"   ⚠️ No se encontró columna Número en tickets_detalle")
-                    else:
-                        print(f"   ⚠️ No se encontró columna TURNO en Cinta Testigo")
-                        print(f"   Columnas disponibles: {list(df_cinta.columns)}")
+                    ejemplo = df_detalle[fcierre_col].iloc[0]
+                    
+                    # Fecha como número de día y Hora como minuto del día (tipos de la tabla)
+                    df_detalle = separar_fecha_hora(df_detalle, fcierre_col)
+                    
+                    print(f"   ✓ Columnas creadas: 'Fecha' (número de día) y 'Hora' (minuto del día)")
+                    print(f"\n   Ejemplo:")
+                    print(f"      {fcierre_col}: {ejemplo}")
+                    print(f"      Fecha: {df_detalle['Fecha'].iloc[0]}")
+                    print(f"      Hora: {df_detalle['Hora'].iloc[0]}")
                 else:
-                    print(f"   ⚠️ No se encontró columna NUMERO en Cinta Testigo")
-                    print(f"   Columnas disponibles: {list(df_cinta.columns)}")
-            
-            # 3.5 SEPARAR F.CIERRE EN FECHA Y HORA
-            print("\n[3.5/4] SEPARANDO F.CIERRE EN FECHA Y HORA")
-            
-            # Buscar columna F.Cierre o F. Cierre
-            fcierre_col = None
-            for col in df_detalle.columns:
-                if 'cierre' in str(col).lower():
-                    fcierre_col = col
-                    break
-            
-            if fcierre_col:
-                print(f"   ✓ Columna encontrada: '{fcierre_col}'")
-                
-                # Convertir a datetime
-                df_detalle[fcierre_col] = pd.to_datetime(df_detalle[fcierre_col], errors='coerce')
+                    print(f"   ⚠️ No se encontró columna F.Cierre")
+                    print(f"   Columnas disponibles: {list(df_detalle.columns)}")
                 
-                # Extraer fecha (solo día) y hora
-                df_detalle['Fecha'] = df_detalle[fcierre_col].dt.date
-                df_detalle['Hora'] = df_detalle[fcierre_col].dt.time
+                # 4. CARGAR A SQLITE
+                print("\n[4/4] CARGANDO A SQLITE")
+                insertados = sum(insertar_tickets_nuevos(conn, df_detalle).values())
+                print(f"   ✓ {insertados} registros insertados en tabla 'fact_tickets'")
                 
-                print(f"   ✓ Columnas creadas: 'Fecha' y 'Hora'")
-                print(f"\n   Ejemplo:")
-                print(f"      {fcierre_col}: {df_detalle[fcierre_col].iloc[0]}")
-                print(f"      Fecha: {df_detalle['Fecha'].iloc[0]}")
-                print(f"      Hora: {df_detalle['Hora'].iloc[0]}")
-            else:
-                print(f"   ⚠️ No se encontró columna F.Cierre")
-                print(f"   Columnas disponibles: {list(df_detalle.columns)}")
-            
-            # 4. CARGAR A SQLITE
-            print("\n[4/4] CARGANDO A SQLITE")
-            cursor.execute("DROP TABLE IF EXISTS tickets_detalle")
-            df_detalle.to_sql('tickets_detalle', conn, if_exists='replace', index=False)
-            print(f"   ✓ {len(df_detalle)} registros insertados en tabla 'tickets_detalle'")
-    
-    conn.commit()
-    conn.commit()
-    
-    # RESUMEN FINAL
-    print("\n" + "=" * 70)
-    print("✅ CARGA COMPLETADA")
-    print("=" * 70)
-    
-    # Contar registros en cada tabla
-    tablas = ['consumos', 'tickets_detalle']
-    print(f"\n📊 Resumen de tablas:")
-    for tabla in tablas:
-        try:
-            cursor.execute(f"SELECT COUNT(*) FROM {tabla}")
-            count = cursor.fetchone()[0]
-            print(f"   - {tabla}: {count} registros")
-        except:
-            print(f"   - {tabla}: No existe")
+                # TURNO desde la tabla cinta_testigo (UPDATE indexado en lugar de merge en pandas)
+                lineas_con_turno = asignar_turnos(conn)
+                print(f"   ✓ {lineas_con_turno} registros con TURNO asignado desde Cinta Testigo")
+        
+        # Resúmenes diarios de ventas y productos (los triggers anotaron todos los días cargados)
+        dias_ventas = actualizar_resumenes_diarios(conn)
+        print(f"\n✓ Resúmenes diarios (ventas, productos y pares): {dias_ventas} días calculados")
+        
+        conn.commit()
+        conn.commit()
+        
+        # Dataset Parquet desde cero (sucursal=/year=/month=)
+        print("\n" + "=" * 70)
+        print("EXPORTANDO DATASET PARQUET")
+        print("=" * 70)
+        parquet = exportar_parquet(conn, completo=True)
+        if parquet is not None:
+            print(f"   ✓ {parquet['particiones']} particiones ({parquet['filas']} filas) en {parquet['segundos']:.1f}s")
+        
+        # RESUMEN FINAL
+        print("\n" + "=" * 70)
+        print("✅ CARGA COMPLETADA")
+        print("=" * 70)
+        
+        # Contar registros en cada tabla
+        tablas = [
+            'consumos', 'fact_tickets', 'dim_producto', 'dim_sucursal', 'cinta_testigo',
+            'ventas_diarias', 'producto_dia', 'pares_dia',
+        ]
+        print(f"\n📊 Resumen de tablas:")
+        for tabla in tablas:
+            try:
+                cursor.execute(f"SELECT COUNT(*) FROM {tabla}")
+                count = cursor.fetchone()[0]
+                print(f"   - {tabla}: {count} registros")
+            except:
+                print(f"   - {tabla}: No existe")
+        
+        # El WAL se pasa a la base antes de subirla a git
+        checkpoint(conn)
+        
+        pico = memoria_pico_mb()
+        if pico is not None:
+            print(f"\n🧠 Pico de memoria (RSS): {pico:.0f} MB")
+        
+        print(f"\n📁 Base de datos: {db_path}")
     
-    print(f"\n📁 Base de datos: {db_path}")
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
     
-except Exception as e:
-    print(f"\n❌ ERROR: {e}")
-    import traceback
-    traceback.print_exc()
-
-finally:
-    conn.close()
-    print("\n✓ Conexión cerrada")
+    finally:
+        conn.close()
+        print("\n✓ Conexión cerrada")
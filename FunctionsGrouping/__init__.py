@@ -3,5 +3,10 @@ FunctionsGrouping - Agrupación de funciones del proyecto.
 """
 
 from .auth_functions import login, get_page_html, click_cinta_testigo, click_procesar, exportar_excel
+from .http_extraction_functions import (
+    extraer_cinta_testigo_http, extraer_tickets_detalle_http, extraer_tickets_detalle_concurrente, extraer_consumos_http
+)
 
-__all__ = ['login', 'get_page_html', 'click_cinta_testigo', 'click_procesar', 'exportar_excel']
+__all__ = ['login', 'get_page_html', 'click_cinta_testigo', 'click_procesar', 'exportar_excel',
+           'extraer_cinta_testigo_http', 'extraer_tickets_detalle_http', 'extraer_tickets_detalle_concurrente',
+           'extraer_consumos_http']
@@ -10,6 +10,7 @@ from dotenv import load_dotenv
 # Cargar credenciales
 load_dotenv()
 
+BASE_URL = "https://datakinga.com/"
 LOGIN_URL = "https://datakinga.com/Login.aspx?ReturnUrl=%2f"
 
 
@@ -131,207 +132,127 @@ def click_procesar(session):
     return response.text
 
 
-def click_pagina_numero(session, html_actual, numero_pagina):
+def parsear_formulario(html):
     """
-    Hace clic en un botón de paginación específico.
-    """
-    soup = BeautifulSoup(html_actual, 'html.parser')
-    
-    # Buscar el link de paginación
-    pagination_link = None
-    for link in soup.find_all('a', href=lambda x: x and f'Page${numero_pagina}' in x):
-        pagination_link = link
-        break
+    Parsea el formulario ASP.NET de una página tal como lo enviaría el navegador.
     
-    if not pagination_link:
-        print(f"   ✗ No se encontró el botón de página {numero_pagina}")
-        return None
+    Incluye inputs, selects y textareas, pero no los botones (submit/image/button)
+    ni los checkboxes/radios sin marcar.
     
-    # Parsear formulario para obtener ViewState Y todos los demás campos
+    Returns:
+        tuple: (soup, fields, post_url)
+    """
+    soup = BeautifulSoup(html, 'html.parser')
     form = soup.find('form')
+    
     if not form:
-        print(f"   ✗ No se encontró formulario")
-        return None
+        raise ValueError("No se encontró el formulario")
     
     fields = {}
     
-    # Extraer todos los campos input
     for input_tag in form.find_all('input'):
         name = input_tag.get('name')
-        value = input_tag.get('value', '')
-        if name:
-            fields[name] = value
+        if not name:
+            continue
+        
+        tipo = (input_tag.get('type') or 'text').lower()
+        if tipo in ('submit', 'image', 'button', 'reset'):
+            continue
+        if tipo in ('checkbox', 'radio') and not input_tag.has_attr('checked'):
+            continue
+        
+        fields[name] = input_tag.get('value', 'on' if tipo in ('checkbox', 'radio') else '')
     
-    # Extraer todos los campos select (dropdowns)
     for select_tag in form.find_all('select'):
         name = select_tag.get('name')
         if not name:
             continue
         
-        # Buscar opción seleccionada
-        selected = select_tag.find('option', selected=True)
-        if selected:
-            value = selected.get('value', '')
-        else:
-            # Usar primera opción si no hay selección
-            first_option = select_tag.find('option')
-            value = first_option.get('value', '') if first_option else ''
-        
-        fields[name] = value
+        selected = select_tag.find('option', selected=True) or select_tag.find('option')
+        fields[name] = selected.get('value', '') if selected else ''
     
-    # Extraer todos los campos textarea
     for textarea_tag in form.find_all('textarea'):
         name = textarea_tag.get('name')
         if name:
             fields[name] = textarea_tag.get_text(strip=True)
     
-    # Simular clic en el botón de paginación
-    fields['__EVENTTARGET'] = 'ctl00$ContentPlaceHolder1$GridView1'
-    fields['__EVENTARGUMENT'] = f'Page${numero_pagina}'
-    
-    # Eliminar el botón Exportar para que no interfiera
-    if 'ctl00$ContentPlaceHolder1$cmdExportar' in fields:
-        del fields['ctl00$ContentPlaceHolder1$cmdExportar']
-    
-    # Hacer POST
     action = form.get('action', '')
     post_url = action if action.startswith('http') else f"https://datakinga.com/{action.lstrip('./')}"
     
-    response = session.post(
-        post_url,
-        data=fields,
-        headers={
-            'Content-Type': 'application/x-www-form-urlencoded',
-            'Referer': post_url,
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'es-ES,es;q=0.9',
-            'Cache-Control': 'no-cache'
-        },
-        timeout=15
-    )
-    
-    return response.text
+    return soup, fields, post_url
 
 
-def extraer_datos_tabla(html):
-    """
-    Extrae los datos de la tabla principal de una página.
+def agregar_boton(soup, fields, element_id):
     """
-    soup = BeautifulSoup(html, 'html.parser')
-    tables = soup.find_all('table')
-    
-    # Buscar tabla principal
-    main_table = None
-    for table in tables:
-        rows = table.find_all('tr')
-        if len(rows) > 10:
-            first_row = rows[0] if rows else None
-            if first_row:
-                cells = first_row.find_all(['th', 'td'])
-                if cells:
-                    header_text = cells[0].get_text(strip=True)
-                    if header_text in ['Id', 'Fecha', 'Número', 'Codigo']:
-                        main_table = table
-                        break
-    
-    if not main_table:
-        main_table = max(tables, key=lambda t: len(t.find_all('tr')))
-    
-    rows = main_table.find_all('tr')
-    data = []
-    headers = []
-    
-    for i, row in enumerate(rows):
-        cells = row.find_all(['th', 'td'])
-        cell_data = [cell.get_text(strip=True) for cell in cells]
-        
-        if i == 0:
-            headers = cell_data
-        else:
-            if cell_data and any(cell_data):
-                data.append(cell_data)
+    Agrega a los campos del formulario el "clic" sobre un botón ASP.NET.
     
-    return headers, data
-
-
-def exportar_excel(session, html_procesado):
+    Soporta botones submit, botones imagen y LinkButtons (__doPostBack).
     """
-    Extrae los datos de TODAS las páginas de paginación y crea un archivo Excel.
-    """
-    from pathlib import Path
-    from datetime import datetime
-    import pandas as pd
+    boton = soup.find(id=element_id)
     
-    print("\n[Excel] Detectando páginas de paginación...")
-    soup = BeautifulSoup(html_procesado, 'html.parser')
+    if boton is None:
+        raise ValueError(f"No se encontró el botón {element_id}")
     
-    # Detectar cuántas páginas hay
-    pagination_links = soup.find_all('a', href=lambda x: x and 'Page$' in x)
-    total_pages = 1  # Página actual
+    if boton.name == 'a':
+        # LinkButton: javascript:__doPostBack('ctl00$...$boton','')
+        href = boton.get('href', '')
+        target = href.split("__doPostBack('")[1].split("'")[0] if '__doPostBack' in href else element_id.replace('_', '$')
+        fields['__EVENTTARGET'] = target
+        fields['__EVENTARGUMENT'] = ''
+        return fields
     
-    for link in pagination_links:
-        href = link.get('href', '')
-        if 'Page$' in href:
-            page_num = int(href.split('Page$')[1].split("'")[0])
-            total_pages = max(total_pages, page_num)
+    name = boton.get('name', element_id.replace('_', '$'))
     
-    print(f"[Excel] Total de páginas encontradas: {total_pages}")
+    if (boton.get('type') or '').lower() == 'image':
+        fields[f'{name}.x'] = '1'
+        fields[f'{name}.y'] = '1'
+    else:
+        fields[name] = boton.get('value', '')
     
-    # Lista para acumular todos los datos
-    all_data = []
-    headers = []
+    fields['__EVENTTARGET'] = ''
+    fields['__EVENTARGUMENT'] = ''
+    return fields
+
+
+def extraer_datos_tabla(html):
+    """
+    Extrae los datos de la tabla principal (grilla) de una página.
+    """
+    from .pagination_functions import leer_filas_grilla
     
-    # Extraer datos de la página actual (página 1)
-    print(f"\n[Excel] Extrayendo página 1/{total_pages}...")
-    headers, page_data = extraer_datos_tabla(html_procesado)
-    all_data.extend(page_data)
+    return leer_filas_grilla(html)
+
+
+def exportar_excel(session, html_procesado, destino=None):
+    """
+    Extrae los datos de TODAS las páginas de paginación y los escribe en un destino.
     
-    # Verificar primeros IDs
-    first_ids = [row[0] for row in page_data[:3]]
-    print(f"   ✓ {len(page_data)} filas extraídas - IDs: {first_ids}")
+    Por defecto crea un archivo Excel en DataBase/. También acepta cualquier destino
+    de pagination_functions (DestinoDataFrame, DestinoCSV, DestinoSQLite).
     
-    # Navegar por las páginas restantes haciendo clic en cada botón
-    current_html = html_procesado
+    Returns:
+        Lo que retorna destino.cerrar() (ruta del archivo, DataFrame, etc.)
+    """
+    from pathlib import Path
+    from datetime import datetime
+    from .pagination_functions import recorrer_paginas, DestinoExcel
     
-    for page_num in range(2, total_pages + 1):
-        print(f"\n[Excel] Haciendo clic en botón de página {page_num}/{total_pages}...")
-        
-        # Hacer clic en el botón de paginación
-        new_html = click_pagina_numero(session, current_html, page_num)
+    if destino is None:
+        # Crear carpeta DataBase
+        output_folder = Path('DataBase')
+        output_folder.mkdir(exist_ok=True)
         
-        if not new_html:
-            print(f"   ✗ Error al navegar a página {page_num}")
-            continue
-        
-        # Actualizar HTML actual
-        current_html = new_html
-        
-        # Extraer datos de la nueva página
-        _, page_data = extraer_datos_tabla(current_html)
-        all_data.extend(page_data)
-        
-        # Verificar primeros IDs
-        first_ids = [row[0] for row in page_data[:3]]
-        print(f"   ✓ {len(page_data)} filas extraídas - IDs: {first_ids}")
-    
-    # Crear DataFrame con todos los datos
-    print(f"\n[Excel] Creando archivo Excel con todos los datos...")
-    df = pd.DataFrame(all_data, columns=headers if headers else None)
-    print(f"[Excel] Total: {len(df)} filas x {len(df.columns)} columnas")
-    
-    # Crear carpeta DataBase
-    output_folder = Path('DataBase')
-    output_folder.mkdir(exist_ok=True)
-    
-    # Guardar Excel
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f'cinta_testigo_completo_{timestamp}.xlsx'
-    filepath = output_folder / filename
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filepath = output_folder / f'cinta_testigo_completo_{timestamp}.xlsx'
+        destino = DestinoExcel(filepath)
     
-    df.to_excel(filepath, index=False, engine='openpyxl')
+    print(f"\n[Excel] Recorriendo páginas de la grilla...")
+    try:
+        paginas, filas = recorrer_paginas(session, html_procesado, destino)
+    finally:
+        resultado = destino.cerrar()
     
-    print(f"✓ Archivo Excel guardado: {filepath}")
-    print(f"✓ Formato: Excel (.xlsx)")
+    print(f"[Excel] Total: {filas} filas en {paginas} páginas")
+    print(f"✓ Datos guardados: {resultado if isinstance(resultado, str) else type(resultado).__name__}")
     
-    return str(filepath)
+    return resultado
@@ -0,0 +1,237 @@
+"""
+Planificador de carga histórica (backfill)
+
+Divide un rango de fechas en ventanas (día, semana o mes) y las extrae en
+paralelo por HTTP, respetando un intervalo mínimo entre inicios de ventana
+para no saturar el sitio. Cada ventana terminada se registra en un archivo
+de checkpoint (JSON): si el proceso se corta, al relanzarlo solo se extraen
+las ventanas que faltan.
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from pathlib import Path
+import json
+import os
+import threading
+import time
+
+from .session_functions import obtener_sesion
+from .http_extraction_functions import (
+    extraer_cinta_testigo_http, extraer_tickets_detalle_http, extraer_consumos_http
+)
+
+VENTANAS = ('dia', 'semana', 'mes')
+REPORTES = ('cinta', 'detalle', 'consumos')
+CHECKPOINT_PATH = Path('DataBase/backfill_checkpoint.json')
+
+
+def dividir_rango(fecha_desde, fecha_hasta, ventana='semana'):
+    """
+    Divide [fecha_desde, fecha_hasta] en ventanas consecutivas sin solaparse.
+    
+    Args:
+        ventana: 'dia', 'semana' (7 días desde fecha_desde) o 'mes' (meses calendario)
+    
+    Returns:
+        list: [(desde, hasta), ...] con ambos extremos incluidos
+    """
+    if ventana not in VENTANAS:
+        raise ValueError(f"Ventana inválida '{ventana}'. Use: {', '.join(VENTANAS)}")
+    
+    desde = datetime(fecha_desde.year, fecha_desde.month, fecha_desde.day)
+    fin = datetime(fecha_hasta.year, fecha_hasta.month, fecha_hasta.day)
+    ventanas = []
+    
+    while desde <= fin:
+        if ventana == 'dia':
+            hasta = desde
+        elif ventana == 'semana':
+            hasta = desde + timedelta(days=6)
+        else:
+            siguiente_mes = datetime(desde.year + desde.month // 12, desde.month % 12 + 1, 1)
+            hasta = siguiente_mes - timedelta(days=1)
+        
+        hasta = min(hasta, fin)
+        ventanas.append((desde, hasta))
+        desde = hasta + timedelta(days=1)
+    
+    return ventanas
+
+
+def clave_ventana(desde, hasta):
+    """Clave de la ventana en el checkpoint (YYYY-MM-DD_YYYY-MM-DD)"""
+    return f"{desde.strftime('%Y-%m-%d')}_{hasta.strftime('%Y-%m-%d')}"
+
+
+def cargar_checkpoint(ruta=CHECKPOINT_PATH):
+    """Lee el checkpoint; si no existe retorna uno vacío"""
+    ruta = Path(ruta)
+    if not ruta.exists():
+        return {'ventanas': {}, 'fallidas': {}}
+    
+    with open(ruta, 'r', encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    
+    checkpoint.setdefault('ventanas', {})
+    checkpoint.setdefault('fallidas', {})
+    return checkpoint
+
+
+def guardar_checkpoint(checkpoint, ruta=CHECKPOINT_PATH):
+    """Escribe el checkpoint de forma atómica (archivo temporal + reemplazo)"""
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = ruta.with_suffix('.tmp')
+    
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, indent=2, ensure_ascii=False)
+    
+    os.replace(temporal, ruta)
+
+
+def ventana_completa(checkpoint, clave, reportes):
+    """Indica si la ventana ya tiene todos los reportes pedidos"""
+    registro = checkpoint['ventanas'].get(clave)
+    return bool(registro) and all(reporte in registro['reportes'] for reporte in reportes)
+
+
+class _LimitadorInicios:
+    """Garantiza un intervalo mínimo entre inicios de ventana (compartido entre workers)"""
+    
+    def __init__(self, intervalo):
+        self.intervalo = intervalo
+        self.lock = threading.Lock()
+        self.ultimo = 0.0
+    
+    def esperar_turno(self):
+        with self.lock:
+            espera = self.ultimo + self.intervalo - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+            self.ultimo = time.monotonic()
+
+
+def extraer_ventana(session, desde, hasta, reportes, carpetas):
+    """
+    Extrae los reportes de una ventana con una sesión HTTP.
+    
+    Args:
+        carpetas: dict reporte → carpeta de descarga
+    
+    Returns:
+        dict: reporte → archivo(s) guardados
+    
+    Raises:
+        RuntimeError: si algún reporte no se pudo descargar
+    """
+    resultados = {}
+    
+    if 'cinta' in reportes:
+        nombre_base = f"cinta_testigo_{desde.strftime('%Y%m%d')}_{hasta.strftime('%Y%m%d')}"
+        resultados['cinta'] = extraer_cinta_testigo_http(session, carpetas['cinta'], desde, hasta, nombre_base=nombre_base)
+    
+    if 'detalle' in reportes:
+        resultados['detalle'] = extraer_tickets_detalle_http(session, carpetas['detalle'], desde, hasta)
+    
+    if 'consumos' in reportes:
+        resultados['consumos'] = extraer_consumos_http(session, carpetas['consumos'], desde, hasta)
+    
+    faltantes = [reporte for reporte in reportes if not resultados.get(reporte)]
+    if faltantes:
+        raise RuntimeError(f"Sin archivos para: {', '.join(faltantes)}")
+    
+    return resultados
+
+
+def ejecutar_backfill(fecha_desde, fecha_hasta, carpetas, reportes=REPORTES, ventana='semana',
+                      max_workers=3, intervalo=2.0, checkpoint_path=CHECKPOINT_PATH):
+    """
+    Extrae un rango histórico por ventanas, en paralelo y con checkpoint.
+    
+    Args:
+        carpetas: dict reporte → carpeta de descarga
+        reportes: reportes a extraer ('cinta', 'detalle', 'consumos')
+        ventana: 'dia', 'semana' o 'mes'
+        max_workers: ventanas simultáneas (una sesión HTTP por worker)
+        intervalo: segundos mínimos entre inicios de ventana
+        checkpoint_path: archivo JSON con las ventanas terminadas
+    
+    Returns:
+        dict: {'completadas': [...], 'omitidas': [...], 'fallidas': {clave: error}}
+    """
+    print("\n" + "=" * 70)
+    print("BACKFILL HISTÓRICO POR VENTANAS")
+    print("=" * 70)
+    
+    # 1. Planificar
+    print("\n[1/3] PLANIFICANDO VENTANAS")
+    ventanas = dividir_rango(fecha_desde, fecha_hasta, ventana)
+    checkpoint = cargar_checkpoint(checkpoint_path)
+    
+    pendientes = []
+    omitidas = []
+    for desde, hasta in ventanas:
+        clave = clave_ventana(desde, hasta)
+        if ventana_completa(checkpoint, clave, reportes):
+            omitidas.append(clave)
+        else:
+            pendientes.append((clave, desde, hasta))
+    
+    print(f"   📅 {fecha_desde.strftime('%d/%m/%Y')} → {fecha_hasta.strftime('%d/%m/%Y')} | ventana: {ventana}")
+    print(f"   Ventanas: {len(ventanas)} | ya completas (checkpoint): {len(omitidas)} | pendientes: {len(pendientes)}")
+    print(f"   Reportes: {', '.join(reportes)}")
+    
+    # 2. Extraer en paralelo
+    print(f"\n[2/3] EXTRAYENDO ({max_workers} en paralelo, {intervalo}s entre inicios)")
+    max_workers = max(1, max_workers)
+    limitador = _LimitadorInicios(intervalo)
+    lock_checkpoint = threading.Lock()
+    sesiones = threading.local()
+    completadas = []
+    fallidas = {}
+    
+    def procesar(clave, desde, hasta):
+        limitador.esperar_turno()
+        if getattr(sesiones, 'session', None) is None:
+            sesiones.session = obtener_sesion()
+            if sesiones.session is None:
+                raise RuntimeError("Login HTTP fallido")
+        
+        inicio = time.time()
+        resultados = extraer_ventana(sesiones.session, desde, hasta, reportes, carpetas)
+        return resultados, time.time() - inicio
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futuros = {executor.submit(procesar, clave, desde, hasta): clave for clave, desde, hasta in pendientes}
+        
+        for futuro in as_completed(futuros):
+            clave = futuros[futuro]
+            
+            try:
+                resultados, segundos = futuro.result()
+            except Exception as e:
+                fallidas[clave] = str(e)
+                print(f"   ❌ Ventana {clave}: {e}")
+                with lock_checkpoint:
+                    checkpoint['fallidas'][clave] = str(e)
+                    guardar_checkpoint(checkpoint, checkpoint_path)
+                continue
+            
+            completadas.append(clave)
+            print(f"   ✓ Ventana {clave} completa ({segundos:.1f}s) [{len(completadas)}/{len(pendientes)}]")
+            with lock_checkpoint:
+                registro = checkpoint['ventanas'].setdefault(clave, {'reportes': {}})
+                registro['reportes'].update(resultados)
+                registro['completada'] = datetime.now().isoformat(timespec='seconds')
+                checkpoint['fallidas'].pop(clave, None)
+                guardar_checkpoint(checkpoint, checkpoint_path)
+    
+    # 3. Resumen
+    print("\n[3/3] RESUMEN")
+    print(f"   ✓ Completadas: {len(completadas)}")
+    print(f"   ⏭️ Omitidas (ya estaban): {len(omitidas)}")
+    print(f"   ❌ Fallidas: {len(fallidas)}")
+    if fallidas:
+        print("   💡 Vuelve a ejecutar el mismo comando para reintentar solo las fallidas")
+    
+    return {'completadas': sorted(completadas), 'omitidas': omitidas, 'fallidas': fallidas}
@@ -0,0 +1,73 @@
+"""
+Conexiones a la base de datos SQLite (usadas por todos los scripts y el dashboard)
+
+La base trabaja en modo WAL: la ingesta escribe en el archivo -wal mientras el
+dashboard sigue leyendo una foto consistente de la base, sin bloquearse ni
+fallar por "database is locked". Cada conexión se abre con los mismos PRAGMAs
+(synchronous, busy_timeout, cache_size y mmap_size).
+
+Política de checkpoint: SQLite pasa el WAL a la base cada WAL_AUTOCHECKPOINT
+páginas; al terminar una carga se hace un checkpoint TRUNCATE para que
+datakinga.db quede completo antes de subirlo a git (los -wal / -shm no se versionan).
+"""
+from pathlib import Path
+import os
+import sqlite3
+
+DB_PATH = Path('DataBase/datakinga.db')
+
+# Espera máxima por un bloqueo antes de fallar (ms)
+BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '30000'))
+# Caché de páginas por conexión (KB)
+CACHE_KB = int(os.getenv('SQLITE_CACHE_KB', str(64 * 1024)))
+# Tamaño del archivo leído vía memory-map (bytes; 0 lo desactiva)
+MMAP_BYTES = int(os.getenv('SQLITE_MMAP_BYTES', str(256 * 1024 * 1024)))
+# Páginas en el WAL antes de un checkpoint automático (el valor por defecto de SQLite)
+WAL_AUTOCHECKPOINT = 1000
+
+
+def conectar(db_path=DB_PATH, solo_lectura=False, **kwargs):
+    """
+    Abre la base con la configuración compartida.
+    
+    Las conexiones de escritura pasan la base a WAL (queda grabado en el
+    archivo). Con WAL, synchronous=NORMAL no puede corromper la base: ante un
+    corte de luz solo se pierden las últimas transacciones confirmadas.
+    
+    Args:
+        solo_lectura: abrir en modo de solo lectura (dashboard); no bloquea a la ingesta
+        kwargs: argumentos extra de sqlite3.connect (ej: check_same_thread=False)
+    
+    Returns:
+        sqlite3.Connection
+    """
+    timeout = BUSY_TIMEOUT_MS / 1000
+    
+    if solo_lectura:
+        uri = f"{Path(db_path).absolute().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, timeout=timeout, **kwargs)
+    else:
+        conn = sqlite3.connect(db_path, timeout=timeout, **kwargs)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA wal_autocheckpoint={WAL_AUTOCHECKPOINT}")
+    
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_KB}")
+    conn.execute(f"PRAGMA mmap_size={MMAP_BYTES}")
+    return conn
+
+
+def checkpoint(conn, modo='TRUNCATE'):
+    """
+    Pasa el contenido del WAL a la base (después del commit de una carga).
+    
+    Con TRUNCATE el archivo -wal queda vacío; si un lector del dashboard
+    todavía usa una foto anterior, SQLite espera hasta busy_timeout y, si no
+    puede terminar, el resto se pasa en el próximo checkpoint.
+    
+    Returns:
+        dict: {'bloqueado', 'paginas_wal', 'paginas_copiadas'}
+    """
+    bloqueado, paginas_wal, paginas_copiadas = conn.execute(f"PRAGMA wal_checkpoint({modo})").fetchone()
+    return {'bloqueado': bool(bloqueado), 'paginas_wal': paginas_wal, 'paginas_copiadas': paginas_copiadas}
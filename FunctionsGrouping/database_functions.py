@@ -0,0 +1,505 @@
+"""
+Funciones de carga a la base de datos SQLite
+
+Las cargas se hacen por conjuntos: los datos se copian a una tabla temporal
+con un solo executemany y se aplican a la tabla final con una única sentencia
+SQL, en lugar de consultar y escribir fila por fila desde Python.
+
+Las líneas de ticket van a fact_tickets con claves enteras hacia
+dim_sucursal y dim_producto (esquema estrella); las dimensiones se
+completan en la misma carga y Familia se copia de consumos a dim_producto.
+
+La tabla cinta_testigo guarda todas las filas de Cinta Testigo cargadas y el
+Turno de los tickets se asigna con un UPDATE indexado contra ella, así los
+tickets que llegan tarde (o por backfill) se completan sin releer planillas.
+
+ventas_diarias (por sucursal, Fecha y Turno), producto_dia (además por
+producto) y pares_dia / producto_tickets_dia (productos vendidos en un mismo
+ticket) resumen las líneas para el dashboard; cada carga recalcula solo los
+días que tocó (ventas_pendientes). En los cuatro resúmenes una línea sin
+Turno se guarda con Turno '' (en fact_tickets queda NULL).
+
+Las tablas tienen tipos definidos (ver migration_functions): antes de
+escribir, Cantidad e Importe se pasan a número, Fecha a número de día y Hora
+a minuto del día.
+
+La tabla ingested_files registra el hash (SHA-256) de cada archivo ya cargado:
+los archivos que ya están en el registro se omiten antes de parsearlos.
+"""
+from datetime import datetime
+import hashlib
+
+import pandas as pd
+
+from .manifest_functions import normalizar_sucursal
+
+COLUMNAS_CONSUMOS = ['Familia', 'Codigo', 'Articulo', 'Sucursal', 'Fecha_Carga']
+CLAVE_CONSUMOS = ['Codigo', 'Articulo', 'Sucursal']
+
+
+def filas_para_sqlite(df, columnas):
+    """Filas del DataFrame como tuplas de tipos nativos de Python (NaN → None)"""
+    datos = df[columnas].astype(object)
+    return [tuple(fila) for fila in datos.where(datos.notna(), None).values.tolist()]
+
+
+def upsert_consumos(conn, df_nuevos):
+    """
+    Inserta los productos nuevos y actualiza Fecha_Carga de los existentes.
+    
+    Los productos se copian a una tabla temporal y se aplican con un único
+    INSERT ... ON CONFLICT(Codigo, Articulo, Sucursal) DO UPDATE. No hace
+    commit: queda dentro de la transacción del llamador.
+    
+    Args:
+        df_nuevos: DataFrame con las columnas de COLUMNAS_CONSUMOS
+    
+    Returns:
+        tuple: (insertados, actualizados)
+    """
+    # Codigo es INTEGER en la tabla (igual que Código en tickets_detalle)
+    df_nuevos = df_nuevos.assign(Codigo=pd.to_numeric(df_nuevos['Codigo'], errors='coerce').round().astype('Int64'))
+    df_nuevos = df_nuevos.dropna(subset=CLAVE_CONSUMOS).drop_duplicates(subset=CLAVE_CONSUMOS, keep='last')
+    cursor = conn.cursor()
+    
+    # 1. Tabla temporal (sin tipos: la afinidad la aplica la tabla destino)
+    cursor.execute("DROP TABLE IF EXISTS temp.consumos_staging")
+    cursor.execute("""
+        CREATE TEMP TABLE consumos_staging (
+            Familia, Codigo, Articulo, Sucursal, Fecha_Carga
+        )
+    """)
+    cursor.executemany(
+        "INSERT INTO consumos_staging VALUES (?, ?, ?, ?, ?)",
+        filas_para_sqlite(df_nuevos, COLUMNAS_CONSUMOS)
+    )
+    
+    # 2. Contar nuevos antes de aplicar (el resto son actualizaciones)
+    cursor.execute("""
+        SELECT COUNT(*) FROM consumos_staging s
+        WHERE NOT EXISTS (
+            SELECT 1 FROM consumos c
+            WHERE c.Codigo = s.Codigo AND c.Articulo = s.Articulo AND c.Sucursal = s.Sucursal
+        )
+    """)
+    insertados = cursor.fetchone()[0]
+    
+    # 3. Upsert en una sola sentencia ("WHERE true" evita la ambigüedad del parser con ON CONFLICT)
+    cursor.execute("""
+        INSERT INTO consumos (Familia, Codigo, Articulo, Sucursal, Fecha_Carga)
+        SELECT Familia, Codigo, Articulo, Sucursal, Fecha_Carga FROM consumos_staging WHERE true
+        ON CONFLICT (Codigo, Articulo, Sucursal) DO UPDATE SET Fecha_Carga = excluded.Fecha_Carga
+    """)
+    cursor.execute("DROP TABLE temp.consumos_staging")
+    
+    # 4. Familia de los productos de los tickets según la última carga
+    actualizar_familias(conn)
+    
+    return insertados, len(df_nuevos) - insertados
+
+
+def actualizar_familias(conn):
+    """
+    Copia a dim_producto la Familia de la última carga de consumos de cada (Codigo, Sucursal).
+    
+    Solo escribe los productos cuya familia cambió. No hace commit.
+    
+    Returns:
+        int: productos actualizados
+    """
+    cursor = conn.execute("""
+        UPDATE dim_producto SET Familia = c.Familia
+        FROM (
+            SELECT Codigo, Sucursal, Familia, ROW_NUMBER() OVER (
+                PARTITION BY Codigo, Sucursal ORDER BY Fecha_Carga DESC, rowid DESC
+            ) AS orden
+            FROM consumos
+        ) AS c
+        JOIN dim_sucursal s ON s.nombre = c.Sucursal
+        WHERE c.orden = 1 AND dim_producto.sucursal_id = s.id AND dim_producto."Código" = c.Codigo
+          AND dim_producto.Familia IS NOT c.Familia
+    """)
+    return cursor.rowcount
+
+
+CLAVE_TICKETS = ['Sucursal', 'Número', 'Código', 'Linea']
+# Columnas de fact_tickets que se copian tal cual (el resto son claves o van a las dimensiones)
+COLUMNAS_FACT = ['Tipo', 'Mesa', 'Mozo', 'Nombre', 'Cantidad', 'Importe', 'Turno', 'Fecha', 'Hora']
+COLUMNAS_ENTERAS_TICKETS = ['Número', 'Código', 'Mesa', 'Mozo']
+COLUMNAS_REALES_TICKETS = ['Cantidad', 'Importe']
+EPOCA = pd.Timestamp('1970-01-01')
+
+
+def dia_numero(fechas):
+    """Fechas (datetime) como número de día: días desde 1970-01-01 (NaT → NA)"""
+    return (fechas.dt.normalize() - EPOCA).dt.days.astype('Int64')
+
+
+def minuto_del_dia(fechas):
+    """Horas (datetime) como minuto del día, 0 a 1439 (NaT → NA)"""
+    return (fechas.dt.hour * 60 + fechas.dt.minute).astype('Int64')
+
+
+def separar_fecha_hora(df, columna):
+    """Reemplaza la columna de fecha y hora (F. Cierre) por Fecha (número de día) y Hora (minuto del día)"""
+    fechas = pd.to_datetime(df[columna], errors='coerce')
+    df['Fecha'] = dia_numero(fechas)
+    df['Hora'] = minuto_del_dia(fechas)
+    return df.drop(columns=[columna])
+
+
+def tipar_tickets(df):
+    """
+    Columnas numéricas de los tickets con los tipos de la tabla (INTEGER / REAL).
+    
+    Los valores que no son números quedan nulos; las filas sin Número o Código
+    (parte de la clave) se descartan.
+    """
+    for col in COLUMNAS_ENTERAS_TICKETS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').round().astype('Int64')
+    for col in COLUMNAS_REALES_TICKETS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(float)
+    return df.dropna(subset=['Número', 'Código'])
+
+
+def numerar_lineas(df):
+    """
+    Agrega la columna Linea: ordinal (1, 2, ...) de cada producto dentro de su ticket.
+    
+    Se aplica por archivo, así el mismo producto dos veces en un ticket son dos
+    líneas distintas y el mismo archivo exportado dos veces produce las mismas claves.
+    """
+    df['Linea'] = df.groupby(['Sucursal', 'Número', 'Código'], dropna=False).cumcount() + 1
+    return df
+
+
+def insertar_tickets_nuevos(conn, df_tickets):
+    """
+    Inserta solo las líneas de ticket que no están en la base.
+    
+    Las filas se copian a una tabla temporal; desde ahí se agregan las
+    sucursales y productos nuevos a dim_sucursal / dim_producto (el producto
+    conserva la última descripción cargada) y las líneas a fact_tickets con
+    ON CONFLICT DO NOTHING: la clave primaria descarta las que ya existen, sin
+    leer el historial (un valor que no cumple los CHECK sí da error). Requiere
+    la base migrada (migrar()) y no hace commit.
+    
+    Returns:
+        dict: sucursal → líneas insertadas
+    """
+    cursor = conn.cursor()
+    columnas = [col for col in df_tickets.columns if col in CLAVE_TICKETS + COLUMNAS_FACT + ['Descripción']]
+    lista = ', '.join(f'"{col}"' for col in columnas)
+    
+    # 1. Tabla temporal con las filas de los archivos
+    cursor.execute("DROP TABLE IF EXISTS temp.tickets_staging")
+    cursor.execute(f"CREATE TEMP TABLE tickets_staging ({lista})")
+    cursor.executemany(
+        f"INSERT INTO tickets_staging VALUES ({', '.join('?' for _ in columnas)})",
+        filas_para_sqlite(df_tickets, columnas)
+    )
+    
+    # 2. Dimensiones: sucursales y productos nuevos ("WHERE true": ver upsert_consumos)
+    cursor.execute("""
+        INSERT INTO dim_sucursal (nombre) SELECT DISTINCT Sucursal FROM tickets_staging WHERE true
+        ON CONFLICT (nombre) DO NOTHING
+    """)
+    descripcion = 'st."Descripción"' if 'Descripción' in columnas else 'NULL'
+    cursor.execute(f"""
+        INSERT INTO dim_producto (sucursal_id, "Código", "Descripción")
+        SELECT s.id, st."Código", {descripcion}
+        FROM tickets_staging st JOIN dim_sucursal s ON s.nombre = st.Sucursal
+        WHERE true
+        ON CONFLICT (sucursal_id, "Código") DO UPDATE SET "Descripción" = excluded."Descripción"
+        WHERE excluded."Descripción" IS NOT NULL AND "Descripción" IS NOT excluded."Descripción"
+    """)
+    
+    # 3. Líneas nuevas por sucursal (anti-join resuelto con la clave primaria)
+    cursor.execute("""
+        SELECT st.Sucursal, COUNT(*)
+        FROM tickets_staging st
+        JOIN dim_sucursal s ON s.nombre = st.Sucursal
+        JOIN dim_producto p ON p.sucursal_id = s.id AND p."Código" = st."Código"
+        WHERE NOT EXISTS (
+            SELECT 1 FROM fact_tickets f
+            WHERE f.sucursal_id = s.id AND f."Número" = st."Número"
+              AND f.producto_id = p.id AND f.Linea = st.Linea
+        )
+        GROUP BY st.Sucursal
+    """)
+    por_sucursal = dict(cursor.fetchall())
+    
+    # 4. Insertar con claves enteras; las líneas existentes se ignoran
+    copiar = [col for col in COLUMNAS_FACT if col in columnas]
+    destino = ', '.join(['sucursal_id', '"Número"', 'producto_id', 'Linea'] + [f'"{col}"' for col in copiar])
+    origen = ', '.join(['s.id', 'st."Número"', 'p.id', 'st.Linea'] + [f'st."{col}"' for col in copiar])
+    cursor.execute(f"""
+        INSERT INTO fact_tickets ({destino})
+        SELECT {origen}
+        FROM tickets_staging st
+        JOIN dim_sucursal s ON s.nombre = st.Sucursal
+        JOIN dim_producto p ON p.sucursal_id = s.id AND p."Código" = st."Código"
+        WHERE true
+        ON CONFLICT DO NOTHING
+    """)
+    
+    # 5. Familia de los productos de la carga que todavía no la tienen (los nuevos), si ya están en consumos.
+    #    Búsqueda indexada por (Codigo, Sucursal): no recorre el catálogo en cada lote. Los cambios de
+    #    Familia de productos existentes los aplica upsert_consumos (actualizar_familias)
+    cursor.execute("""
+        UPDATE dim_producto SET Familia = n.Familia
+        FROM (
+            SELECT p.id, (
+                SELECT c.Familia FROM consumos c
+                WHERE c.Codigo = st."Código" AND c.Sucursal = st.Sucursal
+                ORDER BY c.Fecha_Carga DESC, c.rowid DESC LIMIT 1
+            ) AS Familia
+            FROM (SELECT DISTINCT Sucursal, "Código" FROM tickets_staging) st
+            JOIN dim_sucursal s ON s.nombre = st.Sucursal
+            JOIN dim_producto p ON p.sucursal_id = s.id AND p."Código" = st."Código"
+            WHERE p.Familia IS NULL
+        ) AS n
+        WHERE dim_producto.id = n.id AND n.Familia IS NOT NULL
+    """)
+    cursor.execute("DROP TABLE temp.tickets_staging")
+    
+    return por_sucursal
+
+
+def asegurar_registro_ingesta(conn):
+    """Crea (si no existe) la tabla ingested_files: un registro por archivo cargado"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ingested_files (
+            hash TEXT PRIMARY KEY,
+            archivo TEXT,
+            reporte TEXT,
+            sucursal TEXT,
+            fecha_desde TEXT,
+            fecha_hasta TEXT,
+            filas INTEGER,
+            ingestado TEXT
+        )
+    """)
+
+
+def hash_archivo(ruta, bloque=1 << 20):
+    """SHA-256 del contenido del archivo (leído en bloques)"""
+    digest = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for datos in iter(lambda: f.read(bloque), b''):
+            digest.update(datos)
+    return digest.hexdigest()
+
+
+def archivos_pendientes(conn, archivos):
+    """
+    Separa los archivos que todavía no se cargaron (según su hash).
+    
+    Returns:
+        tuple: (pendientes, hashes) con `pendientes` en el orden de `archivos`
+               y `hashes` ruta → hash de los pendientes
+    """
+    hashes = {archivo: hash_archivo(archivo) for archivo in archivos}
+    valores = list(set(hashes.values()))
+    
+    ingresados = set()
+    # SQLite limita la cantidad de parámetros por consulta
+    for inicio in range(0, len(valores), 500):
+        lote = valores[inicio:inicio + 500]
+        cursor = conn.execute(
+            f"SELECT hash FROM ingested_files WHERE hash IN ({', '.join('?' for _ in lote)})", lote
+        )
+        ingresados.update(fila[0] for fila in cursor.fetchall())
+    
+    pendientes = [archivo for archivo in archivos if hashes[archivo] not in ingresados]
+    return pendientes, {archivo: hashes[archivo] for archivo in pendientes}
+
+
+def rango_fechas(df):
+    """(desde, hasta) en YYYY-MM-DD de la primera columna de fechas del DataFrame, o (None, None)"""
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]) and df[col].notna().any():
+            return df[col].min().strftime('%Y-%m-%d'), df[col].max().strftime('%Y-%m-%d')
+    return None, None
+
+
+def registrar_ingesta(conn, archivo, hash_contenido, reporte, sucursal, filas, fecha_desde=None, fecha_hasta=None):
+    """Registra un archivo cargado (sin commit: va en la misma transacción que sus datos)"""
+    conn.execute("""
+        INSERT OR REPLACE INTO ingested_files
+            (hash, archivo, reporte, sucursal, fecha_desde, fecha_hasta, filas, ingestado)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        hash_contenido, str(archivo), reporte, sucursal, fecha_desde, fecha_hasta, int(filas),
+        datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    ))
+
+
+def preparar_cinta(df_cinta):
+    """
+    Filas de Cinta Testigo con las columnas de la tabla cinta_testigo.
+    
+    Si el archivo no trae la sucursal de cada ticket se guarda 'TODAS'
+    (el Turno se asigna entonces solo por Número).
+    
+    Returns:
+        DataFrame (Sucursal, Número, Turno, Fecha, Hora) o None si faltan Número o Turno
+    """
+    # Encabezado normalizado → nombre real de la columna ('Número' / 'NUMERO', 'Turno' / 'TURNO')
+    columnas = {str(col).upper().replace('Ú', 'U'): col for col in df_cinta.columns}
+    if 'NUMERO' not in columnas or 'TURNO' not in columnas:
+        return None
+    
+    df = pd.DataFrame({
+        'Número': pd.to_numeric(df_cinta[columnas['NUMERO']], errors='coerce').round().astype('Int64'),
+        'Turno': df_cinta[columnas['TURNO']],
+    })
+    
+    if 'SUCURSAL' in columnas and df_cinta[columnas['SUCURSAL']].notna().any():
+        df['Sucursal'] = df_cinta[columnas['SUCURSAL']].map(
+            lambda valor: normalizar_sucursal(str(valor)) if pd.notna(valor) else 'TODAS'
+        )
+    else:
+        df['Sucursal'] = 'TODAS'
+    
+    fecha_col = next((col for col in df_cinta.columns if pd.api.types.is_datetime64_any_dtype(df_cinta[col])), None)
+    if fecha_col is not None:
+        df['Fecha'] = dia_numero(df_cinta[fecha_col])
+        df['Hora'] = minuto_del_dia(df_cinta[fecha_col])
+    else:
+        df['Fecha'] = None
+        df['Hora'] = None
+    
+    df = df.dropna(subset=['Número']).drop_duplicates(subset=['Sucursal', 'Número'], keep='last')
+    return df[['Sucursal', 'Número', 'Turno', 'Fecha', 'Hora']]
+
+
+def upsert_cinta(conn, df_cinta):
+    """Inserta o actualiza filas de cinta_testigo (preparar_cinta); sin commit. Retorna filas escritas"""
+    cursor = conn.executemany("""
+        INSERT INTO cinta_testigo (Sucursal, "Número", Turno, Fecha, Hora)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (Sucursal, "Número") DO UPDATE SET
+            Turno = excluded.Turno, Fecha = excluded.Fecha, Hora = excluded.Hora
+    """, filas_para_sqlite(df_cinta, ['Sucursal', 'Número', 'Turno', 'Fecha', 'Hora']))
+    return cursor.rowcount
+
+
+def asignar_turnos(conn):
+    """
+    Completa Turno en fact_tickets desde cinta_testigo (UPDATE indexado, sin pandas).
+    
+    Solo recorre las líneas sin Turno (índice parcial idx_fact_sin_turno, ver
+    migration_functions), así los tickets que llegaron antes que su Cinta se
+    completan en la siguiente carga. Primero
+    cruza por (Sucursal, Número) y después por Número con las filas de Cinta sin
+    sucursal ('TODAS'). No hace commit.
+    
+    Returns:
+        int: líneas de ticket actualizadas
+    """
+    cursor = conn.cursor()
+    
+    # 1. Cinta con sucursal: (Sucursal, Número)
+    cursor.execute("""
+        UPDATE fact_tickets SET Turno = c.Turno
+        FROM cinta_testigo c
+        JOIN dim_sucursal s ON s.nombre = c.Sucursal
+        WHERE fact_tickets.Turno IS NULL
+          AND fact_tickets.sucursal_id = s.id
+          AND fact_tickets."Número" = c."Número"
+          AND c.Turno IS NOT NULL
+    """)
+    actualizadas = cursor.rowcount
+    
+    # 2. Cinta sin sucursal ('TODAS'): solo Número
+    cursor.execute("""
+        UPDATE fact_tickets SET Turno = c.Turno
+        FROM cinta_testigo c
+        WHERE fact_tickets.Turno IS NULL
+          AND c.Sucursal = 'TODAS'
+          AND fact_tickets."Número" = c."Número"
+          AND c.Turno IS NOT NULL
+    """)
+    actualizadas += cursor.rowcount
+    
+    return actualizadas
+
+
+def actualizar_resumenes_diarios(conn):
+    """
+    Recalcula ventas_diarias, producto_dia, pares_dia y producto_tickets_dia
+    para los días (sucursal, Fecha) anotados en ventas_pendientes.
+    
+    Se llama después de asignar_turnos: los Turnos asignados también anotan su
+    día. Cada día se borra y se vuelve a agrupar desde fact_tickets (índice
+    (sucursal_id, Fecha)); los demás días no se leen. No hace commit.
+    
+    Returns:
+        int: días recalculados
+    """
+    cursor = conn.cursor()
+    dias = cursor.execute("SELECT COUNT(*) FROM ventas_pendientes").fetchone()[0]
+    if dias == 0:
+        return 0
+    
+    for tabla in ('ventas_diarias', 'producto_dia', 'pares_dia', 'producto_tickets_dia'):
+        cursor.execute(f"""
+            DELETE FROM {tabla}
+            WHERE (sucursal_id, Fecha) IN (SELECT sucursal_id, Fecha FROM ventas_pendientes)
+        """)
+    
+    cursor.execute("""
+        INSERT INTO ventas_diarias (sucursal_id, Fecha, Turno, Facturacion, Cantidad, Lineas, Tickets)
+        SELECT f.sucursal_id, f.Fecha, COALESCE(f.Turno, ''),
+               SUM(f.Cantidad * f.Importe), SUM(f.Cantidad), COUNT(*), COUNT(DISTINCT f."Número")
+        FROM ventas_pendientes p
+        JOIN fact_tickets f ON f.sucursal_id = p.sucursal_id AND f.Fecha = p.Fecha
+        GROUP BY f.sucursal_id, f.Fecha, COALESCE(f.Turno, '')
+    """)
+    cursor.execute("""
+        INSERT INTO producto_dia (sucursal_id, Fecha, Turno, producto_id, Cantidad, Facturacion, Lineas)
+        SELECT f.sucursal_id, f.Fecha, COALESCE(f.Turno, ''), f.producto_id,
+               SUM(f.Cantidad), SUM(f.Cantidad * f.Importe), COUNT(*)
+        FROM ventas_pendientes p
+        JOIN fact_tickets f ON f.sucursal_id = p.sucursal_id AND f.Fecha = p.Fecha
+        GROUP BY f.sucursal_id, f.Fecha, COALESCE(f.Turno, ''), f.producto_id
+    """)
+    
+    # Productos distintos de cada ticket de esos días (un producto repetido en el ticket cuenta una vez)
+    cursor.execute("DROP TABLE IF EXISTS temp.tickets_productos")
+    cursor.execute("""
+        CREATE TEMP TABLE tickets_productos AS
+        SELECT DISTINCT f.sucursal_id, f."Número", f.Fecha, COALESCE(f.Turno, '') AS Turno, f.producto_id
+        FROM ventas_pendientes p
+        JOIN fact_tickets f ON f.sucursal_id = p.sucursal_id AND f.Fecha = p.Fecha
+    """)
+    cursor.execute('CREATE INDEX temp.idx_tickets_productos ON tickets_productos (sucursal_id, "Número", Fecha)')
+    
+    # Cada par una sola vez (producto_a < producto_b): tickets en los que se venden juntos
+    cursor.execute("""
+        INSERT INTO pares_dia (sucursal_id, Fecha, Turno, producto_a, producto_b, Tickets)
+        SELECT a.sucursal_id, a.Fecha, a.Turno, a.producto_id, b.producto_id, COUNT(*)
+        FROM tickets_productos a
+        JOIN tickets_productos b
+          ON b.sucursal_id = a.sucursal_id AND b."Número" = a."Número" AND b.Fecha = a.Fecha
+         AND b.producto_id > a.producto_id
+        GROUP BY a.sucursal_id, a.Fecha, a.Turno, a.producto_id, b.producto_id
+    """)
+    # Tickets por producto y en cuántos fue el único producto
+    cursor.execute("""
+        INSERT INTO producto_tickets_dia (sucursal_id, Fecha, Turno, producto_id, Tickets, TicketsSolo)
+        SELECT t.sucursal_id, t.Fecha, t.Turno, t.producto_id, COUNT(*), SUM(n.productos = 1)
+        FROM tickets_productos t
+        JOIN (
+            SELECT sucursal_id, "Número", Fecha, COUNT(*) AS productos
+            FROM tickets_productos GROUP BY sucursal_id, "Número", Fecha
+        ) n ON n.sucursal_id = t.sucursal_id AND n."Número" = t."Número" AND n.Fecha = t.Fecha
+        GROUP BY t.sucursal_id, t.Fecha, t.Turno, t.producto_id
+    """)
+    cursor.execute("DROP TABLE temp.tickets_productos")
+    
+    cursor.execute("DELETE FROM ventas_pendientes")
+    return dias
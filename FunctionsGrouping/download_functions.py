@@ -0,0 +1,123 @@
+"""
+Gestor de descargas para Selenium
+
+Cada exportación descarga en su propia carpeta temporal (configurada en el
+navegador vía CDP) y la finalización se detecta con eventos del sistema de
+archivos (watchdog): el archivo parcial .crdownload se renombra al nombre
+final cuando la descarga termina. Así se obtiene exactamente el archivo de
+ese trabajo, sin escanear ~/Downloads.
+"""
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+EXTENSIONES_DESCARGA = ('.xls', '.xlsx', '.csv')
+EXTENSIONES_PARCIALES = ('.crdownload', '.tmp', '.partial')
+
+
+def es_descarga_completa(ruta):
+    """Indica si la ruta corresponde a un archivo final (no parcial) de exportación"""
+    nombre = os.path.basename(ruta).lower()
+    return nombre.endswith(EXTENSIONES_DESCARGA) and not nombre.endswith(EXTENSIONES_PARCIALES)
+
+
+class _DescargaHandler(FileSystemEventHandler):
+    """Marca la descarga como terminada cuando aparece el archivo final"""
+    
+    def __init__(self):
+        super().__init__()
+        self.archivo = None
+        self.terminado = threading.Event()
+    
+    def _registrar(self, ruta):
+        if not self.terminado.is_set() and es_descarga_completa(ruta):
+            self.archivo = ruta
+            self.terminado.set()
+    
+    def on_created(self, event):
+        if not event.is_directory:
+            self._registrar(event.src_path)
+    
+    def on_moved(self, event):
+        # Chromium/Edge: "Unconfirmed 123.crdownload" → "archivo.xls"
+        if not event.is_directory:
+            self._registrar(event.dest_path)
+
+
+def configurar_carpeta_descarga(driver, carpeta):
+    """Indica al navegador (Edge/Chrome) la carpeta donde guardar las descargas"""
+    params = {'behavior': 'allow', 'downloadPath': carpeta}
+    try:
+        driver.execute_cdp_cmd('Browser.setDownloadBehavior', params)
+    except Exception:
+        driver.execute_cdp_cmd('Page.setDownloadBehavior', params)
+
+
+def preferencias_descarga(download_dir):
+    """Preferencias de Edge para descargar sin diálogo (usar con add_experimental_option('prefs', ...))"""
+    return {
+        'download.default_directory': str(download_dir),
+        'download.prompt_for_download': False,
+        'download.directory_upgrade': True,
+        'safebrowsing.enabled': True,
+    }
+
+
+def descargar_archivo(driver, disparar_descarga, download_dir, nombre_base, timeout=20):
+    """
+    Ejecuta una exportación y espera su archivo en una carpeta aislada.
+    
+    Args:
+        driver: WebDriver de Edge/Chrome
+        disparar_descarga: función sin argumentos que inicia la descarga (ej: boton.click)
+        download_dir: carpeta final del archivo
+        nombre_base: nombre final sin extensión (se conserva la extensión descargada)
+        timeout: segundos máximos de espera
+    
+    Returns:
+        str: ruta final del archivo o None si no se descargó a tiempo
+    """
+    carpeta_trabajo = tempfile.mkdtemp(prefix='descarga_', dir=download_dir)
+    handler = _DescargaHandler()
+    observer = Observer()
+    observer.schedule(handler, carpeta_trabajo, recursive=False)
+    observer.start()
+    
+    try:
+        configurar_carpeta_descarga(driver, carpeta_trabajo)
+        inicio = time.time()
+        disparar_descarga()
+        
+        print(f"   ⏳ Esperando descarga...")
+        handler.terminado.wait(timeout)
+        archivo = handler.archivo
+        
+        if archivo is None:
+            # Por si el evento se perdió: revisar la carpeta del trabajo una vez
+            completos = [os.path.join(carpeta_trabajo, f) for f in os.listdir(carpeta_trabajo)
+                         if es_descarga_completa(f)]
+            archivo = completos[0] if completos else None
+        
+        if archivo is None:
+            return None
+        
+        print(f"   📥 Detectado: {os.path.basename(archivo)} ({time.time() - inicio:.1f}s)")
+        
+        _, ext = os.path.splitext(archivo)
+        destino = os.path.join(download_dir, f"{nombre_base}{ext}")
+        
+        if os.path.exists(destino):
+            os.remove(destino)
+            print(f"   ⚠️ Archivo existente eliminado")
+        
+        shutil.move(archivo, destino)
+        return destino
+    
+    finally:
+        observer.stop()
+        observer.join()
+        shutil.rmtree(carpeta_trabajo, ignore_errors=True)
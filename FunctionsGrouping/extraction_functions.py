@@ -10,7 +10,12 @@ import time
 import pandas as pd
 from datetime import datetime
 import os
-import glob
+
+from .download_functions import descargar_archivo
+from .manifest_functions import registrar_unidad, incluir_sucursal
+from .wait_functions import (
+    esperar, esperar_postback, esperar_grilla_actualizada, escribir_fecha, esperar_checkbox, documento_listo
+)
 
 
 def extraer_cinta_testigo(driver, wait, download_dir, fecha_desde=None, fecha_hasta=None):
@@ -43,101 +48,53 @@ def extraer_cinta_testigo(driver, wait, download_dir, fecha_desde=None, fecha_ha
     
     # Navegar a Cinta Testigo
     print("\n[1/4] NAVEGANDO A CINTA TESTIGO")
-    cinta_link = wait.until(EC.element_to_be_clickable((By.LINK_TEXT, "Cinta Testigo")))
-    cinta_link.click()
+    cinta_link = esperar(wait, EC.element_to_be_clickable((By.LINK_TEXT, "Cinta Testigo")), "Enlace de menú")
+    esperar_postback(driver, wait, cinta_link.click, "Navegación")
     print("   ✓ Navegación exitosa")
-    time.sleep(2)
     
     # Configurar fechas
     print("\n[2/4] CONFIGURANDO FECHAS")
-    fecha_desde_field = driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_txtDesde")
-    fecha_desde_field.click()
-    time.sleep(0.2)
-    fecha_desde_field.send_keys('\ue009a\ue000')  # Ctrl+A
-    time.sleep(0.2)
-    fecha_desde_field.send_keys(fecha_desde_sin_barras)
+    escribir_fecha(driver, wait, "ctl00_ContentPlaceHolder1_txtDesde", fecha_desde_sin_barras, fecha_desde_barras)
     print(f"   ✓ Fecha Desde: {fecha_desde_barras}")
     
-    fecha_hasta_field = driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_txtHasta")
-    fecha_hasta_field.click()
-    time.sleep(0.2)
-    fecha_hasta_field.send_keys('\ue009a\ue000')  # Ctrl+A
-    time.sleep(0.2)
-    fecha_hasta_field.send_keys(fecha_hasta_sin_barras)
+    escribir_fecha(driver, wait, "ctl00_ContentPlaceHolder1_txtHasta", fecha_hasta_sin_barras, fecha_hasta_barras)
     print(f"   ✓ Fecha Hasta: {fecha_hasta_barras}")
-    time.sleep(1)
     
     # Hacer clic en Procesar
     print("\n[3/4] PROCESANDO")
     try:
-        procesar_btn = wait.until(
-            EC.element_to_be_clickable((By.ID, "ctl00_ContentPlaceHolder1_cmdProcesar"))
+        procesar_btn = esperar(
+            wait, EC.element_to_be_clickable((By.ID, "ctl00_ContentPlaceHolder1_cmdProcesar")), "Botón Procesar"
         )
-        procesar_btn.click()
+        esperar_grilla_actualizada(driver, WebDriverWait(driver, 60), procesar_btn.click, "Procesar")
         print("   ✓ Botón Procesar clickeado")
-        time.sleep(3)
     except:
         print("   ⚠️ No se encontró el botón Procesar o ya está procesado")
-        time.sleep(2)
     
     # Exportar a Excel
     print("\n[4/4] EXPORTANDO A EXCEL")
     
     max_intentos = 3
     archivo_guardado = False
-    downloads_path = os.path.join(os.path.expanduser('~'), 'Downloads')
+    inicio = time.time()
     
     for intento in range(1, max_intentos + 1):
         if intento > 1:
             print(f"\n   🔄 Reintento {intento}/{max_intentos}")
         
-        # Click en Exportar a Excel
+        # Click en Exportar a Excel (descarga aislada en su propia carpeta)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        nombre_base = f"cinta_testigo_{timestamp}"
         exportar_btn = driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_cmdExportar")
-        exportar_btn.click()
-        print(f"   ✓ Exportar a Excel clickeado")
-        
-        # Esperar descarga
-        print(f"   ⏳ Esperando descarga...")
-        max_wait = 20
-        waited = 0
-        archivo_encontrado = None
-        
-        while waited < max_wait:
-            time.sleep(1)
-            waited += 1
-            
-            list_of_files = []
-            list_of_files.extend(glob.glob(os.path.join(downloads_path, '*.xls')))
-            list_of_files.extend(glob.glob(os.path.join(downloads_path, '*.xlsx')))
-            
-            if list_of_files:
-                latest_file = max(list_of_files, key=os.path.getctime)
-                file_age = time.time() - os.path.getctime(latest_file)
-                
-                if file_age < 15 and not latest_file.endswith('.crdownload'):
-                    archivo_encontrado = latest_file
-                    print(f"   📥 Detectado: {os.path.basename(latest_file)} ({file_age:.1f}s)")
-                    break
-            
-            if waited % 3 == 0:
-                print(f"   ... esperando ({waited}s)")
+        destino = descargar_archivo(driver, exportar_btn.click, download_dir, nombre_base)
         
-        if archivo_encontrado:
-            # Renombrar con timestamp
-            from datetime import datetime
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            _, ext = os.path.splitext(archivo_encontrado)
-            nuevo_nombre = f"cinta_testigo_{timestamp}{ext}"
-            destino = os.path.join(download_dir, nuevo_nombre)
-            
-            if os.path.exists(destino):
-                os.remove(destino)
-            
-            os.rename(archivo_encontrado, destino)
+        if destino:
+            nuevo_nombre = os.path.basename(destino)
             print(f"   ✓ Guardado: {nuevo_nombre}")
             
             print(f"\n✅ CINTA TESTIGO COMPLETADO")
             print(f"   Archivo: {nuevo_nombre}")
+            registrar_unidad('cinta', 'TODAS', fecha_desde, fecha_hasta, destino, time.time() - inicio)
             
             archivo_guardado = True
             return destino
@@ -149,16 +106,19 @@ def extraer_cinta_testigo(driver, wait, download_dir, fecha_desde=None, fecha_ha
     
     if not archivo_guardado:
         print(f"   ❌ Fallo después de {max_intentos} intentos")
+        registrar_unidad('cinta', 'TODAS', fecha_desde, fecha_hasta, segundos=time.time() - inicio,
+                         error=f"Fallo después de {max_intentos} intentos")
         return None
 
 
-def extraer_tickets_detalle(driver, wait, download_dir, fecha_desde=None, fecha_hasta=None):
+def extraer_tickets_detalle(driver, wait, download_dir, fecha_desde=None, fecha_hasta=None, sucursales=None):
     """
     Extrae Tickets con Detalle para todas las sucursales
     
     Args:
         fecha_desde: datetime object o None (por defecto: ayer)
         fecha_hasta: datetime object o None (por defecto: hoy)
+        sucursales: nombres a extraer (por defecto: todas)
     """
     print("\n" + "=" * 70)
     print("EXTRACCIÓN: TICKETS CON DETALLE")
@@ -182,33 +142,21 @@ def extraer_tickets_detalle(driver, wait, download_dir, fecha_desde=None, fecha_
     
     # Navegar a Ticket con Detalle
     print("\n[1/4] NAVEGANDO A TICKET CON DETALLE")
-    ticket_link = wait.until(EC.element_to_be_clickable((By.LINK_TEXT, "Ticket con Detalle")))
-    ticket_link.click()
+    ticket_link = esperar(wait, EC.element_to_be_clickable((By.LINK_TEXT, "Ticket con Detalle")), "Enlace de menú")
+    esperar_postback(driver, wait, ticket_link.click, "Navegación")
     print("   ✓ Navegación exitosa")
-    time.sleep(2)
     
     # Configurar fechas
     print("\n[2/4] CONFIGURANDO FECHAS")
-    fecha_desde_field = driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_txtDesde")
-    fecha_desde_field.click()
-    time.sleep(0.2)
-    fecha_desde_field.send_keys('\ue009a\ue000')  # Ctrl+A
-    time.sleep(0.2)
-    fecha_desde_field.send_keys(fecha_desde_sin_barras)
+    escribir_fecha(driver, wait, "ctl00_ContentPlaceHolder1_txtDesde", fecha_desde_sin_barras, fecha_desde_barras)
     print(f"   ✓ Fecha Desde: {fecha_desde_barras}")
     
-    fecha_hasta_field = driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_txtHasta")
-    fecha_hasta_field.click()
-    time.sleep(0.2)
-    fecha_hasta_field.send_keys('\ue009a\ue000')  # Ctrl+A
-    time.sleep(0.2)
-    fecha_hasta_field.send_keys(fecha_hasta_sin_barras)
+    escribir_fecha(driver, wait, "ctl00_ContentPlaceHolder1_txtHasta", fecha_hasta_sin_barras, fecha_hasta_barras)
     print(f"   ✓ Fecha Hasta: {fecha_hasta_barras}")
-    time.sleep(1)
     
     # Detectar desplegable de sucursales
     print("\n[3/4] DETECTANDO SUCURSALES")
-    dropdown = wait.until(EC.presence_of_element_located((By.ID, "ctl00_ContentPlaceHolder1_cmbSucursal")))
+    dropdown = esperar(wait, EC.presence_of_element_located((By.ID, "ctl00_ContentPlaceHolder1_cmbSucursal")), "Desplegable sucursales")
     select = Select(dropdown)
     options = select.options
     
@@ -220,13 +168,17 @@ def extraer_tickets_detalle(driver, wait, download_dir, fecha_desde=None, fecha_
     print("\n[4/4] PROCESANDO TODAS LAS SUCURSALES")
     
     archivos_guardados = []
-    downloads_path = os.path.join(os.path.expanduser('~'), 'Downloads')
+    seleccionadas = [i for i, option in enumerate(options) if incluir_sucursal(option.text, sucursales)]
     
     for i, option in enumerate(options):
+        if i not in seleccionadas:
+            continue
+        
         print(f"\n   --- Procesando {i+1}/{len(options)}: {option.text} ---")
         
         max_intentos = 3
         archivo_guardado = False
+        inicio = time.time()
         
         for intento in range(1, max_intentos + 1):
             if intento > 1:
@@ -234,54 +186,21 @@ def extraer_tickets_detalle(driver, wait, download_dir, fecha_desde=None, fecha_
             
             # Seleccionar sucursal
             select.select_by_index(i)
+            esperar(wait, lambda d: select.first_selected_option.text == option.text, "Sucursal seleccionada")
             print(f"   ✓ Sucursal seleccionada: {option.text}")
-            time.sleep(1)
-            
-            # Exportar
-            exportar_btn = driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_dgExportar")
-            exportar_btn.click()
-            print(f"   ✓ Exportar clickeado")
             
             # Preparar nombre
             nombre_sucursal = option.text.replace(' ', '_')
             fecha_archivo = fecha_hasta_barras.replace('/', '_')
             
-            # Esperar descarga
-            print(f"   ⏳ Esperando descarga...")
-            max_wait = 20
-            waited = 0
-            archivo_encontrado = None
-            
-            while waited < max_wait:
-                time.sleep(1)
-                waited += 1
-                
-                list_of_files = []
-                list_of_files.extend(glob.glob(os.path.join(downloads_path, '*.xls')))
-                list_of_files.extend(glob.glob(os.path.join(downloads_path, '*.xlsx')))
-                
-                if list_of_files:
-                    latest_file = max(list_of_files, key=os.path.getctime)
-                    file_age = time.time() - os.path.getctime(latest_file)
-                    
-                    if file_age < 15 and not latest_file.endswith('.crdownload'):
-                        archivo_encontrado = latest_file
-                        print(f"   📥 Detectado: {os.path.basename(latest_file)} ({file_age:.1f}s)")
-                        break
-                
-                if waited % 3 == 0:
-                    print(f"   ... esperando ({waited}s)")
+            # Exportar (descarga aislada en su propia carpeta)
+            exportar_btn = driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_dgExportar")
+            destino = descargar_archivo(driver, exportar_btn.click, download_dir, f"{nombre_sucursal}_{fecha_archivo}")
             
-            if archivo_encontrado:
-                _, ext = os.path.splitext(archivo_encontrado)
-                nuevo_nombre = f"{nombre_sucursal}_{fecha_archivo}{ext}"
-                destino = os.path.join(download_dir, nuevo_nombre)
-                
-                if os.path.exists(destino):
-                    os.remove(destino)
-                
-                os.rename(archivo_encontrado, destino)
+            if destino:
+                nuevo_nombre = os.path.basename(destino)
                 print(f"   ✓ Guardado: {nuevo_nombre}")
+                registrar_unidad('detalle', nombre_sucursal, fecha_desde, fecha_hasta, destino, time.time() - inicio)
                 archivos_guardados.append(nuevo_nombre)
                 archivo_guardado = True
                 break
@@ -293,22 +212,45 @@ def extraer_tickets_detalle(driver, wait, download_dir, fecha_desde=None, fecha_
         
         if not archivo_guardado:
             print(f"   ❌ Fallo después de {max_intentos} intentos")
-        
-        time.sleep(2)
+            registrar_unidad('detalle', option.text.replace(' ', '_'), fecha_desde, fecha_hasta,
+                             segundos=time.time() - inicio, error=f"Fallo después de {max_intentos} intentos")
     
     print(f"\n✅ TICKETS CON DETALLE COMPLETADO")
-    print(f"   Archivos guardados: {len(archivos_guardados)}/{len(options)}")
+    print(f"   Archivos guardados: {len(archivos_guardados)}/{len(seleccionadas)}")
     
     return archivos_guardados
 
 
-def extraer_consumos(driver, wait, download_dir, fecha_desde=None, fecha_hasta=None):
+def obtener_sucursales_consumos(driver):
+    """
+    Lee los checkboxes de sucursales de Consumos con el texto de su label.
+    
+    Returns:
+        list: [(checkbox_id, texto_label), ...] en el orden de la página
+    """
+    sucursales = []
+    
+    for checkbox in driver.find_elements(By.CSS_SELECTOR, "input[id^='ctl00_ContentPlaceHolder1_chkSucursales_']"):
+        checkbox_id = checkbox.get_attribute('id')
+        labels = driver.find_elements(By.CSS_SELECTOR, f"label[for='{checkbox_id}']")
+        texto = labels[0].text.strip() if labels else checkbox_id.split('_')[-1]
+        sucursales.append((checkbox_id, texto))
+    
+    return sucursales
+
+
+def extraer_consumos(driver, wait, download_dir, fecha_desde=None, fecha_hasta=None, sucursales=None):
     """
     Extrae datos de Consumos por sucursal usando checkboxes
     
+    La página se carga y las fechas se escriben una sola vez: después de cada
+    Procesar la página conserva fechas y checkboxes, así que para la siguiente
+    sucursal solo se cambia el checkbox marcado y se vuelve a procesar.
+    
     Args:
         fecha_desde: datetime object o None (por defecto: ayer)
         fecha_hasta: datetime object o None (por defecto: hoy)
+        sucursales: nombres a extraer (por defecto: todas)
     """
     print("\n" + "=" * 70)
     print("EXTRACCIÓN: CONSUMOS POR SUCURSAL")
@@ -330,181 +272,74 @@ def extraer_consumos(driver, wait, download_dir, fecha_desde=None, fecha_hasta=N
     
     print(f"\n   📅 Desde: {fecha_desde_barras} | Hasta: {fecha_hasta_barras}")
     
-    # Navegar a Consumos
-    print("\n[1/5] NAVEGANDO A CONSUMOS")
-    driver.get("https://datakinga.com/Consumos.aspx")
+    def cargar_pagina():
+        """Carga Consumos limpio y escribe las fechas (al inicio y solo si hay que reintentar)"""
+        driver.get("https://datakinga.com/Consumos.aspx")
+        esperar(wait, documento_listo, "Carga de página")
+        escribir_fecha(driver, wait, "ctl00_ContentPlaceHolder1_txtDesde", fecha_desde_sin_barras, fecha_desde_barras)
+        escribir_fecha(driver, wait, "ctl00_ContentPlaceHolder1_txtHasta", fecha_hasta_sin_barras, fecha_hasta_barras)
+        esperar(wait, EC.presence_of_element_located((By.ID, "ctl00_ContentPlaceHolder1_chkSucursales_0")), "Checkboxes sucursales")
+    
+    # Navegar a Consumos y configurar fechas (una sola vez)
+    print("\n[1/4] NAVEGANDO A CONSUMOS Y CONFIGURANDO FECHAS")
+    cargar_pagina()
     print("   ✓ Navegación exitosa")
-    time.sleep(2)
-    
-    # Configurar fechas
-    print("\n[2/5] CONFIGURANDO FECHAS")
-    fecha_desde_field = driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_txtDesde")
-    fecha_desde_field.click()
-    time.sleep(0.2)
-    fecha_desde_field.send_keys('\ue009a\ue000')  # Ctrl+A
-    time.sleep(0.2)
-    fecha_desde_field.send_keys(fecha_desde_sin_barras)
     print(f"   ✓ Fecha Desde: {fecha_desde_barras}")
-    
-    fecha_hasta_field = driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_txtHasta")
-    fecha_hasta_field.click()
-    time.sleep(0.2)
-    fecha_hasta_field.send_keys('\ue009a\ue000')  # Ctrl+A
-    time.sleep(0.2)
-    fecha_hasta_field.send_keys(fecha_hasta_sin_barras)
     print(f"   ✓ Fecha Hasta: {fecha_hasta_barras}")
-    time.sleep(1)
-    
-    # Nombres de las sucursales en orden
-    print("\n[3/5] PREPARANDO SUCURSALES")
-    sucursales = [
-        "COSTAVERDE",
-        "PASADENA", 
-        "ENTRE RIOS",
-        "SAAVEDRA",
-        "SAENZ PEÑA"
-    ]
-    
-    print(f"   Sucursales a procesar: {len(sucursales)}")
-    for i, suc in enumerate(sucursales):
+    
+    # Sucursales según los labels de la página
+    print("\n[2/4] PREPARANDO SUCURSALES")
+    todas_las_sucursales = obtener_sucursales_consumos(driver)
+    a_procesar = [(checkbox_id, texto) for checkbox_id, texto in todas_las_sucursales if incluir_sucursal(texto, sucursales)]
+    
+    print(f"   Sucursales a procesar: {len(a_procesar)}")
+    for i, (_, suc) in enumerate(a_procesar):
         print(f"   {i+1}. {suc}")
     
-    # Iterar sobre cada sucursal
-    print("\n[4/5] EXPORTANDO POR SUCURSAL")
+    # Iterar sobre cada sucursal reutilizando la página procesada
+    print("\n[3/4] EXPORTANDO POR SUCURSAL")
     archivos_guardados = []
-    downloads_path = os.path.join(os.path.expanduser('~'), 'Downloads')
+    fecha_archivo = fecha_hasta_barras.replace('/', '_')
     
-    for i, sucursal_original in enumerate(sucursales):
+    for i, (checkbox_actual, sucursal_original) in enumerate(a_procesar):
         # Convertir espacios a guiones bajos para el nombre del archivo
         nombre_sucursal = sucursal_original.replace(' ', '_')
-        print(f"\n   --- Procesando {i+1}/{len(sucursales)}: {sucursal_original} ---")
-        
-        # Si no es la primera iteración, volver a navegar a Consumos
-        if i > 0:
-            print(f"   🔄 Volviendo a Consumos...")
-            driver.get("https://datakinga.com/Consumos.aspx")
-            time.sleep(2)
-            
-            # Reconfigurar fechas
-            fecha_desde_field = driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_txtDesde")
-            fecha_desde_field.click()
-            time.sleep(0.2)
-            fecha_desde_field.send_keys('\ue009a\ue000')  # Ctrl+A
-            time.sleep(0.2)
-            fecha_desde_field.send_keys(fecha_desde_sin_barras)
-            time.sleep(0.5)
-            
-            fecha_hasta_field = driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_txtHasta")
-            fecha_hasta_field.click()
-            time.sleep(0.2)
-            fecha_hasta_field.send_keys('\ue009a\ue000')  # Ctrl+A
-            time.sleep(0.2)
-            fecha_hasta_field.send_keys(fecha_hasta_sin_barras)
-            time.sleep(0.5)
+        print(f"\n   --- Procesando {i+1}/{len(a_procesar)}: {sucursal_original} ---")
         
         max_intentos = 3
         archivo_guardado = False
+        inicio = time.time()
         
         for intento in range(1, max_intentos + 1):
-            if intento > 1:
-                print(f"\n   🔄 Reintento {intento}/{max_intentos}")
-                # Si es un reintento, volver a Consumos
-                driver.get("https://datakinga.com/Consumos.aspx")
-                time.sleep(2)
-                
-                # Reconfigurar fechas
-                fecha_desde_field = driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_txtDesde")
-                fecha_desde_field.click()
-                time.sleep(0.2)
-                fecha_desde_field.send_keys('\ue009a\ue000')  # Ctrl+A
-                time.sleep(0.2)
-                fecha_desde_field.send_keys(fecha_desde_sin_barras)
-                time.sleep(0.5)
-                
-                fecha_hasta_field = driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_txtHasta")
-                fecha_hasta_field.click()
-                time.sleep(0.2)
-                fecha_hasta_field.send_keys('\ue009a\ue000')  # Ctrl+A
-                time.sleep(0.2)
-                fecha_hasta_field.send_keys(fecha_hasta_sin_barras)
-                time.sleep(0.5)
-            
-            # Esperar a que los checkboxes estén disponibles
-            wait.until(EC.presence_of_element_located((By.ID, f"ctl00_ContentPlaceHolder1_chkSucursales_0")))
-            time.sleep(0.5)
-            
-            # Desmarcar todos los checkboxes primero
-            for j in range(len(sucursales)):
-                checkbox_id = f"ctl00_ContentPlaceHolder1_chkSucursales_{j}"
-                try:
-                    checkbox = driver.find_element(By.ID, checkbox_id)
-                    if checkbox.is_selected():
-                        checkbox.click()
-                        time.sleep(0.2)
-                except:
-                    pass
-            
-            # Marcar solo el checkbox actual
-            checkbox_id = f"ctl00_ContentPlaceHolder1_chkSucursales_{i}"
-            checkbox = driver.find_element(By.ID, checkbox_id)
-            if not checkbox.is_selected():
-                checkbox.click()
-                time.sleep(0.5)
-            print(f"   ✓ Checkbox seleccionado: {nombre_sucursal}")
-            
-            # Procesar
-            procesar_btn = driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_cmdProcesar")
-            procesar_btn.click()
-            print(f"   ✓ Procesar clickeado")
-            time.sleep(3)
-            
-            # Exportar
-            exportar_btn = driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_cmdExportar")
-            exportar_btn.click()
-            print(f"   ✓ Exportar clickeado")
-            
-            # Preparar nombre (usar fecha hasta = hoy)
-            fecha_archivo = fecha_hasta_barras.replace('/', '_')
-            
-            # Esperar descarga
-            print(f"   ⏳ Esperando descarga...")
-            max_wait = 20
-            waited = 0
-            archivo_encontrado = None
-            
-            while waited < max_wait:
-                time.sleep(1)
-                waited += 1
+            try:
+                if intento > 1:
+                    print(f"\n   🔄 Reintento {intento}/{max_intentos}")
+                    # Si es un reintento, volver a Consumos desde cero
+                    cargar_pagina()
                 
-                list_of_files = []
-                list_of_files.extend(glob.glob(os.path.join(downloads_path, '*.xls')))
-                list_of_files.extend(glob.glob(os.path.join(downloads_path, '*.xlsx')))
+                # Solo el checkbox actual marcado (normalmente solo cambian dos)
+                for checkbox_id, _ in todas_las_sucursales:
+                    esperar_checkbox(driver, wait, checkbox_id, checkbox_id == checkbox_actual)
+                print(f"   ✓ Checkbox seleccionado: {nombre_sucursal}")
                 
-                if list_of_files:
-                    latest_file = max(list_of_files, key=os.path.getctime)
-                    file_age = time.time() - os.path.getctime(latest_file)
-                    
-                    if file_age < 15 and not latest_file.endswith('.crdownload'):
-                        archivo_encontrado = latest_file
-                        print(f"   📥 Detectado: {os.path.basename(latest_file)} ({file_age:.1f}s)")
-                        break
+                # Procesar
+                procesar_btn = driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_cmdProcesar")
+                esperar_postback(driver, WebDriverWait(driver, 60), procesar_btn.click, "Procesar")
+                print(f"   ✓ Procesar clickeado")
                 
-                if waited % 3 == 0:
-                    print(f"   ... esperando ({waited}s)")
+                # Exportar (descarga aislada en su propia carpeta)
+                exportar_btn = driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_cmdExportar")
+                destino = descargar_archivo(
+                    driver, exportar_btn.click, download_dir, f"consumos_{nombre_sucursal}_{fecha_archivo}"
+                )
+            except Exception as e:
+                print(f"   ⚠️ Error: {e}")
+                destino = None
             
-            if archivo_encontrado:
-                fecha_archivo = fecha_hasta_barras.replace('/', '_')
-                _, ext = os.path.splitext(archivo_encontrado)
-                nuevo_nombre = f"consumos_{nombre_sucursal}_{fecha_archivo}{ext}"
-                destino = os.path.join(download_dir, nuevo_nombre)
-                
-                # Si existe, eliminarlo (reescribir)
-                if os.path.exists(destino):
-                    os.remove(destino)
-                    print(f"   ⚠️ Archivo existente eliminado")
-                
-                os.rename(archivo_encontrado, destino)
+            if destino:
+                nuevo_nombre = os.path.basename(destino)
                 print(f"   ✓ Guardado: {nuevo_nombre}")
+                registrar_unidad('consumos', nombre_sucursal, fecha_desde, fecha_hasta, destino, time.time() - inicio)
                 archivos_guardados.append(nuevo_nombre)
                 archivo_guardado = True
                 break
@@ -516,14 +351,14 @@ def extraer_consumos(driver, wait, download_dir, fecha_desde=None, fecha_hasta=N
         
         if not archivo_guardado:
             print(f"   ❌ Fallo después de {max_intentos} intentos")
-        
-        time.sleep(2)
+            registrar_unidad('consumos', nombre_sucursal, fecha_desde, fecha_hasta, segundos=time.time() - inicio,
+                             error=f"Fallo después de {max_intentos} intentos")
     
     # Resumen final
-    print("\n[5/5] RESUMEN")
+    print("\n[4/4] RESUMEN")
     print("=" * 70)
     print("✅ CONSUMOS COMPLETADO")
     print("=" * 70)
-    print(f"\n   Total archivos guardados: {len(archivos_guardados)}/{len(sucursales)}")
+    print(f"\n   Total archivos guardados: {len(archivos_guardados)}/{len(a_procesar)}")
     
-    return archivos_guardados
\ No newline at end of file
+    return archivos_guardados
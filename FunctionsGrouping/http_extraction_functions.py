@@ -0,0 +1,528 @@
+"""
+Funciones de extracción de datos desde Datakinga sin navegador (requests)
+
+Mismo flujo que extraction_functions.py pero enviando directamente los
+formularios ASP.NET: se cargan las fechas, se envía Procesar/Exportar y el
+archivo exportado se recibe como bytes en la respuesta HTTP.
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin
+from datetime import datetime, timedelta
+import os
+import re
+import threading
+import time
+
+from .auth_functions import BASE_URL, parsear_formulario, agregar_boton
+from .session_functions import obtener_sesion
+from .manifest_functions import registrar_unidad, incluir_sucursal
+
+CINTA_URL = "https://datakinga.com/CintaTestigo.aspx"
+CONSUMOS_URL = "https://datakinga.com/Consumos.aspx"
+
+CAMPO_DESDE = 'ctl00$ContentPlaceHolder1$txtDesde'
+CAMPO_HASTA = 'ctl00$ContentPlaceHolder1$txtHasta'
+CAMPO_SUCURSAL = 'ctl00$ContentPlaceHolder1$cmbSucursal'
+PREFIJO_CHECK_SUCURSAL = 'ctl00_ContentPlaceHolder1_chkSucursales_'
+
+BOTON_PROCESAR = 'ctl00_ContentPlaceHolder1_cmdProcesar'
+BOTON_EXPORTAR = 'ctl00_ContentPlaceHolder1_cmdExportar'
+BOTON_EXPORTAR_DETALLE = 'ctl00_ContentPlaceHolder1_dgExportar'
+
+HEADERS_FORM = {
+    'Content-Type': 'application/x-www-form-urlencoded',
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept-Language': 'es-ES,es;q=0.9',
+}
+
+
+def _fechas_por_defecto(fecha_desde, fecha_hasta):
+    """Por defecto: desde ayer hasta hoy (igual que la versión Selenium)"""
+    if fecha_desde is None:
+        fecha_desde = datetime.now() - timedelta(days=1)
+    if fecha_hasta is None:
+        fecha_hasta = datetime.now()
+    return fecha_desde, fecha_hasta
+
+
+def buscar_url_menu(session, texto_enlace):
+    """
+    Busca en el menú de la página principal la URL del enlace con el texto indicado.
+    Equivalente a By.LINK_TEXT en Selenium.
+    """
+    from bs4 import BeautifulSoup
+    
+    response = session.get(BASE_URL, timeout=15)
+    soup = BeautifulSoup(response.text, 'html.parser')
+    
+    for link in soup.find_all('a', href=True):
+        if link.get_text(strip=True) == texto_enlace:
+            return urljoin(response.url, link['href'])
+    
+    raise ValueError(f"No se encontró el enlace '{texto_enlace}' en el menú")
+
+
+def postear_formulario(session, post_url, fields, referer=None):
+    """Envía un formulario ASP.NET (postback) y retorna la respuesta"""
+    headers = dict(HEADERS_FORM)
+    headers['Referer'] = referer or post_url
+    
+    return session.post(
+        post_url,
+        data=fields,
+        headers=headers,
+        timeout=60,
+        allow_redirects=True
+    )
+
+
+def es_archivo_exportado(response):
+    """Indica si la respuesta de Exportar trae un archivo (y no la página de nuevo)"""
+    disposition = response.headers.get('Content-Disposition', '')
+    content_type = response.headers.get('Content-Type', '')
+    return 'attachment' in disposition.lower() or 'text/html' not in content_type.lower()
+
+
+def extension_exportada(response):
+    """Obtiene la extensión del archivo exportado desde Content-Disposition"""
+    disposition = response.headers.get('Content-Disposition', '')
+    match = re.search(r'filename\*?=(?:UTF-8\'\')?"?([^";]+)"?', disposition, re.IGNORECASE)
+    
+    if match:
+        _, ext = os.path.splitext(match.group(1).strip())
+        if ext:
+            return ext.lower()
+    
+    if 'openxmlformats' in response.headers.get('Content-Type', ''):
+        return '.xlsx'
+    return '.xls'
+
+
+def guardar_respuesta(response, destino):
+    """Guarda los bytes exportados en destino (reescribe si existe)"""
+    if os.path.exists(destino):
+        os.remove(destino)
+    
+    with open(destino, 'wb') as f:
+        f.write(response.content)
+    
+    return destino
+
+
+def cargar_fechas(fields, fecha_desde, fecha_hasta):
+    """Carga las fechas Desde/Hasta en los campos del formulario (DD/MM/YYYY)"""
+    fields[CAMPO_DESDE] = fecha_desde.strftime('%d/%m/%Y')
+    fields[CAMPO_HASTA] = fecha_hasta.strftime('%d/%m/%Y')
+    return fields
+
+
+def extraer_cinta_testigo_http(session, download_dir, fecha_desde=None, fecha_hasta=None, nombre_base=None):
+    """
+    Extrae datos de Cinta Testigo enviando Procesar y Exportar por HTTP
+    
+    Args:
+        session: requests.Session autenticada (ver session_functions.obtener_sesion)
+        fecha_desde: datetime object o None (por defecto: ayer)
+        fecha_hasta: datetime object o None (por defecto: hoy)
+        nombre_base: nombre del archivo sin extensión (por defecto: cinta_testigo_TIMESTAMP)
+    
+    Returns:
+        str: ruta del archivo guardado o None
+    """
+    print("\n" + "=" * 70)
+    print("EXTRACCIÓN HTTP: CINTA TESTIGO")
+    print("=" * 70)
+    
+    fecha_desde, fecha_hasta = _fechas_por_defecto(fecha_desde, fecha_hasta)
+    print(f"\n   📅 Desde: {fecha_desde.strftime('%d/%m/%Y')} | Hasta: {fecha_hasta.strftime('%d/%m/%Y')}")
+    
+    max_intentos = 3
+    inicio = time.time()
+    
+    for intento in range(1, max_intentos + 1):
+        if intento > 1:
+            print(f"\n   🔄 Reintento {intento}/{max_intentos}")
+        
+        try:
+            # 1. Cargar página
+            print("\n[1/3] CARGANDO CINTA TESTIGO")
+            response = session.get(CINTA_URL, timeout=30)
+            
+            # 2. Procesar con las fechas
+            print("\n[2/3] PROCESANDO")
+            soup, fields, post_url = parsear_formulario(response.text)
+            cargar_fechas(fields, fecha_desde, fecha_hasta)
+            agregar_boton(soup, fields, BOTON_PROCESAR)
+            response = postear_formulario(session, post_url, fields, referer=CINTA_URL)
+            print(f"   ✓ Procesar ejecutado: {len(response.content)} bytes")
+            
+            # 3. Exportar desde la página procesada
+            print("\n[3/3] EXPORTANDO A EXCEL")
+            soup, fields, post_url = parsear_formulario(response.text)
+            agregar_boton(soup, fields, BOTON_EXPORTAR)
+            response = postear_formulario(session, post_url, fields, referer=CINTA_URL)
+            
+            if not es_archivo_exportado(response):
+                print(f"   ⚠️ La respuesta no es un archivo (intento {intento}/{max_intentos})")
+                continue
+            
+            if nombre_base is None:
+                nombre_base = f"cinta_testigo_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            nuevo_nombre = f"{nombre_base}{extension_exportada(response)}"
+            destino = guardar_respuesta(response, os.path.join(download_dir, nuevo_nombre))
+            print(f"   ✓ Guardado: {nuevo_nombre} ({len(response.content)} bytes)")
+            registrar_unidad('cinta', 'TODAS', fecha_desde, fecha_hasta, destino, time.time() - inicio)
+            
+            print(f"\n✅ CINTA TESTIGO COMPLETADO")
+            return destino
+        
+        except Exception as e:
+            print(f"   ⚠️ Error: {e} (intento {intento}/{max_intentos})")
+            if intento < max_intentos:
+                time.sleep(3)
+    
+    print(f"   ❌ Fallo después de {max_intentos} intentos")
+    registrar_unidad('cinta', 'TODAS', fecha_desde, fecha_hasta, segundos=time.time() - inicio,
+                     error=f"Fallo después de {max_intentos} intentos")
+    return None
+
+
+def obtener_sucursales_detalle(html):
+    """
+    Obtiene las opciones del desplegable cmbSucursal de Ticket con Detalle.
+    
+    Returns:
+        list: [(value, texto), ...] en el orden de la página
+    """
+    soup, _, _ = parsear_formulario(html)
+    dropdown = soup.find('select', {'name': CAMPO_SUCURSAL})
+    
+    if dropdown is None:
+        raise ValueError("No se encontró el desplegable de sucursales")
+    
+    return [(option.get('value', ''), option.get_text(strip=True)) for option in dropdown.find_all('option')]
+
+
+def exportar_detalle_sucursal(session, url, html_pagina, valor, texto, download_dir,
+                              fecha_desde, fecha_hasta, max_intentos=3, prefijo="   "):
+    """
+    Exporta Ticket con Detalle de una sucursal (con reintentos).
+    
+    Args:
+        url: URL de la página Ticket con Detalle
+        html_pagina: HTML actual de la página (estado del formulario)
+        valor, texto: value y texto de la opción de cmbSucursal
+    
+    Returns:
+        str: nombre del archivo guardado o None
+    """
+    nombre_sucursal = texto.replace(' ', '_')
+    fecha_archivo = fecha_hasta.strftime('%d_%m_%Y')
+    inicio = time.time()
+    
+    for intento in range(1, max_intentos + 1):
+        if intento > 1:
+            print(f"{prefijo}🔄 Reintento {intento}/{max_intentos}")
+        
+        try:
+            soup, fields, post_url = parsear_formulario(html_pagina)
+            cargar_fechas(fields, fecha_desde, fecha_hasta)
+            fields[CAMPO_SUCURSAL] = valor
+            agregar_boton(soup, fields, BOTON_EXPORTAR_DETALLE)
+            response = postear_formulario(session, post_url, fields, referer=url)
+            
+            if es_archivo_exportado(response):
+                nuevo_nombre = f"{nombre_sucursal}_{fecha_archivo}{extension_exportada(response)}"
+                guardar_respuesta(response, os.path.join(download_dir, nuevo_nombre))
+                print(f"{prefijo}✓ Guardado: {nuevo_nombre} ({len(response.content)} bytes)")
+                registrar_unidad('detalle', nombre_sucursal, fecha_desde, fecha_hasta, nuevo_nombre,
+                                 time.time() - inicio, download_dir=download_dir)
+                return nuevo_nombre
+            
+            # El servidor devolvió la página: usarla como nuevo estado del formulario
+            html_pagina = response.text
+            print(f"{prefijo}⚠️ La respuesta no es un archivo (intento {intento}/{max_intentos})")
+        
+        except Exception as e:
+            print(f"{prefijo}⚠️ Error: {e} (intento {intento}/{max_intentos})")
+            if intento < max_intentos:
+                time.sleep(3)
+                # Recargar la página por si el estado quedó inválido
+                try:
+                    html_pagina = session.get(url, timeout=30).text
+                except Exception:
+                    pass
+    
+    print(f"{prefijo}❌ Fallo después de {max_intentos} intentos")
+    registrar_unidad('detalle', nombre_sucursal, fecha_desde, fecha_hasta, segundos=time.time() - inicio,
+                     error=f"Fallo después de {max_intentos} intentos")
+    return None
+
+
+def extraer_tickets_detalle_http(session, download_dir, fecha_desde=None, fecha_hasta=None, sucursales=None):
+    """
+    Extrae Tickets con Detalle para todas las sucursales por HTTP (una por vez)
+    
+    Args:
+        session: requests.Session autenticada (ver session_functions.obtener_sesion)
+        fecha_desde: datetime object o None (por defecto: ayer)
+        fecha_hasta: datetime object o None (por defecto: hoy)
+        sucursales: nombres a extraer (por defecto: todas)
+    
+    Returns:
+        list: nombres de los archivos guardados
+    """
+    print("\n" + "=" * 70)
+    print("EXTRACCIÓN HTTP: TICKETS CON DETALLE")
+    print("=" * 70)
+    
+    fecha_desde, fecha_hasta = _fechas_por_defecto(fecha_desde, fecha_hasta)
+    print(f"\n   📅 Desde: {fecha_desde.strftime('%d/%m/%Y')} | Hasta: {fecha_hasta.strftime('%d/%m/%Y')}")
+    
+    # 1. Ubicar la página en el menú
+    print("\n[1/3] NAVEGANDO A TICKET CON DETALLE")
+    url = buscar_url_menu(session, "Ticket con Detalle")
+    response = session.get(url, timeout=30)
+    print(f"   ✓ {url}")
+    
+    # 2. Detectar sucursales
+    print("\n[2/3] DETECTANDO SUCURSALES")
+    options = [(valor, texto) for valor, texto in obtener_sucursales_detalle(response.text)
+               if incluir_sucursal(texto, sucursales)]
+    print(f"   Total de sucursales: {len(options)}")
+    for i, (_, texto) in enumerate(options):
+        print(f"   [{i}] {texto}")
+    
+    # 3. Exportar cada sucursal
+    print("\n[3/3] PROCESANDO TODAS LAS SUCURSALES")
+    archivos_guardados = []
+    
+    for i, (valor, texto) in enumerate(options):
+        print(f"\n   --- Procesando {i+1}/{len(options)}: {texto} ---")
+        nuevo_nombre = exportar_detalle_sucursal(
+            session, url, response.text, valor, texto, download_dir, fecha_desde, fecha_hasta
+        )
+        if nuevo_nombre:
+            archivos_guardados.append(nuevo_nombre)
+    
+    print(f"\n✅ TICKETS CON DETALLE COMPLETADO")
+    print(f"   Archivos guardados: {len(archivos_guardados)}/{len(options)}")
+    
+    return archivos_guardados
+
+
+def extraer_tickets_detalle_concurrente(download_dir, fecha_desde=None, fecha_hasta=None,
+                                        max_workers=None, max_intentos=3, sucursales=None):
+    """
+    Extrae Tickets con Detalle exportando todas las sucursales al mismo tiempo.
+    
+    Cada worker usa su propia sesión (creada desde las cookies cacheadas, sin
+    repetir el login), así los postbacks ASP.NET de una sucursal no pisan el
+    estado de otra.
+    
+    Args:
+        fecha_desde: datetime object o None (por defecto: ayer)
+        fecha_hasta: datetime object o None (por defecto: hoy)
+        max_workers: sesiones simultáneas (por defecto: MAX_WORKERS_DETALLE en .env o 4)
+        max_intentos: reintentos por sucursal
+        sucursales: nombres a extraer (por defecto: todas)
+    
+    Returns:
+        list: nombres de los archivos guardados (mismo orden que cmbSucursal)
+    """
+    print("\n" + "=" * 70)
+    print("EXTRACCIÓN HTTP CONCURRENTE: TICKETS CON DETALLE")
+    print("=" * 70)
+    
+    fecha_desde, fecha_hasta = _fechas_por_defecto(fecha_desde, fecha_hasta)
+    print(f"\n   📅 Desde: {fecha_desde.strftime('%d/%m/%Y')} | Hasta: {fecha_hasta.strftime('%d/%m/%Y')}")
+    
+    if max_workers is None:
+        max_workers = int(os.getenv('MAX_WORKERS_DETALLE', '4'))
+    max_workers = max(1, max_workers)
+    
+    sesiones = threading.local()
+    
+    def obtener_sesion_worker():
+        """Sesión propia del thread (cookies compartidas, re-login único si vencen)"""
+        if getattr(sesiones, 'session', None) is None:
+            session = obtener_sesion()
+            if session is None:
+                raise RuntimeError("Login HTTP fallido")
+            sesiones.session = session
+        return sesiones.session
+    
+    # 1. Ubicar la página y las sucursales con una primera sesión
+    print("\n[1/3] NAVEGANDO A TICKET CON DETALLE")
+    session = obtener_sesion()
+    if session is None:
+        raise RuntimeError("Login HTTP fallido")
+    url = buscar_url_menu(session, "Ticket con Detalle")
+    options = [(valor, texto) for valor, texto in obtener_sucursales_detalle(session.get(url, timeout=30).text)
+               if incluir_sucursal(texto, sucursales)]
+    print(f"   ✓ {url}")
+    
+    print("\n[2/3] DETECTANDO SUCURSALES")
+    print(f"   Total de sucursales: {len(options)}")
+    for i, (_, texto) in enumerate(options):
+        print(f"   [{i}] {texto}")
+    
+    def exportar(valor, texto):
+        prefijo = f"   [{texto}] "
+        session = obtener_sesion_worker()
+        html_pagina = session.get(url, timeout=30).text
+        return exportar_detalle_sucursal(
+            session, url, html_pagina, valor, texto, download_dir,
+            fecha_desde, fecha_hasta, max_intentos=max_intentos, prefijo=prefijo
+        )
+    
+    # 2. Exportar todas las sucursales en paralelo
+    print(f"\n[3/3] EXPORTANDO SUCURSALES ({max_workers} en paralelo)")
+    inicio = time.time()
+    resultados = [None] * len(options)
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futuros = {executor.submit(exportar, valor, texto): i for i, (valor, texto) in enumerate(options)}
+        
+        for futuro in as_completed(futuros):
+            i = futuros[futuro]
+            try:
+                resultados[i] = futuro.result()
+            except Exception as e:
+                print(f"   [{options[i][1]}] ❌ Error: {e}")
+    
+    archivos_guardados = [nombre for nombre in resultados if nombre]
+    
+    print(f"\n✅ TICKETS CON DETALLE COMPLETADO ({time.time() - inicio:.1f}s)")
+    print(f"   Archivos guardados: {len(archivos_guardados)}/{len(options)}")
+    
+    return archivos_guardados
+
+
+def obtener_checks_sucursales(soup):
+    """
+    Obtiene los checkboxes de sucursales de la página de Consumos.
+    
+    Returns:
+        list: [(name, value, texto_label), ...] en el orden de la página
+    """
+    checks = []
+    
+    for input_tag in soup.find_all('input', id=lambda x: x and x.startswith(PREFIJO_CHECK_SUCURSAL)):
+        label = soup.find('label', attrs={'for': input_tag['id']})
+        texto = label.get_text(strip=True) if label else input_tag['id'].split('_')[-1]
+        checks.append((input_tag.get('name'), input_tag.get('value', 'on'), texto))
+    
+    return checks
+
+
+def extraer_consumos_http(session, download_dir, fecha_desde=None, fecha_hasta=None, sucursales=None):
+    """
+    Extrae datos de Consumos por sucursal por HTTP (un checkbox por vez)
+    
+    La página se descarga y las fechas se cargan una sola vez: cada Procesar
+    parte del formulario ya procesado de la sucursal anterior (mismo estado
+    ASP.NET, mismas fechas), cambiando solo el checkbox marcado.
+    
+    Args:
+        session: requests.Session autenticada (ver session_functions.obtener_sesion)
+        fecha_desde: datetime object o None (por defecto: ayer)
+        fecha_hasta: datetime object o None (por defecto: hoy)
+        sucursales: nombres a extraer (por defecto: todas)
+    
+    Returns:
+        list: nombres de los archivos guardados
+    """
+    print("\n" + "=" * 70)
+    print("EXTRACCIÓN HTTP: CONSUMOS POR SUCURSAL")
+    print("=" * 70)
+    
+    fecha_desde, fecha_hasta = _fechas_por_defecto(fecha_desde, fecha_hasta)
+    print(f"\n   📅 Desde: {fecha_desde.strftime('%d/%m/%Y')} | Hasta: {fecha_hasta.strftime('%d/%m/%Y')}")
+    
+    def cargar_pagina():
+        """Formulario limpio de Consumos con las fechas cargadas"""
+        response = session.get(CONSUMOS_URL, timeout=30)
+        soup, fields, post_url = parsear_formulario(response.text)
+        cargar_fechas(fields, fecha_desde, fecha_hasta)
+        return soup, fields, post_url
+    
+    # 1. Cargar página y sucursales (una sola vez)
+    print("\n[1/3] NAVEGANDO A CONSUMOS")
+    soup, fields, post_url = cargar_pagina()
+    todos_los_checks = obtener_checks_sucursales(soup)
+    checks = [check for check in todos_los_checks if incluir_sucursal(check[2], sucursales)]
+    
+    if not todos_los_checks:
+        raise ValueError("No se encontraron checkboxes de sucursales")
+    
+    print("\n[2/3] PREPARANDO SUCURSALES")
+    print(f"   Sucursales a procesar: {len(checks)}")
+    for i, (_, _, texto) in enumerate(checks):
+        print(f"   {i+1}. {texto}")
+    
+    print("\n[3/3] EXPORTANDO POR SUCURSAL")
+    archivos_guardados = []
+    fecha_archivo = fecha_hasta.strftime('%d_%m_%Y')
+    
+    for i, (name, valor, texto) in enumerate(checks):
+        nombre_sucursal = texto.replace(' ', '_')
+        print(f"\n   --- Procesando {i+1}/{len(checks)}: {texto} ---")
+        
+        max_intentos = 3
+        archivo_guardado = False
+        inicio = time.time()
+        
+        for intento in range(1, max_intentos + 1):
+            if intento > 1:
+                print(f"\n   🔄 Reintento {intento}/{max_intentos}")
+            
+            try:
+                if intento > 1:
+                    # Solo ante un error se vuelve a pedir la página limpia
+                    soup, fields, post_url = cargar_pagina()
+                
+                # Solo el checkbox de la sucursal actual
+                datos = dict(fields)
+                for check_name, _, _ in todos_los_checks:
+                    datos.pop(check_name, None)
+                datos[name] = valor
+                
+                agregar_boton(soup, datos, BOTON_PROCESAR)
+                response = postear_formulario(session, post_url, datos, referer=CONSUMOS_URL)
+                print(f"   ✓ Procesar ejecutado")
+                
+                # La página procesada es el punto de partida de la siguiente sucursal
+                soup, fields, post_url = parsear_formulario(response.text)
+                datos = dict(fields)
+                agregar_boton(soup, datos, BOTON_EXPORTAR)
+                response = postear_formulario(session, post_url, datos, referer=CONSUMOS_URL)
+                
+                if es_archivo_exportado(response):
+                    nuevo_nombre = f"consumos_{nombre_sucursal}_{fecha_archivo}{extension_exportada(response)}"
+                    guardar_respuesta(response, os.path.join(download_dir, nuevo_nombre))
+                    print(f"   ✓ Guardado: {nuevo_nombre} ({len(response.content)} bytes)")
+                    registrar_unidad('consumos', nombre_sucursal, fecha_desde, fecha_hasta, nuevo_nombre,
+                                     time.time() - inicio, download_dir=download_dir)
+                    archivos_guardados.append(nuevo_nombre)
+                    archivo_guardado = True
+                    break
+                
+                print(f"   ⚠️ La respuesta no es un archivo (intento {intento}/{max_intentos})")
+            
+            except Exception as e:
+                print(f"   ⚠️ Error: {e} (intento {intento}/{max_intentos})")
+                if intento < max_intentos:
+                    time.sleep(3)
+        
+        if not archivo_guardado:
+            print(f"   ❌ Fallo después de {max_intentos} intentos")
+            registrar_unidad('consumos', nombre_sucursal, fecha_desde, fecha_hasta, segundos=time.time() - inicio,
+                             error=f"Fallo después de {max_intentos} intentos")
+    
+    print("\n" + "=" * 70)
+    print("✅ CONSUMOS COMPLETADO")
+    print("=" * 70)
+    print(f"\n   Total archivos guardados: {len(archivos_guardados)}/{len(checks)}")
+    
+    return archivos_guardados
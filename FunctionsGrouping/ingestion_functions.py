@@ -0,0 +1,447 @@
+"""
+Ingesta incremental de los reportes descargados (usada por main_database_incremental.py y por el scheduler)
+
+Agrega Consumos, Cintas Testigo y Tickets con Detalle a la base existente sin
+borrar datos. Los archivos ya cargados (mismo hash de contenido) se omiten sin
+parsear, y los que la extracción ya leyó en el mismo proceso se reutilizan
+desde memoria en lugar de volver a leerlos del disco.
+"""
+from datetime import datetime
+from pathlib import Path
+import glob
+import os
+
+import pandas as pd
+
+from .connection_functions import checkpoint
+from .reader_functions import leer_reportes_paralelo, REQUERIDAS_REPORTE
+from .database_functions import (
+    upsert_consumos, numerar_lineas, tipar_tickets, separar_fecha_hora, insertar_tickets_nuevos,
+    CLAVE_TICKETS, asegurar_registro_ingesta, archivos_pendientes, registrar_ingesta, rango_fechas,
+    preparar_cinta, upsert_cinta, asignar_turnos, actualizar_resumenes_diarios
+)
+from .migration_functions import migrar, version_actual
+from .parquet_functions import exportar_parquet
+
+CARPETAS_REPORTE = {
+    'consumos': Path('DataBase/Consumos'),
+    'cinta': Path('DataBase/Cinta'),
+    'detalle': Path('DataBase/Detalle'),
+}
+
+
+def archivos_en_carpeta(carpeta):
+    """Archivos .xls / .xlsx de la carpeta, ordenados por nombre"""
+    archivos = []
+    archivos.extend(glob.glob(str(Path(carpeta) / '*.xls')))
+    archivos.extend(glob.glob(str(Path(carpeta) / '*.xlsx')))
+    return sorted(archivos)
+
+
+def leer_archivos(archivos, requeridas=None, lecturas=None, max_workers=None):
+    """
+    Lee los archivos reutilizando los DataFrames que ya estén en memoria.
+    
+    Args:
+        requeridas: columnas que identifican la fila de encabezados (ver leer_reporte)
+        lecturas: dict ruta absoluta → DataFrame ya leído (ver extraer() en pipeline_functions)
+        max_workers: procesos para los que hay que parsear (ver leer_reportes_paralelo)
+    
+    Returns:
+        list: un dict por archivo, en el mismo orden: {'archivo', 'df', 'filas', 'segundos', 'error', 'memoria'}
+    """
+    lecturas = lecturas or {}
+    faltantes = [archivo for archivo in archivos if os.path.abspath(archivo) not in lecturas]
+    
+    # Solo los que no están en memoria se parsean (en paralelo)
+    leidas = {lectura['archivo']: lectura for lectura in leer_reportes_paralelo(faltantes, requeridas, max_workers)}
+    
+    resultado = []
+    for archivo in archivos:
+        df = lecturas.get(os.path.abspath(archivo))
+        if df is None:
+            resultado.append({**leidas[archivo], 'memoria': False})
+        else:
+            resultado.append({
+                'archivo': archivo, 'df': df.copy(), 'filas': len(df), 'segundos': 0.0, 'error': None, 'memoria': True,
+            })
+    
+    return resultado
+
+
+def _origen(lectura):
+    """Texto del origen de una lectura para los mensajes"""
+    return "en memoria" if lectura['memoria'] else f"{lectura['segundos']:.2f}s"
+
+
+def ingestar_consumos(conn, archivos, lecturas=None, max_workers=None):
+    """
+    Agrega los productos de los archivos de Consumos con su fecha de carga.
+    
+    Returns:
+        dict: {'archivos', 'insertados', 'actualizados'}
+    """
+    resumen = {'archivos': 0, 'insertados': 0, 'actualizados': 0}
+    
+    print("\n" + "=" * 70)
+    print("PROCESANDO: CONSUMOS (CON FECHA DE CARGA)")
+    print("=" * 70)
+    
+    # 1. VERIFICAR ESTRUCTURA DE LA TABLA
+    print("\n[1/5] VERIFICANDO ESTRUCTURA DE LA TABLA")
+    # La tabla ya tiene Fecha_Carga y el índice único (migraciones)
+    total = conn.execute("SELECT COUNT(*) FROM consumos").fetchone()[0]
+    print(f"   ✓ {total} productos en la base de datos")
+    
+    # 2. BUSCAR ARCHIVOS DE CONSUMOS NUEVOS
+    print("\n[2/5] BUSCANDO ARCHIVOS DE CONSUMOS")
+    
+    # Omitir los archivos que ya se cargaron (mismo contenido)
+    total_archivos = len(archivos)
+    archivos, hashes = archivos_pendientes(conn, archivos)
+    if total_archivos > len(archivos):
+        print(f"   ⏭️ {total_archivos - len(archivos)} archivos ya cargados (omitidos)")
+    
+    if not archivos:
+        print("   ⚠️ No hay archivos de Consumos nuevos")
+        return resumen
+    print(f"   ✓ {len(archivos)} archivos encontrados")
+    
+    # 3. LEER Y COMBINAR ARCHIVOS
+    print("\n[3/5] LEYENDO ARCHIVOS DE CONSUMOS")
+    
+    dataframes = []
+    ingestas = []
+    
+    for lectura in leer_archivos(archivos, REQUERIDAS_REPORTE['consumos'], lecturas, max_workers):
+        archivo = lectura['archivo']
+        
+        # Formato: consumos_SUCURSAL_DD_MM_YYYY.xlsx
+        # Ejemplo: consumos_ENTRE_RIOS_18_01_2026.xlsx → SUCURSAL = ENTRE_RIOS
+        nombre_archivo = Path(archivo).stem
+        partes = nombre_archivo.split('_')
+        nombre_sucursal = '_'.join(partes[1:-3])  # Maneja nombres con guiones bajos
+        
+        print(f"   📄 {nombre_archivo}")
+        print(f"      Sucursal: {nombre_sucursal}")
+        
+        if lectura['error']:
+            raise RuntimeError(f"No se pudo leer {nombre_archivo}: {lectura['error']}")
+        
+        # Mantener solo las primeras 3 columnas
+        df_temp = lectura['df'].iloc[:, :3].copy()
+        df_temp.columns = ['Familia', 'Codigo', 'Articulo']
+        df_temp['Sucursal'] = nombre_sucursal
+        
+        # Eliminar filas con NaN en columnas críticas
+        df_temp = df_temp.dropna(subset=['Codigo', 'Articulo'])
+        
+        dataframes.append(df_temp)
+        ingestas.append((archivo, hashes[archivo], 'consumos', nombre_sucursal, len(df_temp)))
+        print(f"      ✓ {len(df_temp)} productos leídos ({_origen(lectura)})")
+    
+    # 4. AGREGAR FECHA DE CARGA
+    print("\n[4/5] AGREGANDO FECHA DE CARGA")
+    
+    df_nuevos = pd.concat(dataframes, ignore_index=True)
+    fecha_carga = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    df_nuevos['Fecha_Carga'] = fecha_carga
+    
+    print(f"   Total productos en archivos: {len(df_nuevos)}")
+    print(f"   Fecha de carga: {fecha_carga}")
+    
+    # 5. INSERTAR O ACTUALIZAR EN LA BASE DE DATOS
+    print("\n[5/5] INSERTANDO/ACTUALIZANDO PRODUCTOS EN LA BASE DE DATOS")
+    
+    # Upsert por conjuntos: inserta (Codigo, Articulo, Sucursal) nuevos y actualiza la fecha de los existentes
+    insertados, actualizados = upsert_consumos(conn, df_nuevos)
+    print(f"   ✓ {insertados} productos nuevos insertados")
+    print(f"   ✓ {actualizados} productos existentes actualizados (fecha)")
+    
+    # Registrar los archivos cargados (se confirma junto con los datos)
+    for ingesta in ingestas:
+        registrar_ingesta(conn, *ingesta)
+    
+    print("\n   Desglose por sucursal:")
+    for sucursal, count in df_nuevos['Sucursal'].value_counts(sort=False).items():
+        print(f"   • {sucursal}: {count} productos procesados")
+    
+    resumen.update(archivos=len(ingestas), insertados=insertados, actualizados=actualizados)
+    return resumen
+
+
+def ingestar_cintas(conn, archivos, lecturas=None, max_workers=None):
+    """
+    Guarda las Cintas Testigo en su tabla (el Turno se asigna después por SQL).
+    
+    Returns:
+        dict: {'archivos', 'tickets'}
+    """
+    resumen = {'archivos': 0, 'tickets': 0}
+    
+    print("\n[1/7] CARGANDO CINTA TESTIGO")
+    
+    # Omitir los archivos que ya se cargaron (mismo contenido)
+    total_archivos = len(archivos)
+    archivos, hashes = archivos_pendientes(conn, archivos)
+    if total_archivos > len(archivos):
+        print(f"   ⏭️ {total_archivos - len(archivos)} archivos ya cargados (omitidos)")
+    
+    if not archivos:
+        print("   ⚠️ No hay archivos de Cinta Testigo nuevos")
+        return resumen
+    
+    for lectura in leer_archivos(archivos, REQUERIDAS_REPORTE['cinta'], lecturas, max_workers):
+        archivo = lectura['archivo']
+        print(f"   📄 {Path(archivo).name}")
+        
+        if lectura['error']:
+            raise RuntimeError(f"No se pudo leer {Path(archivo).name}: {lectura['error']}")
+        
+        df_raw_cinta = lectura['df']
+        df_cinta = preparar_cinta(df_raw_cinta)
+        
+        if df_cinta is None:
+            print("      ⚠️ No se encontraron columnas Número y Turno")
+            print(f"      Columnas disponibles: {list(df_raw_cinta.columns)}")
+            continue
+        
+        upsert_cinta(conn, df_cinta)
+        registrar_ingesta(
+            conn, archivo, hashes[archivo], 'cinta', 'TODAS', len(df_cinta), *rango_fechas(df_raw_cinta)
+        )
+        resumen['archivos'] += 1
+        resumen['tickets'] += len(df_cinta)
+        print(f"      ✓ {len(df_cinta)} tickets guardados en cinta_testigo ({_origen(lectura)})")
+    
+    return resumen
+
+
+def ingestar_detalle(conn, archivos, lecturas=None, max_workers=None):
+    """
+    Inserta las líneas de Tickets con Detalle nuevas (la clave por línea descarta las repetidas).
+    
+    Returns:
+        dict: {'archivos', 'leidos', 'insertados', 'por_sucursal'}
+    """
+    resumen = {'archivos': 0, 'leidos': 0, 'insertados': 0, 'por_sucursal': {}}
+    
+    # 2. BUSCAR ARCHIVOS DE TICKETS
+    print("\n[2/7] BUSCANDO ARCHIVOS DE TICKETS DETALLE")
+    
+    # Omitir los archivos que ya se cargaron (mismo contenido)
+    total_archivos = len(archivos)
+    archivos, hashes = archivos_pendientes(conn, archivos)
+    if total_archivos > len(archivos):
+        print(f"   ⏭️ {total_archivos - len(archivos)} archivos ya cargados (omitidos)")
+    
+    if not archivos:
+        print("   ⚠️ No hay archivos de Tickets Detalle nuevos")
+        return resumen
+    print(f"   ✓ {len(archivos)} archivos encontrados")
+    
+    # 3. LEER Y COMBINAR ARCHIVOS
+    print("\n[3/7] LEYENDO ARCHIVOS DE TICKETS DETALLE")
+    
+    dataframes = []
+    ingestas = []
+    
+    for lectura in leer_archivos(archivos, REQUERIDAS_REPORTE['detalle'], lecturas, max_workers):
+        archivo = lectura['archivo']
+        
+        # Formato generado por la extracción: SUCURSAL_DD_MM_YYYY.xlsx
+        # Ejemplo: ENTRE_RIOS_18_01_2026.xlsx → SUCURSAL = ENTRE_RIOS
+        nombre_archivo = Path(archivo).stem
+        partes = nombre_archivo.split('_')
+        nombre_sucursal = '_'.join(partes[:-3]) if len(partes) > 3 else partes[0]
+        
+        print(f"   📄 {nombre_archivo}")
+        print(f"      Sucursal: {nombre_sucursal}")
+        
+        if lectura['error']:
+            raise RuntimeError(f"No se pudo leer {nombre_archivo}: {lectura['error']}")
+        df_temp = lectura['df']
+        
+        # La columna Sucursal viene vacía del archivo: se reemplaza por la del nombre
+        if 'Sucursal' in df_temp.columns:
+            df_temp = df_temp.drop(columns=['Sucursal'])
+        df_temp['Sucursal'] = nombre_sucursal
+        
+        # Tipos de la tabla (Número, Código, Cantidad, Importe...); sin Número o Código se descarta
+        df_temp = tipar_tickets(df_temp)
+        
+        # Ordinal del producto dentro del ticket (parte de la clave única)
+        df_temp = numerar_lineas(df_temp)
+        
+        dataframes.append(df_temp)
+        ingestas.append((archivo, hashes[archivo], 'detalle', nombre_sucursal, len(df_temp), *rango_fechas(df_temp)))
+        print(f"      ✓ {len(df_temp)} registros leídos ({_origen(lectura)})")
+    
+    # 4. COMBINAR
+    print("\n[4/7] COMBINANDO DATOS")
+    
+    df_tickets = pd.concat(dataframes, ignore_index=True)
+    print(f"   Total registros: {len(df_tickets)}")
+    
+    # 5. DIVIDIR F.CIERRE EN FECHA Y HORA
+    print("\n[5/7] PROCESANDO FECHA Y HORA")
+    
+    for col in df_tickets.columns:
+        if 'cierre' in col.lower():
+            print(f"   Columna encontrada: {col}")
+            # Fecha como número de día y Hora como minuto del día; F. Cierre no se guarda
+            df_tickets = separar_fecha_hora(df_tickets, col)
+            print(f"   ✓ Fecha y Hora extraídas (columna '{col}' eliminada)")
+            break
+    
+    # 6. VALIDAR Y FILTRAR DUPLICADOS
+    print("\n[6/7] VALIDANDO CALIDAD DE DATOS")
+    
+    registros_antes = len(df_tickets)
+    df_tickets = df_tickets[df_tickets['Sucursal'].notna()]
+    registros_sin_sucursal = registros_antes - len(df_tickets)
+    if registros_sin_sucursal > 0:
+        print(f"   ⚠️ Eliminados {registros_sin_sucursal} registros sin Sucursal")
+    else:
+        print("   ✓ Todos los registros tienen Sucursal")
+    
+    # Misma línea en archivos solapados
+    registros_antes = len(df_tickets)
+    df_tickets = df_tickets.drop_duplicates(subset=CLAVE_TICKETS)
+    duplicados_internos = registros_antes - len(df_tickets)
+    if duplicados_internos > 0:
+        print(f"   ⚠️ Eliminados {duplicados_internos} duplicados internos")
+    else:
+        print("   ✓ No hay duplicados internos")
+    
+    print(f"   Total registros válidos: {len(df_tickets)}")
+    
+    # 7. INSERTAR SOLO TICKETS NUEVOS (la clave por línea descarta los duplicados)
+    print("\n[7/7] INSERTANDO TICKETS EN LA BASE DE DATOS")
+    
+    nuevos_por_sucursal = insertar_tickets_nuevos(conn, df_tickets)
+    total_nuevos = sum(nuevos_por_sucursal.values())
+    
+    print(f"   Registros en archivos: {len(df_tickets)}")
+    print(f"   Duplicados detectados: {len(df_tickets) - total_nuevos}")
+    
+    if total_nuevos > 0:
+        print(f"   ✓ {total_nuevos} registros nuevos insertados")
+        print("\n   Desglose por sucursal:")
+        for sucursal, count in nuevos_por_sucursal.items():
+            print(f"   • {sucursal}: {count} tickets")
+    else:
+        print("   ℹ️ No hay registros nuevos para insertar (todos son duplicados)")
+    
+    # Registrar los archivos cargados (se confirma junto con los datos)
+    for ingesta in ingestas:
+        registrar_ingesta(conn, *ingesta)
+    print(f"   ✓ {len(ingestas)} archivos registrados en ingested_files")
+    
+    resumen.update(
+        archivos=len(ingestas), leidos=len(df_tickets), insertados=total_nuevos, por_sucursal=dict(nuevos_por_sucursal)
+    )
+    return resumen
+
+
+def limpiar_archivos(archivos):
+    """Elimina los archivos ya procesados; retorna cuántos se eliminaron"""
+    print("\n" + "=" * 70)
+    print("LIMPIANDO CARPETAS")
+    print("=" * 70)
+    
+    eliminados = 0
+    for archivo in archivos:
+        try:
+            os.remove(archivo)
+            eliminados += 1
+            print(f"   ✓ Eliminado: {Path(archivo).name}")
+        except Exception as e:
+            print(f"   ⚠️ Error eliminando {Path(archivo).name}: {e}")
+    
+    print(f"\n✓ Total archivos eliminados: {eliminados}")
+    print("✅ CARPETAS LIMPIADAS")
+    return eliminados
+
+
+def ingestar(conn, archivos=None, lecturas=None, limpiar=True, max_workers=None):
+    """
+    Actualización incremental: migra el esquema, carga los reportes, asigna
+    Turnos, confirma y (opcionalmente) elimina los archivos procesados.
+    
+    Args:
+        archivos: dict reporte ('consumos', 'cinta', 'detalle') → rutas
+                  (por defecto, o si falta un reporte: los archivos de su carpeta en DataBase/)
+        lecturas: dict ruta absoluta → DataFrame ya leído por la extracción
+        limpiar: eliminar los archivos procesados después del commit
+        max_workers: procesos para parsear los archivos que no están en memoria
+    
+    Returns:
+        dict: {'consumos', 'cinta', 'detalle', 'turnos', 'dias_ventas', 'total_consumos',
+               'total_tickets', 'parquet', 'eliminados'}
+    """
+    archivos = dict(archivos or {})
+    for reporte, carpeta in CARPETAS_REPORTE.items():
+        if reporte not in archivos:
+            archivos[reporte] = archivos_en_carpeta(carpeta)
+    
+    # Esquema tipado y versionado: se aplican las migraciones pendientes antes de cargar
+    migrar(conn)
+    print(f"✓ Esquema en versión {version_actual(conn)}")
+    
+    # Registro de archivos ya cargados (hash del contenido → se omiten sin parsear)
+    asegurar_registro_ingesta(conn)
+    
+    resultado = {'consumos': ingestar_consumos(conn, archivos['consumos'], lecturas, max_workers)}
+    
+    print("\n" + "=" * 70)
+    print("PROCESANDO: TICKETS DETALLE (INSERTAR TODOS)")
+    print("=" * 70)
+    resultado['cinta'] = ingestar_cintas(conn, archivos['cinta'], lecturas, max_workers)
+    resultado['detalle'] = ingestar_detalle(conn, archivos['detalle'], lecturas, max_workers)
+    
+    # ========== TURNO DESDE CINTA TESTIGO ==========
+    print("\n" + "=" * 70)
+    print("ASIGNANDO TURNO DESDE CINTA TESTIGO")
+    print("=" * 70)
+    
+    # UPDATE indexado sobre las líneas sin Turno (incluye tickets cargados antes que su Cinta)
+    resultado['turnos'] = asignar_turnos(conn)
+    print(f"\n✓ {resultado['turnos']} líneas de ticket con TURNO asignado")
+    
+    # Resúmenes diarios: solo los días que tocaron las líneas nuevas y los Turnos asignados
+    resultado['dias_ventas'] = actualizar_resumenes_diarios(conn)
+    print(f"✓ Resúmenes diarios (ventas, productos y pares): {resultado['dias_ventas']} días recalculados")
+    
+    # ========== RESUMEN FINAL ==========
+    print("\n" + "=" * 70)
+    print("RESUMEN DE ACTUALIZACIÓN")
+    print("=" * 70)
+    
+    resultado['total_consumos'] = conn.execute("SELECT COUNT(*) FROM consumos").fetchone()[0]
+    resultado['total_tickets'] = conn.execute("SELECT COUNT(*) FROM tickets_detalle").fetchone()[0]
+    print(f"\n✓ Total productos en consumos: {resultado['total_consumos']}")
+    print(f"✓ Total registros en tickets_detalle: {resultado['total_tickets']}")
+    
+    conn.commit()
+    print("\n✅ ACTUALIZACIÓN INCREMENTAL COMPLETADA")
+    
+    # Dataset Parquet: solo las particiones (sucursal, mes) que tocó esta carga
+    resultado['parquet'] = exportar_parquet(conn)
+    if resultado['parquet'] is not None:
+        print(f"   ✓ Parquet: {resultado['parquet']['particiones']} particiones reescritas "
+              f"({resultado['parquet']['filas']} filas) en {resultado['parquet']['segundos']:.1f}s")
+    
+    # Pasar el WAL a la base (queda completa para git y el dashboard)
+    estado = checkpoint(conn)
+    if estado['bloqueado']:
+        print("   ⚠️ Checkpoint parcial: hay lectores usando una versión anterior (se completa en la próxima carga)")
+    else:
+        print("   ✓ Checkpoint WAL completado")
+    
+    # Solo después del commit: si algo falla, los archivos quedan para la próxima ejecución
+    resultado['eliminados'] = 0
+    if limpiar:
+        resultado['eliminados'] = limpiar_archivos([ruta for rutas in archivos.values() for ruta in rutas])
+    
+    return resultado
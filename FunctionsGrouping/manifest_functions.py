@@ -0,0 +1,177 @@
+"""
+Manifiesto de extracción
+
+Cada unidad extraída (reporte × sucursal × ventana de fechas) se registra con
+su estado, archivo, tamaño, cantidad de filas y duración. El estado es 'ok',
+'fallido' (sin archivo) o 'ilegible' (el archivo existe pero no se pudo leer;
+el error de lectura queda en la unidad). Al final de la ejecución el
+manifiesto se guarda en DataBase/extraction_manifest.json y
+`python main.py --retry-failed` vuelve a extraer las unidades que no están ok.
+
+Para contar las filas cada archivo se lee una vez; si se pidió conservar las
+lecturas (conservar_lecturas), el DataFrame queda en LECTURAS y la ingesta en
+el mismo proceso lo usa en lugar de volver a leer el archivo.
+"""
+from datetime import datetime
+from pathlib import Path
+import json
+import os
+import threading
+
+MANIFEST_PATH = Path('DataBase/extraction_manifest.json')
+
+# Unidades de la ejecución actual: {clave: unidad}
+UNIDADES = {}
+# Archivos ya leídos de la ejecución actual: {ruta absoluta: DataFrame}
+LECTURAS = {}
+_conservar = {'lecturas': False}
+_lock = threading.Lock()
+
+
+def clave_unidad(reporte, sucursal, desde, hasta):
+    """Clave única de la unidad: reporte|sucursal|desde|hasta"""
+    return f"{reporte}|{sucursal}|{desde}|{hasta}"
+
+
+def conservar_lecturas(activo=True):
+    """Guarda (o no) en LECTURAS los DataFrames leídos al registrar cada unidad"""
+    _conservar['lecturas'] = activo
+
+
+def reiniciar_unidades():
+    """Vacía las unidades y las lecturas de la ejecución anterior"""
+    with _lock:
+        UNIDADES.clear()
+        LECTURAS.clear()
+
+
+def leer_unidad(reporte, ruta):
+    """
+    Lee el archivo exportado (sin título ni encabezados).
+    
+    Returns:
+        tuple: (DataFrame, None), o (None, descripción del error) si no se puede leer
+    """
+    try:
+        from .reader_functions import leer_reporte, REQUERIDAS_REPORTE
+        
+        return leer_reporte(ruta, REQUERIDAS_REPORTE.get(reporte)), None
+    except Exception as e:
+        return None, f"Archivo ilegible: {type(e).__name__}: {e}"
+
+
+def registrar_unidad(reporte, sucursal, fecha_desde, fecha_hasta, archivo=None, segundos=None,
+                     error=None, download_dir=None):
+    """
+    Registra el resultado de una unidad de extracción.
+    
+    Args:
+        reporte: 'cinta', 'detalle' o 'consumos'
+        sucursal: nombre de la sucursal ('TODAS' para Cinta Testigo)
+        fecha_desde, fecha_hasta: datetime de la ventana extraída
+        archivo: ruta o nombre del archivo guardado (None si falló)
+        segundos: duración de la extracción de la unidad
+        error: descripción del fallo
+        download_dir: carpeta del archivo si `archivo` es solo el nombre
+    """
+    desde = fecha_desde.strftime('%d/%m/%Y')
+    hasta = fecha_hasta.strftime('%d/%m/%Y')
+    
+    ruta = None
+    if archivo:
+        ruta = os.path.join(download_dir, archivo) if download_dir and not os.path.isabs(archivo) else archivo
+    existe = bool(ruta) and os.path.exists(ruta)
+    df = None
+    if existe:
+        # Un archivo que no se puede leer (HTML de error, descarga truncada) no cuenta como ok
+        df, error = leer_unidad(reporte, ruta)
+        estado = 'ok' if df is not None else 'ilegible'
+    else:
+        estado = 'fallido'
+    
+    unidad = {
+        'reporte': reporte,
+        'sucursal': sucursal,
+        'desde': desde,
+        'hasta': hasta,
+        'estado': estado,
+        'archivo': ruta,
+        'bytes': os.path.getsize(ruta) if existe else None,
+        'filas': len(df) if df is not None else None,
+        'segundos': round(segundos, 2) if segundos is not None else None,
+        'error': error if estado != 'ok' else None,
+        'registrada': datetime.now().isoformat(timespec='seconds'),
+    }
+    
+    with _lock:
+        UNIDADES[clave_unidad(reporte, sucursal, desde, hasta)] = unidad
+        if df is not None and _conservar['lecturas']:
+            LECTURAS[os.path.abspath(ruta)] = df
+    
+    return unidad
+
+
+def cargar_manifiesto(ruta=MANIFEST_PATH):
+    """Lee el último manifiesto guardado; None si no existe"""
+    ruta = Path(ruta)
+    if not ruta.exists():
+        return None
+    
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def retomar_manifiesto(manifiesto):
+    """Carga las unidades de un manifiesto previo para que el reintento las actualice"""
+    with _lock:
+        UNIDADES.clear()
+        for unidad in manifiesto.get('unidades', []):
+            UNIDADES[clave_unidad(unidad['reporte'], unidad['sucursal'], unidad['desde'], unidad['hasta'])] = unidad
+
+
+def unidades_fallidas(manifiesto):
+    """Unidades con estado distinto de 'ok'"""
+    return [unidad for unidad in manifiesto.get('unidades', []) if unidad.get('estado') != 'ok']
+
+
+def guardar_manifiesto(motor, inicio, ruta=MANIFEST_PATH):
+    """Guarda las unidades registradas (escritura atómica) y retorna el manifiesto"""
+    with _lock:
+        unidades = sorted(UNIDADES.values(), key=lambda u: (u['reporte'], u['desde'], u['sucursal']))
+    
+    manifiesto = {
+        'motor': motor,
+        'inicio': inicio.isoformat(timespec='seconds'),
+        'fin': datetime.now().isoformat(timespec='seconds'),
+        'total': len(unidades),
+        'fallidas': sum(1 for unidad in unidades if unidad['estado'] != 'ok'),
+        'unidades': unidades,
+    }
+    
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = ruta.with_suffix('.tmp')
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2, ensure_ascii=False)
+    os.replace(temporal, ruta)
+    
+    return manifiesto
+
+
+def resumen_manifiesto(manifiesto):
+    """Imprime el estado de cada unidad del manifiesto"""
+    print(f"\n📋 MANIFIESTO: {manifiesto['total'] - manifiesto['fallidas']}/{manifiesto['total']} unidades OK")
+    for unidad in manifiesto['unidades']:
+        icono = '✓' if unidad['estado'] == 'ok' else '❌'
+        detalle = f"{unidad['filas']} filas, {unidad['bytes']} bytes" if unidad['estado'] == 'ok' else (unidad['error'] or 'sin archivo')
+        print(f"   {icono} {unidad['reporte']} | {unidad['sucursal']} | {unidad['desde']}-{unidad['hasta']} | {detalle}")
+
+
+def normalizar_sucursal(texto):
+    """Nombre de sucursal como aparece en los archivos (ENTRE RIOS → ENTRE_RIOS)"""
+    return texto.strip().replace(' ', '_').upper()
+
+
+def incluir_sucursal(texto, sucursales):
+    """Indica si la sucursal está en el filtro (None = todas)"""
+    return sucursales is None or normalizar_sucursal(texto) in {normalizar_sucursal(s) for s in sucursales}
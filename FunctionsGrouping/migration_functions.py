@@ -0,0 +1,597 @@
+"""
+Migraciones versionadas del esquema de la base SQLite
+
+Cada migración reescribe una tabla con tipos definidos y restricciones CHECK,
+así las lecturas (dashboard, reportes) no necesitan convertir columnas en
+cada carga. Las migraciones aplicadas quedan registradas en la tabla
+schema_migrations (versión, nombre y fecha); migrar() aplica solo las
+pendientes, en orden, cada una en su propia transacción.
+
+Desde la migración 4 las líneas de ticket están en un esquema estrella:
+fact_tickets guarda claves enteras hacia dim_sucursal y dim_producto
+(Código, Descripción y Familia) y tickets_detalle es una vista con la forma
+de la tabla anterior.
+
+Desde la migración 5, triggers sobre fact_tickets y dim_producto anotan en
+parquet_pendientes cada (sucursal, mes) que cambió, para que la exportación a
+Parquet (parquet_functions) reescriba solo esas particiones.
+
+Desde la migración 6, ventas_diarias resume facturación, cantidad, líneas y
+tickets por (sucursal, Fecha, Turno); los triggers anotan en
+ventas_pendientes los días que cambiaron y actualizar_resumenes_diarios
+(database_functions) recalcula solo esos. La migración 7 agrega producto_dia
+(cantidad y facturación por producto y día), recalculada con los mismos días.
+La migración 8 agrega pares_dia y producto_tickets_dia (tickets en los que se
+venden juntos dos productos y tickets por producto), con los mismos días.
+Los cuatro resúmenes son WITHOUT ROWID: Turno es '' en las líneas que
+todavía no lo tienen (en fact_tickets es NULL), porque las claves de esas
+tablas no admiten NULL. pares_dia guarda cada par una sola vez
+(producto_a < producto_b).
+
+Codificación de los tickets:
+- Cantidad e Importe: REAL
+- Número, Código, Mesa, Mozo y Linea: INTEGER
+- Fecha: número de día (días desde 1970-01-01)
+- Hora: minuto del día (0 a 1439)
+"""
+from datetime import datetime
+
+# Expresiones SQL para convertir los valores de texto de las tablas anteriores
+# (fechas 'YYYY-MM-DD[ HH:MM:SS]', horas 'HH:MM:SS[.ffffff]', números con coma decimal)
+_DIA_SQL = "CAST(julianday(date({})) - 2440587.5 AS INTEGER)"
+_MINUTO_SQL = "(CAST(strftime('%H', {0}) AS INTEGER) * 60 + CAST(strftime('%M', {0}) AS INTEGER))"
+_REAL_SQL = "CAST(NULLIF(REPLACE(TRIM({}), ',', '.'), '') AS REAL)"
+_ENTERO_SQL = "CAST(NULLIF(TRIM({}), '') AS INTEGER)"
+# Mes (año * 100 + mes) de un número de día
+_MES_SQL = "CAST(strftime('%Y%m', {} * 86400, 'unixepoch') AS INTEGER)"
+
+
+def _columnas(conn, tabla):
+    """Columnas de la tabla (lista vacía si no existe)"""
+    return [fila[1] for fila in conn.execute(f'PRAGMA table_info("{tabla}")')]
+
+
+def _reemplazar_tabla(conn, tabla, crear_sql, columnas_destino, select_sql):
+    """
+    Crea la tabla nueva, copia las filas de la anterior (si existe) y la reemplaza.
+    
+    Returns:
+        int: filas copiadas
+    """
+    conn.execute(f"DROP TABLE IF EXISTS {tabla}_nueva")
+    conn.execute(crear_sql.format(tabla=f"{tabla}_nueva"))
+    
+    copiadas = 0
+    if _columnas(conn, tabla):
+        lista = ', '.join(f'"{col}"' for col in columnas_destino)
+        cursor = conn.execute(f"INSERT OR IGNORE INTO {tabla}_nueva ({lista}) {select_sql}")
+        copiadas = cursor.rowcount
+        conn.execute(f"DROP TABLE {tabla}")
+    
+    conn.execute(f"ALTER TABLE {tabla}_nueva RENAME TO {tabla}")
+    return copiadas
+
+
+def _migracion_tickets_tipados(conn):
+    """tickets_detalle con tipos, Fecha como número de día y Hora como minuto del día"""
+    anteriores = _columnas(conn, 'tickets_detalle')
+    
+    def origen(col, expresion='{}'):
+        return expresion.format(f'"{col}"') if col in anteriores else 'NULL'
+    
+    # Fecha y Hora salen de sus columnas o, si faltan, de F. Cierre
+    fecha = origen('Fecha')
+    hora = origen('Hora')
+    if 'F. Cierre' in anteriores:
+        fecha = f'COALESCE({fecha}, "F. Cierre")'
+        hora = f'COALESCE({hora}, "F. Cierre")'
+    
+    # Ordinal por ticket si la tabla es anterior a la columna Linea
+    linea = '"Linea"' if 'Linea' in anteriores else (
+        'ROW_NUMBER() OVER (PARTITION BY "Sucursal", "Número", "Código" ORDER BY rowid)'
+    )
+    
+    expresiones = {
+        'Número': origen('Número', _ENTERO_SQL),
+        'Tipo': origen('Tipo'),
+        'Sucursal': origen('Sucursal'),
+        'Mesa': origen('Mesa', _ENTERO_SQL),
+        'Mozo': origen('Mozo', _ENTERO_SQL),
+        'Nombre': origen('Nombre'),
+        'Código': origen('Código', _ENTERO_SQL),
+        'Descripción': origen('Descripción'),
+        'Cantidad': origen('Cantidad', _REAL_SQL),
+        'Importe': origen('Importe', _REAL_SQL),
+        'Turno': origen('Turno'),
+        'Fecha': _DIA_SQL.format(fecha),
+        'Hora': _MINUTO_SQL.format(f'time({hora})'),
+        'Linea': linea,
+    }
+    select_sql = f"""
+        SELECT {', '.join(expresiones.values())} FROM tickets_detalle
+        WHERE {origen('Número')} IS NOT NULL AND {origen('Código')} IS NOT NULL AND {origen('Sucursal')} IS NOT NULL
+    """
+    
+    copiadas = _reemplazar_tabla(conn, 'tickets_detalle', """
+        CREATE TABLE {tabla} (
+            "Número" INTEGER NOT NULL CHECK (typeof("Número") = 'integer'),
+            Tipo TEXT,
+            Sucursal TEXT NOT NULL CHECK (Sucursal <> ''),
+            Mesa INTEGER CHECK (Mesa IS NULL OR typeof(Mesa) = 'integer'),
+            Mozo INTEGER CHECK (Mozo IS NULL OR typeof(Mozo) = 'integer'),
+            Nombre TEXT,
+            "Código" INTEGER NOT NULL CHECK (typeof("Código") = 'integer'),
+            "Descripción" TEXT,
+            Cantidad REAL CHECK (Cantidad IS NULL OR typeof(Cantidad) = 'real'),
+            Importe REAL CHECK (Importe IS NULL OR typeof(Importe) = 'real'),
+            Turno TEXT,
+            Fecha INTEGER CHECK (Fecha IS NULL OR (typeof(Fecha) = 'integer' AND Fecha >= 0)),
+            Hora INTEGER CHECK (Hora IS NULL OR (typeof(Hora) = 'integer' AND Hora BETWEEN 0 AND 1439)),
+            Linea INTEGER NOT NULL CHECK (typeof(Linea) = 'integer' AND Linea >= 1)
+        )
+    """, list(expresiones), select_sql)
+    
+    conn.execute("""
+        CREATE UNIQUE INDEX ux_tickets_linea
+        ON tickets_detalle (Sucursal, "Número", "Código", Linea)
+    """)
+    conn.execute("CREATE INDEX idx_tickets_fecha ON tickets_detalle (Sucursal, Fecha)")
+    return copiadas
+
+
+def _migracion_cinta_tipada(conn):
+    """cinta_testigo con Número entero y Fecha / Hora codificadas como en tickets_detalle"""
+    anteriores = _columnas(conn, 'cinta_testigo')
+    
+    def origen(col, expresion='{}'):
+        return expresion.format(f'"{col}"') if col in anteriores else 'NULL'
+    
+    hora = _MINUTO_SQL.format(f"time({origen('Hora')})")
+    select_sql = f"""
+        SELECT Sucursal, {origen('Número', _ENTERO_SQL)}, Turno, {_DIA_SQL.format(origen('Fecha'))}, {hora}
+        FROM cinta_testigo
+        WHERE "Número" IS NOT NULL AND Sucursal IS NOT NULL
+    """
+    
+    copiadas = _reemplazar_tabla(conn, 'cinta_testigo', """
+        CREATE TABLE {tabla} (
+            Sucursal TEXT NOT NULL CHECK (Sucursal <> ''),
+            "Número" INTEGER NOT NULL CHECK (typeof("Número") = 'integer'),
+            Turno TEXT,
+            Fecha INTEGER CHECK (Fecha IS NULL OR (typeof(Fecha) = 'integer' AND Fecha >= 0)),
+            Hora INTEGER CHECK (Hora IS NULL OR (typeof(Hora) = 'integer' AND Hora BETWEEN 0 AND 1439))
+        )
+    """, ['Sucursal', 'Número', 'Turno', 'Fecha', 'Hora'], select_sql)
+    
+    conn.execute('CREATE UNIQUE INDEX ux_cinta_ticket ON cinta_testigo (Sucursal, "Número")')
+    return copiadas
+
+
+def _migracion_consumos_tipados(conn):
+    """consumos con Codigo entero (igual que Código en tickets) y una fila por (Codigo, Articulo, Sucursal)"""
+    # De cada clave repetida se conserva la última fila cargada
+    select_sql = f"""
+        SELECT Familia, {_ENTERO_SQL.format('Codigo')}, Articulo, Sucursal, Fecha_Carga FROM consumos
+        WHERE Codigo IS NOT NULL AND Articulo IS NOT NULL AND Sucursal IS NOT NULL
+          AND rowid IN (SELECT MAX(rowid) FROM consumos GROUP BY Codigo, Articulo, Sucursal)
+    """
+    if _columnas(conn, 'consumos') and 'Fecha_Carga' not in _columnas(conn, 'consumos'):
+        select_sql = select_sql.replace('Fecha_Carga FROM', 'NULL FROM')
+    
+    copiadas = _reemplazar_tabla(conn, 'consumos', """
+        CREATE TABLE {tabla} (
+            Familia TEXT,
+            Codigo INTEGER NOT NULL CHECK (typeof(Codigo) = 'integer'),
+            Articulo TEXT NOT NULL,
+            Sucursal TEXT NOT NULL CHECK (Sucursal <> ''),
+            Fecha_Carga TEXT CHECK (Fecha_Carga IS NULL OR datetime(Fecha_Carga) IS NOT NULL)
+        )
+    """, ['Familia', 'Codigo', 'Articulo', 'Sucursal', 'Fecha_Carga'], select_sql)
+    
+    conn.execute("CREATE UNIQUE INDEX ux_consumos_clave ON consumos (Codigo, Articulo, Sucursal)")
+    conn.execute("CREATE INDEX idx_consumos_lookup ON consumos (Codigo, Sucursal, Fecha_Carga)")
+    return copiadas
+
+
+def _migracion_esquema_estrella(conn):
+    """
+    tickets_detalle pasa a ser una vista sobre fact_tickets + dim_sucursal + dim_producto.
+    
+    Cada línea de ticket guarda claves enteras (sucursal_id, producto_id) en
+    lugar de repetir Sucursal y Descripción; Familia (de consumos) queda en
+    dim_producto y se obtiene con un join entero.
+    """
+    conn.execute("""
+        CREATE TABLE dim_sucursal (
+            id INTEGER PRIMARY KEY,
+            nombre TEXT NOT NULL UNIQUE CHECK (nombre <> '')
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE dim_producto (
+            id INTEGER PRIMARY KEY,
+            sucursal_id INTEGER NOT NULL REFERENCES dim_sucursal (id),
+            "Código" INTEGER NOT NULL CHECK (typeof("Código") = 'integer'),
+            "Descripción" TEXT,
+            Familia TEXT,
+            UNIQUE (sucursal_id, "Código")
+        )
+    """)
+    # Sin rowid: la clave primaria es la clave de la línea (Sucursal, Número, Código, Linea)
+    conn.execute("""
+        CREATE TABLE fact_tickets (
+            sucursal_id INTEGER NOT NULL REFERENCES dim_sucursal (id),
+            "Número" INTEGER NOT NULL CHECK (typeof("Número") = 'integer'),
+            producto_id INTEGER NOT NULL REFERENCES dim_producto (id),
+            Linea INTEGER NOT NULL CHECK (typeof(Linea) = 'integer' AND Linea >= 1),
+            Tipo TEXT,
+            Mesa INTEGER CHECK (Mesa IS NULL OR typeof(Mesa) = 'integer'),
+            Mozo INTEGER CHECK (Mozo IS NULL OR typeof(Mozo) = 'integer'),
+            Nombre TEXT,
+            Cantidad REAL CHECK (Cantidad IS NULL OR typeof(Cantidad) = 'real'),
+            Importe REAL CHECK (Importe IS NULL OR typeof(Importe) = 'real'),
+            Turno TEXT,
+            Fecha INTEGER CHECK (Fecha IS NULL OR (typeof(Fecha) = 'integer' AND Fecha >= 0)),
+            Hora INTEGER CHECK (Hora IS NULL OR (typeof(Hora) = 'integer' AND Hora BETWEEN 0 AND 1439)),
+            PRIMARY KEY (sucursal_id, "Número", producto_id, Linea)
+        ) WITHOUT ROWID
+    """)
+    
+    # Sucursales de tickets y de consumos
+    conn.execute("""
+        INSERT INTO dim_sucursal (nombre)
+        SELECT Sucursal FROM tickets_detalle UNION SELECT Sucursal FROM consumos ORDER BY 1
+    """)
+    
+    # Un producto por (Sucursal, Código) con la última descripción cargada
+    conn.execute("""
+        INSERT INTO dim_producto (sucursal_id, "Código", "Descripción")
+        SELECT s.id, t."Código", t."Descripción"
+        FROM (
+            SELECT Sucursal, "Código", "Descripción", ROW_NUMBER() OVER (
+                PARTITION BY Sucursal, "Código" ORDER BY Fecha DESC, rowid DESC
+            ) AS orden
+            FROM tickets_detalle
+        ) AS t
+        JOIN dim_sucursal s ON s.nombre = t.Sucursal
+        WHERE t.orden = 1
+        ORDER BY s.id, t."Código"
+    """)
+    
+    # Familia según la última carga de consumos de cada (Codigo, Sucursal)
+    conn.execute("""
+        UPDATE dim_producto SET Familia = c.Familia
+        FROM (
+            SELECT Codigo, Sucursal, Familia, ROW_NUMBER() OVER (
+                PARTITION BY Codigo, Sucursal ORDER BY Fecha_Carga DESC, rowid DESC
+            ) AS orden
+            FROM consumos
+        ) AS c
+        JOIN dim_sucursal s ON s.nombre = c.Sucursal
+        WHERE c.orden = 1 AND dim_producto.sucursal_id = s.id AND dim_producto."Código" = c.Codigo
+    """)
+    
+    cursor = conn.execute("""
+        INSERT INTO fact_tickets (
+            sucursal_id, "Número", producto_id, Linea, Tipo, Mesa, Mozo, Nombre,
+            Cantidad, Importe, Turno, Fecha, Hora
+        )
+        SELECT s.id, t."Número", p.id, t.Linea, t.Tipo, t.Mesa, t.Mozo, t.Nombre,
+               t.Cantidad, t.Importe, t.Turno, t.Fecha, t.Hora
+        FROM tickets_detalle t
+        JOIN dim_sucursal s ON s.nombre = t.Sucursal
+        JOIN dim_producto p ON p.sucursal_id = s.id AND p."Código" = t."Código"
+    """)
+    copiadas = cursor.rowcount
+    
+    conn.execute("DROP TABLE tickets_detalle")
+    conn.execute("CREATE INDEX idx_fact_fecha ON fact_tickets (sucursal_id, Fecha)")
+    # Líneas que esperan su Turno (asignar_turnos solo recorre estas)
+    conn.execute('CREATE INDEX idx_fact_sin_turno ON fact_tickets (sucursal_id, "Número") WHERE Turno IS NULL')
+    
+    # Misma forma que la tabla anterior (más Familia y las claves) para las lecturas
+    conn.execute("""
+        CREATE VIEW tickets_detalle AS
+        SELECT f."Número", f.Tipo, s.nombre AS Sucursal, f.Mesa, f.Mozo, f.Nombre,
+               p."Código", p."Descripción", f.Cantidad, f.Importe, f.Turno, f.Fecha, f.Hora, f.Linea,
+               p.Familia, f.sucursal_id, f.producto_id
+        FROM fact_tickets f
+        JOIN dim_sucursal s ON s.id = f.sucursal_id
+        JOIN dim_producto p ON p.id = f.producto_id
+    """)
+    return copiadas
+
+
+def _migracion_particiones_parquet(conn):
+    """
+    Registro de las particiones (sucursal, mes) a reescribir en el dataset Parquet.
+    
+    Los triggers anotan la partición de cada línea insertada, modificada
+    (Turno) o borrada, y las de todas las líneas de un producto cuando cambia
+    su Descripción o Familia. Se parte con todas las particiones pendientes.
+    """
+    conn.execute("""
+        CREATE TABLE parquet_pendientes (
+            sucursal_id INTEGER NOT NULL,
+            mes INTEGER NOT NULL,
+            PRIMARY KEY (sucursal_id, mes)
+        ) WITHOUT ROWID
+    """)
+    # Líneas de un producto por fecha (trigger de dim_producto y consultas por producto)
+    conn.execute("CREATE INDEX idx_fact_producto ON fact_tickets (producto_id, sucursal_id, Fecha)")
+    
+    # ON CONFLICT DO NOTHING y no INSERT OR IGNORE: dentro de un trigger, el
+    # ON CONFLICT DO UPDATE de la sentencia externa (upsert de dim_producto)
+    # reemplaza la política OR IGNORE y el duplicado fallaría
+    # En un UPDATE la partición anterior solo cambia si cambió la Fecha o la sucursal
+    movida = " AND (OLD.Fecha IS NOT NEW.Fecha OR OLD.sucursal_id IS NOT NEW.sucursal_id)"
+    for evento, fila, extra in (
+        ('INSERT', 'NEW', ''), ('UPDATE', 'NEW', ''), ('UPDATE', 'OLD', movida), ('DELETE', 'OLD', '')
+    ):
+        conn.execute(f"""
+            CREATE TRIGGER trg_parquet_{evento.lower()}_{fila.lower()} AFTER {evento} ON fact_tickets
+            WHEN {fila}.Fecha IS NOT NULL{extra}
+            BEGIN
+                INSERT INTO parquet_pendientes (sucursal_id, mes)
+                VALUES ({fila}.sucursal_id, {_MES_SQL.format(f'{fila}.Fecha')})
+                ON CONFLICT DO NOTHING;
+            END
+        """)
+    conn.execute(f"""
+        CREATE TRIGGER trg_parquet_producto AFTER UPDATE OF "Descripción", Familia ON dim_producto
+        BEGIN
+            INSERT INTO parquet_pendientes (sucursal_id, mes)
+            SELECT DISTINCT sucursal_id, {_MES_SQL.format('Fecha')}
+            FROM fact_tickets WHERE producto_id = NEW.id AND Fecha IS NOT NULL
+            ON CONFLICT DO NOTHING;
+        END
+    """)
+    
+    cursor = conn.execute(f"""
+        INSERT INTO parquet_pendientes (sucursal_id, mes)
+        SELECT DISTINCT sucursal_id, {_MES_SQL.format('Fecha')} FROM fact_tickets WHERE Fecha IS NOT NULL
+    """)
+    return cursor.rowcount
+
+
+def _migracion_ventas_diarias(conn):
+    """
+    Resumen diario de ventas por (sucursal, Fecha, Turno), recalculado por día.
+    
+    WITHOUT ROWID como los demás resúmenes: Turno es '' en las líneas que
+    todavía no lo tienen (las claves de una tabla WITHOUT ROWID no admiten
+    NULL). Los triggers anotan en ventas_pendientes el día de cada línea
+    insertada, modificada o borrada. Se parte con el resumen completo.
+    """
+    conn.execute("""
+        CREATE TABLE ventas_diarias (
+            sucursal_id INTEGER NOT NULL REFERENCES dim_sucursal (id),
+            Fecha INTEGER NOT NULL,
+            Turno TEXT NOT NULL DEFAULT '',
+            Facturacion REAL NOT NULL,
+            Cantidad REAL NOT NULL,
+            Lineas INTEGER NOT NULL CHECK (Lineas > 0),
+            Tickets INTEGER NOT NULL CHECK (Tickets > 0),
+            PRIMARY KEY (sucursal_id, Fecha, Turno)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE ventas_pendientes (
+            sucursal_id INTEGER NOT NULL,
+            Fecha INTEGER NOT NULL,
+            PRIMARY KEY (sucursal_id, Fecha)
+        ) WITHOUT ROWID
+    """)
+    
+    # Mismo criterio que trg_parquet_*: ON CONFLICT DO NOTHING y el día anterior solo si cambió
+    movida = " AND (OLD.Fecha IS NOT NEW.Fecha OR OLD.sucursal_id IS NOT NEW.sucursal_id)"
+    for evento, fila, extra in (
+        ('INSERT', 'NEW', ''), ('UPDATE', 'NEW', ''), ('UPDATE', 'OLD', movida), ('DELETE', 'OLD', '')
+    ):
+        conn.execute(f"""
+            CREATE TRIGGER trg_ventas_{evento.lower()}_{fila.lower()} AFTER {evento} ON fact_tickets
+            WHEN {fila}.Fecha IS NOT NULL{extra}
+            BEGIN
+                INSERT INTO ventas_pendientes (sucursal_id, Fecha) VALUES ({fila}.sucursal_id, {fila}.Fecha)
+                ON CONFLICT DO NOTHING;
+            END
+        """)
+    
+    cursor = conn.execute("""
+        INSERT INTO ventas_diarias (sucursal_id, Fecha, Turno, Facturacion, Cantidad, Lineas, Tickets)
+        SELECT sucursal_id, Fecha, COALESCE(Turno, ''),
+               SUM(Cantidad * Importe), SUM(Cantidad), COUNT(*), COUNT(DISTINCT "Número")
+        FROM fact_tickets
+        WHERE Fecha IS NOT NULL
+        GROUP BY sucursal_id, Fecha, COALESCE(Turno, '')
+    """)
+    return cursor.rowcount
+
+
+def _migracion_producto_dia(conn):
+    """
+    Cantidad y facturación por (sucursal, Fecha, Turno, producto).
+    
+    Base de los rankings de productos: una ventana de fechas cuesta
+    productos × días en lugar de recorrer las líneas. WITHOUT ROWID: la clave
+    primaria es la tabla, sin índice aparte; por eso Turno es NOT NULL ('' en
+    las líneas que todavía no lo tienen). Usa los días de ventas_pendientes
+    (mismos triggers que ventas_diarias). Se parte con el resumen completo.
+    """
+    conn.execute("""
+        CREATE TABLE producto_dia (
+            sucursal_id INTEGER NOT NULL REFERENCES dim_sucursal (id),
+            Fecha INTEGER NOT NULL,
+            Turno TEXT NOT NULL DEFAULT '',
+            producto_id INTEGER NOT NULL REFERENCES dim_producto (id),
+            Cantidad REAL NOT NULL,
+            Facturacion REAL NOT NULL,
+            Lineas INTEGER NOT NULL CHECK (Lineas > 0),
+            PRIMARY KEY (sucursal_id, Fecha, Turno, producto_id)
+        ) WITHOUT ROWID
+    """)
+    
+    cursor = conn.execute("""
+        INSERT INTO producto_dia (sucursal_id, Fecha, Turno, producto_id, Cantidad, Facturacion, Lineas)
+        SELECT sucursal_id, Fecha, COALESCE(Turno, ''), producto_id, SUM(Cantidad), SUM(Cantidad * Importe), COUNT(*)
+        FROM fact_tickets
+        WHERE Fecha IS NOT NULL
+        GROUP BY sucursal_id, Fecha, COALESCE(Turno, ''), producto_id
+    """)
+    return cursor.rowcount
+
+
+def _migracion_pares_productos(conn):
+    """
+    Co-ocurrencia de productos en tickets por (sucursal, Fecha, Turno).
+    
+    pares_dia guarda cada par una sola vez (producto_a < producto_b) con la
+    cantidad de tickets que tienen a los dos productos. producto_tickets_dia
+    cuenta los tickets de cada producto y en cuántos fue el único producto.
+    Las dos son WITHOUT ROWID con clave (sucursal_id, Fecha, Turno, ...): el
+    borrado por día y las consultas por ventana usan la clave primaria, sin
+    índices aparte. Usan los días de ventas_pendientes. Se parte con el
+    cálculo completo.
+    """
+    conn.execute("""
+        CREATE TABLE pares_dia (
+            sucursal_id INTEGER NOT NULL REFERENCES dim_sucursal (id),
+            Fecha INTEGER NOT NULL,
+            Turno TEXT NOT NULL DEFAULT '',
+            producto_a INTEGER NOT NULL REFERENCES dim_producto (id),
+            producto_b INTEGER NOT NULL REFERENCES dim_producto (id),
+            Tickets INTEGER NOT NULL CHECK (Tickets > 0),
+            PRIMARY KEY (sucursal_id, Fecha, Turno, producto_a, producto_b),
+            CHECK (producto_a < producto_b)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE producto_tickets_dia (
+            sucursal_id INTEGER NOT NULL REFERENCES dim_sucursal (id),
+            Fecha INTEGER NOT NULL,
+            Turno TEXT NOT NULL DEFAULT '',
+            producto_id INTEGER NOT NULL REFERENCES dim_producto (id),
+            Tickets INTEGER NOT NULL CHECK (Tickets > 0),
+            TicketsSolo INTEGER NOT NULL,
+            PRIMARY KEY (sucursal_id, Fecha, Turno, producto_id)
+        ) WITHOUT ROWID
+    """)
+    
+    # Productos distintos de cada ticket (un producto repetido en el ticket cuenta una vez)
+    conn.execute("""
+        CREATE TEMP TABLE tickets_productos AS
+        SELECT DISTINCT sucursal_id, "Número", Fecha, COALESCE(Turno, '') AS Turno, producto_id
+        FROM fact_tickets WHERE Fecha IS NOT NULL
+    """)
+    conn.execute('CREATE INDEX temp.idx_tickets_productos ON tickets_productos (sucursal_id, "Número", Fecha)')
+    
+    cursor = conn.execute("""
+        INSERT INTO pares_dia (sucursal_id, Fecha, Turno, producto_a, producto_b, Tickets)
+        SELECT a.sucursal_id, a.Fecha, a.Turno, a.producto_id, b.producto_id, COUNT(*)
+        FROM tickets_productos a
+        JOIN tickets_productos b
+          ON b.sucursal_id = a.sucursal_id AND b."Número" = a."Número" AND b.Fecha = a.Fecha
+         AND b.producto_id > a.producto_id
+        GROUP BY a.sucursal_id, a.Fecha, a.Turno, a.producto_id, b.producto_id
+    """)
+    pares = cursor.rowcount
+    conn.execute("""
+        INSERT INTO producto_tickets_dia (sucursal_id, Fecha, Turno, producto_id, Tickets, TicketsSolo)
+        SELECT t.sucursal_id, t.Fecha, t.Turno, t.producto_id, COUNT(*), SUM(n.productos = 1)
+        FROM tickets_productos t
+        JOIN (
+            SELECT sucursal_id, "Número", Fecha, COUNT(*) AS productos
+            FROM tickets_productos GROUP BY sucursal_id, "Número", Fecha
+        ) n ON n.sucursal_id = t.sucursal_id AND n."Número" = t."Número" AND n.Fecha = t.Fecha
+        GROUP BY t.sucursal_id, t.Fecha, t.Turno, t.producto_id
+    """)
+    conn.execute("DROP TABLE temp.tickets_productos")
+    return pares
+
+
+# (versión, nombre, función) en orden de aplicación. No modificar las ya publicadas: agregar nuevas al final
+MIGRACIONES = [
+    (1, 'tickets_detalle_tipado', _migracion_tickets_tipados),
+    (2, 'cinta_testigo_tipada', _migracion_cinta_tipada),
+    (3, 'consumos_tipados', _migracion_consumos_tipados),
+    (4, 'esquema_estrella', _migracion_esquema_estrella),
+    (5, 'particiones_parquet', _migracion_particiones_parquet),
+    (6, 'ventas_diarias', _migracion_ventas_diarias),
+    (7, 'producto_dia', _migracion_producto_dia),
+    (8, 'pares_productos', _migracion_pares_productos),
+]
+
+# Vistas y tablas que crean las migraciones (las borra reiniciar_esquema; la vista antes que sus tablas)
+VISTAS_ESQUEMA = ['tickets_detalle']
+TABLAS_ESQUEMA = [
+    'pares_dia', 'producto_tickets_dia', 'producto_dia', 'ventas_pendientes', 'ventas_diarias',
+    'parquet_pendientes', 'fact_tickets', 'dim_producto', 'dim_sucursal', 'cinta_testigo', 'consumos',
+]
+
+
+def asegurar_tabla_migraciones(conn):
+    """Crea (si no existe) la tabla schema_migrations"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            aplicada TEXT NOT NULL
+        )
+    """)
+
+
+def version_actual(conn):
+    """Última versión aplicada (0 si la base no tiene migraciones)"""
+    asegurar_tabla_migraciones(conn)
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations").fetchone()[0]
+
+
+def migraciones_pendientes(conn):
+    """Migraciones de MIGRACIONES que todavía no se aplicaron en esta base"""
+    version = version_actual(conn)
+    return [migracion for migracion in MIGRACIONES if migracion[0] > version]
+
+
+def migrar(conn, verbose=True):
+    """
+    Aplica las migraciones pendientes, cada una en su propia transacción.
+    
+    Si una migración falla se deshace completa (SQLite permite DDL dentro de
+    transacciones) y la base queda en la última versión aplicada.
+    
+    Returns:
+        list: (versión, nombre, filas copiadas) de cada migración aplicada
+    """
+    # Confirmar lo pendiente del llamador antes de abrir transacciones propias
+    conn.commit()
+    aplicadas = []
+    
+    for version, nombre, funcion in migraciones_pendientes(conn):
+        conn.execute("BEGIN")
+        try:
+            copiadas = funcion(conn)
+            conn.execute(
+                "INSERT INTO schema_migrations (version, nombre, aplicada) VALUES (?, ?, ?)",
+                (version, nombre, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        
+        aplicadas.append((version, nombre, copiadas))
+        if verbose:
+            print(f"   ✓ Migración {version:03d} {nombre}: {copiadas} filas")
+    
+    return aplicadas
+
+
+def reiniciar_esquema(conn):
+    """Borra las tablas del esquema y su historial de migraciones y las crea vacías en la última versión"""
+    for vista in VISTAS_ESQUEMA:
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = ?", (vista,)).fetchone():
+            conn.execute(f"DROP VIEW {vista}")
+    # tickets_detalle también es tabla en bases anteriores a la migración 4
+    for tabla in VISTAS_ESQUEMA + TABLAS_ESQUEMA + ['schema_migrations']:
+        conn.execute(f"DROP TABLE IF EXISTS {tabla}")
+    return migrar(conn, verbose=False)
@@ -0,0 +1,295 @@
+"""
+Recorrido paginado de la grilla (GridView) de Cinta Testigo
+
+Cada respuesta se procesa una sola vez:
+- El estado ASP.NET (__VIEWSTATE, __EVENTVALIDATION, ...) se toma con una
+  expresión regular sobre el HTML crudo, sin reconstruir el DOM.
+- Las filas se leen parseando solo la tabla de la grilla.
+
+Apenas se tiene el estado de una página se envía el pedido de la siguiente,
+y mientras viaja se escriben las filas de la actual en un destino (DataFrame,
+CSV, Excel o SQLite). Las filas no se acumulan: la memoria queda constante
+sin importar la cantidad de páginas.
+"""
+from bs4 import BeautifulSoup, SoupStrainer
+from concurrent.futures import ThreadPoolExecutor
+import csv
+import html as html_lib
+import re
+import time
+
+from .auth_functions import parsear_formulario
+from .connection_functions import conectar
+from .http_extraction_functions import HEADERS_FORM
+
+GRILLA_ID = "ctl00_ContentPlaceHolder1_GridView1"
+GRILLA_EVENT_TARGET = "ctl00$ContentPlaceHolder1$GridView1"
+BOTON_EXPORTAR = "ctl00$ContentPlaceHolder1$cmdExportar"
+
+# Campos ocultos que cambian en cada postback
+PATRON_ESTADO = re.compile(
+    r'<input[^>]*?\bname="(__VIEWSTATE\d*|__VIEWSTATEGENERATOR|__VIEWSTATEFIELDCOUNT|__EVENTVALIDATION)"'
+    r'[^>]*?\bvalue="([^"]*)"',
+    re.IGNORECASE
+)
+PATRON_PAGINA = re.compile(r'Page\$(\d+)')
+
+
+def extraer_estado(html):
+    """Extrae los campos ocultos de estado ASP.NET del HTML crudo"""
+    return {nombre: html_lib.unescape(valor) for nombre, valor in PATRON_ESTADO.findall(html)}
+
+
+def paginas_disponibles(html):
+    """Números de página a los que enlaza el paginador de la grilla"""
+    return {int(numero) for numero in PATRON_PAGINA.findall(html)}
+
+
+def leer_filas_grilla(html, grilla_id=GRILLA_ID):
+    """
+    Lee encabezados y filas de la grilla parseando solo su tabla.
+    
+    Omite la fila del paginador (tabla anidada con links Page$).
+    
+    Returns:
+        tuple: (headers, filas)
+    """
+    soup = BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer(id=grilla_id))
+    tabla = soup.find(id=grilla_id)
+    
+    if tabla is None:
+        # Grilla con otro id: tomar la tabla con más filas
+        soup = BeautifulSoup(html, 'html.parser')
+        tablas = soup.find_all('table')
+        if not tablas:
+            return [], []
+        tabla = max(tablas, key=lambda t: len(t.find_all('tr')))
+    
+    headers = []
+    filas = []
+    
+    for row in tabla.find_all('tr', recursive=False) or tabla.find_all('tr'):
+        if row.find('table') or row.find('a', href=PATRON_PAGINA):
+            continue
+        
+        cells = row.find_all(['th', 'td'], recursive=False)
+        cell_data = [cell.get_text(strip=True) for cell in cells]
+        
+        if not headers:
+            headers = cell_data
+        elif cell_data and any(cell_data):
+            filas.append(cell_data)
+    
+    return headers, filas
+
+
+def postear_pagina(session, post_url, fields, numero_pagina, max_intentos=3):
+    """Envía el postback del paginador para ir a una página y retorna el HTML"""
+    datos = dict(fields)
+    datos['__EVENTTARGET'] = GRILLA_EVENT_TARGET
+    datos['__EVENTARGUMENT'] = f'Page${numero_pagina}'
+    # El botón Exportar no debe viajar con el postback del paginador
+    datos.pop(BOTON_EXPORTAR, None)
+    
+    for intento in range(1, max_intentos + 1):
+        try:
+            response = session.post(
+                post_url,
+                data=datos,
+                headers={**HEADERS_FORM, 'Referer': post_url},
+                timeout=15
+            )
+            response.raise_for_status()
+            return response.text
+        except Exception as e:
+            print(f"   ⚠️ Página {numero_pagina} - intento {intento}/{max_intentos}: {e}")
+            if intento < max_intentos:
+                time.sleep(3)
+    
+    return None
+
+
+def recorrer_paginas(session, html_procesado, destino, max_intentos=3):
+    """
+    Recorre todas las páginas de la grilla y escribe las filas en el destino.
+    
+    El pedido de la página siguiente queda en vuelo (hilo aparte) mientras se
+    leen y escriben las filas de la página actual.
+    
+    Args:
+        session: Sesión autenticada de requests
+        html_procesado: HTML de la página 1 (resultado de Procesar)
+        destino: DestinoDataFrame, DestinoCSV, DestinoExcel o DestinoSQLite
+        max_intentos: reintentos por página
+    
+    Returns:
+        tuple: (paginas_leidas, filas_escritas)
+    """
+    # El formulario completo se parsea una sola vez; luego solo cambia el estado
+    _, fields, post_url = parsear_formulario(html_procesado)
+    
+    html_actual = html_procesado
+    numero_pagina = 1
+    filas_escritas = 0
+    encabezados_escritos = False
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        while html_actual:
+            fields.update(extraer_estado(html_actual))
+            siguiente = numero_pagina + 1
+            
+            # Pedir la siguiente página antes de procesar la actual
+            futuro = None
+            if siguiente in paginas_disponibles(html_actual):
+                futuro = executor.submit(postear_pagina, session, post_url, dict(fields), siguiente, max_intentos)
+            
+            headers, filas = leer_filas_grilla(html_actual)
+            if not encabezados_escritos and headers:
+                destino.escribir_encabezados(headers)
+                encabezados_escritos = True
+            destino.escribir_filas(filas)
+            filas_escritas += len(filas)
+            
+            first_ids = [row[0] for row in filas[:3]]
+            print(f"   ✓ Página {numero_pagina}: {len(filas)} filas - IDs: {first_ids}")
+            
+            if futuro is None:
+                break
+            
+            html_actual = futuro.result()
+            if html_actual is None:
+                print(f"   ✗ Error al navegar a página {siguiente}, se detiene el recorrido")
+                break
+            numero_pagina = siguiente
+    
+    return numero_pagina, filas_escritas
+
+
+class DestinoDataFrame:
+    """Acumula las filas en bloques y arma un DataFrame al cerrar"""
+    
+    def __init__(self):
+        self.headers = None
+        self.bloques = []
+    
+    def escribir_encabezados(self, headers):
+        self.headers = headers
+    
+    def escribir_filas(self, filas):
+        if filas:
+            self.bloques.append(filas)
+    
+    def cerrar(self):
+        import pandas as pd
+        
+        filas = [fila for bloque in self.bloques for fila in bloque]
+        self.bloques = []
+        return pd.DataFrame(filas, columns=self.headers if self.headers else None)
+
+
+class DestinoCSV:
+    """Escribe las filas en un CSV a medida que llegan"""
+    
+    def __init__(self, ruta):
+        self.ruta = str(ruta)
+        self.archivo = open(self.ruta, 'w', newline='', encoding='utf-8-sig')
+        self.writer = csv.writer(self.archivo)
+    
+    def escribir_encabezados(self, headers):
+        self.writer.writerow(headers)
+    
+    def escribir_filas(self, filas):
+        self.writer.writerows(filas)
+    
+    def cerrar(self):
+        self.archivo.close()
+        return self.ruta
+
+
+class DestinoExcel:
+    """Escribe las filas en un .xlsx con openpyxl en modo write_only (sin guardar celdas en memoria)"""
+    
+    def __init__(self, ruta):
+        from openpyxl import Workbook
+        
+        self.ruta = str(ruta)
+        self.workbook = Workbook(write_only=True)
+        self.hoja = self.workbook.create_sheet('Sheet1')
+    
+    def escribir_encabezados(self, headers):
+        self.hoja.append(headers)
+    
+    def escribir_filas(self, filas):
+        for fila in filas:
+            self.hoja.append(fila)
+    
+    def cerrar(self):
+        self.workbook.save(self.ruta)
+        return self.ruta
+
+
+def _identificador(nombre):
+    """Nombre entre comillas dobles para SQL (las comillas internas se duplican)"""
+    return '"' + str(nombre).replace('"', '""') + '"'
+
+
+def nombres_columnas(headers):
+    """
+    Encabezados de la grilla como nombres de columna válidos y únicos.
+    
+    Los encabezados vacíos pasan a Columna_N (posición) y los repetidos
+    (sin distinguir mayúsculas, como SQLite) llevan sufijo _2, _3, ...
+    """
+    nombres = []
+    usados = set()
+    for posicion, header in enumerate(headers, start=1):
+        base = str(header or '').strip() or f"Columna_{posicion}"
+        nombre = base
+        sufijo = 2
+        while nombre.lower() in usados:
+            nombre = f"{base}_{sufijo}"
+            sufijo += 1
+        usados.add(nombre.lower())
+        nombres.append(nombre)
+    return nombres
+
+
+class DestinoSQLite:
+    """
+    Inserta las filas en una tabla SQLite (se crea con columnas TEXT si no existe).
+    
+    Las filas con otra cantidad de celdas que los encabezados no se insertan:
+    se cuentan en `rechazadas` y se informan al cerrar.
+    """
+    
+    def __init__(self, db_path, tabla):
+        self.db_path = str(db_path)
+        self.tabla = tabla
+        self.conn = conectar(self.db_path)
+        self.insert_sql = None
+        self.columnas = 0
+        self.rechazadas = 0
+    
+    def escribir_encabezados(self, headers):
+        nombres = [_identificador(nombre) for nombre in nombres_columnas(headers)]
+        tabla = _identificador(self.tabla)
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {tabla} ({', '.join(f'{n} TEXT' for n in nombres)})")
+        marcadores = ', '.join('?' for _ in nombres)
+        self.insert_sql = f"INSERT INTO {tabla} ({', '.join(nombres)}) VALUES ({marcadores})"
+        self.columnas = len(nombres)
+    
+    def escribir_filas(self, filas):
+        validas = [fila for fila in filas if len(fila) == self.columnas]
+        if len(validas) < len(filas):
+            if self.rechazadas == 0:
+                print(f"   ⚠️ Filas con cantidad de celdas distinta de los encabezados ({self.columnas}): no se insertan")
+            self.rechazadas += len(filas) - len(validas)
+        if validas and self.insert_sql:
+            self.conn.executemany(self.insert_sql, validas)
+            self.conn.commit()
+    
+    def cerrar(self):
+        if self.rechazadas:
+            print(f"   ⚠️ {self.rechazadas} filas descartadas en '{self.tabla}' (¿cambió la grilla?)")
+        self.conn.close()
+        return self.db_path
@@ -0,0 +1,264 @@
+"""
+Dataset Parquet de los tickets, particionado por sucursal y mes
+    
+    DataBase/parquet/tickets/sucursal=NOMBRE/year=YYYY/month=M/part-0.parquet
+
+Cada carga reescribe solo las particiones que los triggers anotaron en
+parquet_pendientes (líneas nuevas, Turnos asignados, productos que cambiaron
+de Descripción o Familia). Los lectores cargan solo las columnas y las
+particiones que necesitan: un filtro por Fecha descarta particiones por
+year/month y, dentro de cada archivo, grupos de filas por sus estadísticas
+(las filas se escriben ordenadas por Fecha).
+
+Requiere pyarrow: si no está instalado la exportación se omite y leer_tickets
+consulta SQLite.
+"""
+from datetime import date, timedelta
+from pathlib import Path
+import importlib.util
+import os
+import shutil
+import time
+
+import pandas as pd
+
+from .connection_functions import conectar, DB_PATH
+
+# Filas por grupo de filas (unidad mínima de lectura con filtro por Fecha)
+FILAS_POR_GRUPO = 64 * 1024
+COMPRESION = 'zstd'
+
+# Columnas de cada archivo (Sucursal, year y month están en la ruta de la partición)
+COLUMNAS_DATASET = [
+    'Número', 'Tipo', 'Mesa', 'Mozo', 'Nombre', 'Código', 'Descripción', 'Familia',
+    'Cantidad', 'Importe', 'Turno', 'Fecha', 'Hora', 'Linea', 'producto_id',
+]
+# Columnas que retorna leer_tickets, en el orden de la vista tickets_detalle
+COLUMNAS_LECTURA = [
+    'Número', 'Tipo', 'Sucursal', 'Mesa', 'Mozo', 'Nombre', 'Código', 'Descripción',
+    'Cantidad', 'Importe', 'Turno', 'Fecha', 'Hora', 'Linea', 'Familia', 'producto_id',
+]
+
+EPOCA = date(1970, 1, 1)
+
+
+def directorio_dataset(db_path=DB_PATH):
+    """Carpeta del dataset de tickets junto a la base de datos"""
+    return Path(db_path).parent / 'parquet' / 'tickets'
+
+
+PARQUET_DIR = directorio_dataset()
+
+
+def parquet_disponible():
+    """Indica si pyarrow está instalado"""
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def _esquema():
+    """Tipos de las columnas de cada archivo"""
+    import pyarrow as pa
+    
+    return pa.schema([
+        ('Número', pa.int64()), ('Tipo', pa.string()), ('Mesa', pa.int32()), ('Mozo', pa.int32()),
+        ('Nombre', pa.string()), ('Código', pa.int64()), ('Descripción', pa.string()), ('Familia', pa.string()),
+        ('Cantidad', pa.float64()), ('Importe', pa.float64()), ('Turno', pa.string()),
+        ('Fecha', pa.date32()), ('Hora', pa.int16()), ('Linea', pa.int16()), ('producto_id', pa.int32()),
+    ])
+
+
+def _particionado():
+    """Esquema hive de las carpetas (sin inferir tipos de los nombres)"""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    
+    return ds.partitioning(
+        pa.schema([('sucursal', pa.string()), ('year', pa.int16()), ('month', pa.int8())]), flavor='hive'
+    )
+
+
+def rango_mes(mes):
+    """Primer y último número de día del mes (año * 100 + mes)"""
+    anio, numero = divmod(mes, 100)
+    inicio = date(anio, numero, 1)
+    siguiente = date(anio + numero // 12, numero % 12 + 1, 1)
+    return (inicio - EPOCA).days, (siguiente - timedelta(days=1) - EPOCA).days
+
+
+def carpeta_particion(directorio, sucursal, mes):
+    """Carpeta hive de una partición"""
+    anio, numero = divmod(mes, 100)
+    return Path(directorio) / f"sucursal={sucursal}" / f"year={anio}" / f"month={numero}"
+
+
+def escribir_particion(df, carpeta):
+    """Reemplaza el archivo de la partición (escritura atómica: temporal oculto + os.replace)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    df = df[COLUMNAS_DATASET].assign(Fecha=pd.to_datetime(df['Fecha'], unit='D'))
+    tabla = pa.Table.from_pandas(df, preserve_index=False).cast(_esquema())
+    
+    carpeta.mkdir(parents=True, exist_ok=True)
+    # Los lectores ignoran los archivos que empiezan con '.'
+    temporal = carpeta / '.part-0.parquet.tmp'
+    pq.write_table(tabla, temporal, compression=COMPRESION, row_group_size=FILAS_POR_GRUPO)
+    os.replace(temporal, carpeta / 'part-0.parquet')
+
+
+def exportar_parquet(conn, directorio=PARQUET_DIR, completo=False):
+    """
+    Reescribe las particiones pendientes del dataset y las quita de parquet_pendientes.
+    
+    Args:
+        completo: borrar el dataset y volver a escribir todas las particiones (carga inicial)
+    
+    Returns:
+        dict: {'particiones', 'filas', 'borradas', 'segundos'}, o None si pyarrow no está instalado
+    """
+    if not parquet_disponible():
+        print("   ⚠️ pyarrow no está instalado: no se actualiza el dataset Parquet (pip install pyarrow)")
+        return None
+    
+    inicio = time.time()
+    directorio = Path(directorio)
+    
+    if completo:
+        shutil.rmtree(directorio, ignore_errors=True)
+        conn.execute("""
+            INSERT OR IGNORE INTO parquet_pendientes (sucursal_id, mes)
+            SELECT DISTINCT sucursal_id, CAST(strftime('%Y%m', Fecha * 86400, 'unixepoch') AS INTEGER)
+            FROM fact_tickets WHERE Fecha IS NOT NULL
+        """)
+    
+    pendientes = conn.execute("""
+        SELECT p.sucursal_id, s.nombre, p.mes
+        FROM parquet_pendientes p
+        JOIN dim_sucursal s ON s.id = p.sucursal_id
+        ORDER BY s.nombre, p.mes
+    """).fetchall()
+    
+    columnas = ', '.join(f'"{col}"' for col in COLUMNAS_DATASET)
+    resumen = {'particiones': 0, 'filas': 0, 'borradas': 0}
+    
+    for sucursal_id, sucursal, mes in pendientes:
+        # Rango de días del mes sobre el índice (sucursal_id, Fecha)
+        df = pd.read_sql_query(
+            f"""
+            SELECT {columnas} FROM tickets_detalle
+            WHERE sucursal_id = ? AND Fecha BETWEEN ? AND ?
+            ORDER BY Fecha, Hora, "Número", producto_id, Linea
+            """,
+            conn, params=(sucursal_id, *rango_mes(mes))
+        )
+        
+        carpeta = carpeta_particion(directorio, sucursal, mes)
+        if df.empty:
+            # Partición sin líneas (borradas): se elimina la carpeta
+            shutil.rmtree(carpeta, ignore_errors=True)
+            resumen['borradas'] += 1
+        else:
+            escribir_particion(df, carpeta)
+            resumen['particiones'] += 1
+            resumen['filas'] += len(df)
+        
+        conn.execute("DELETE FROM parquet_pendientes WHERE sucursal_id = ? AND mes = ?", (sucursal_id, mes))
+    
+    conn.commit()
+    resumen['segundos'] = time.time() - inicio
+    return resumen
+
+
+def _dataset_al_dia(db_path, directorio):
+    """Hay dataset y no quedan particiones pendientes de reescribir"""
+    if not parquet_disponible() or not Path(directorio).exists():
+        return False
+    
+    conn = conectar(db_path, solo_lectura=True)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM parquet_pendientes").fetchone()[0] == 0
+    except Exception:
+        return False
+    finally:
+        conn.close()
+
+
+def _leer_parquet(directorio, columnas, sucursales, desde, hasta):
+    """Lectura con poda de particiones (sucursal, year, month) y filtro de Fecha sobre las estadísticas"""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    
+    dataset = ds.dataset(directorio, format='parquet', partitioning=_particionado())
+    
+    condiciones = []
+    if sucursales is not None:
+        condiciones.append(ds.field('sucursal').isin(list(sucursales)))
+    if desde is not None:
+        condiciones.append((ds.field('year') > desde.year)
+                           | ((ds.field('year') == desde.year) & (ds.field('month') >= desde.month)))
+        condiciones.append(ds.field('Fecha') >= pa.scalar(desde, pa.date32()))
+    if hasta is not None:
+        condiciones.append((ds.field('year') < hasta.year)
+                           | ((ds.field('year') == hasta.year) & (ds.field('month') <= hasta.month)))
+        condiciones.append(ds.field('Fecha') <= pa.scalar(hasta, pa.date32()))
+    
+    filtro = None
+    for condicion in condiciones:
+        filtro = condicion if filtro is None else filtro & condicion
+    
+    nombres = ['sucursal' if col == 'Sucursal' else col for col in columnas]
+    tabla = dataset.to_table(columns=nombres, filter=filtro)
+    df = tabla.to_pandas(date_as_object=False)
+    return df.rename(columns={'sucursal': 'Sucursal'})
+
+
+def _leer_sqlite(db_path, columnas, sucursales, desde, hasta):
+    """Misma lectura desde la vista tickets_detalle (sin dataset o con particiones pendientes)"""
+    condiciones = []
+    parametros = []
+    if sucursales is not None:
+        sucursales = list(sucursales)
+        condiciones.append(f"Sucursal IN ({', '.join('?' for _ in sucursales)})")
+        parametros.extend(sucursales)
+    if desde is not None:
+        condiciones.append("Fecha >= ?")
+        parametros.append((desde - EPOCA).days)
+    if hasta is not None:
+        condiciones.append("Fecha <= ?")
+        parametros.append((hasta - EPOCA).days)
+    
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    lista = ', '.join(f'"{col}"' for col in columnas)
+    
+    conn = conectar(db_path, solo_lectura=True)
+    try:
+        df = pd.read_sql_query(f"SELECT {lista} FROM tickets_detalle {where}", conn, params=parametros)
+    finally:
+        conn.close()
+    
+    if 'Fecha' in df.columns:
+        df['Fecha'] = pd.to_datetime(df['Fecha'], unit='D')
+    return df
+
+
+def leer_tickets(columnas=None, sucursales=None, desde=None, hasta=None, db_path=DB_PATH):
+    """
+    Líneas de ticket como DataFrame (Fecha como datetime), leyendo solo lo necesario.
+    
+    Usa el dataset Parquet si está al día; si no (sin pyarrow, sin dataset o
+    con particiones pendientes) consulta la vista tickets_detalle.
+    
+    Args:
+        columnas: columnas de COLUMNAS_LECTURA a cargar (por defecto: todas)
+        sucursales: nombres de sucursal a incluir (por defecto: todas)
+        desde, hasta: date, ambos extremos incluidos
+    
+    Returns:
+        DataFrame con las columnas pedidas
+    """
+    columnas = list(columnas) if columnas else COLUMNAS_LECTURA
+    directorio = directorio_dataset(db_path)
+    
+    if _dataset_al_dia(db_path, directorio):
+        return _leer_parquet(directorio, columnas, sucursales, desde, hasta)
+    return _leer_sqlite(db_path, columnas, sucursales, desde, hasta)
@@ -0,0 +1,392 @@
+"""
+Orquestación de la extracción y la ingesta (usada por main.py,
+main_database_incremental.py, run_daily_update.py y el worker residente)
+
+Extrae una ventana de fechas con el motor HTTP y usa Selenium como respaldo
+solo para las unidades que fallaron. La sesión HTTP y el navegador pueden
+venir de afuera (worker residente) o crearse para una sola ejecución.
+
+API:
+- extraer(desde, hasta, reportes): descarga y retorna los archivos por reporte
+  y los DataFrames ya leídos
+- reintentar(): vuelve a extraer solo las unidades fallidas del último manifiesto
+- actualizar(conn): extraer → reintentar → ingestar en el mismo proceso, pasando
+  los DataFrames de la extracción a la ingesta sin volver a leer los archivos
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+import os
+
+from .manifest_functions import (
+    UNIDADES, LECTURAS, cargar_manifiesto, retomar_manifiesto, unidades_fallidas, guardar_manifiesto,
+    resumen_manifiesto, reiniciar_unidades, conservar_lecturas
+)
+
+REPORTES = ('cinta', 'detalle', 'consumos')
+
+
+def crear_carpetas(base='DataBase'):
+    """Crea (si no existen) las carpetas de descarga y retorna dict reporte → ruta absoluta"""
+    carpetas = {
+        'cinta': str(Path(base, 'Cinta').absolute()),
+        'detalle': str(Path(base, 'Detalle').absolute()),
+        'consumos': str(Path(base, 'Consumos').absolute()),
+    }
+    for carpeta in carpetas.values():
+        Path(carpeta).mkdir(parents=True, exist_ok=True)
+    return carpetas
+
+
+def extraer_con_http(fecha_desde, fecha_hasta, pedidos, carpetas, session=None):
+    """
+    Extrae los reportes indicados con el motor HTTP (sin navegador)
+    
+    Args:
+        pedidos: dict reporte → lista de sucursales (None = todas)
+        session: sesión autenticada a reutilizar (por defecto: obtener_sesion())
+    """
+    from .session_functions import obtener_sesion
+    from .http_extraction_functions import (
+        extraer_cinta_testigo_http, extraer_tickets_detalle_concurrente, extraer_consumos_http
+    )
+    
+    resultados = {}
+    
+    # 1. LOGIN
+    print("\n" + "=" * 70)
+    print("FASE 1: LOGIN (HTTP)")
+    print("=" * 70)
+    if session is None:
+        session = obtener_sesion()
+    
+    if session is None:
+        raise RuntimeError("Login HTTP fallido")
+    
+    # 2. EXTRAER CINTA TESTIGO
+    if 'cinta' in pedidos:
+        print("\n" + "=" * 70)
+        print("FASE 2: CINTA TESTIGO")
+        print("=" * 70)
+        resultados['cinta'] = extraer_cinta_testigo_http(session, carpetas['cinta'], fecha_desde, fecha_hasta)
+    
+    # 3. EXTRAER TICKETS CON DETALLE
+    if 'detalle' in pedidos:
+        print("\n" + "=" * 70)
+        print("FASE 3: TICKETS CON DETALLE")
+        print("=" * 70)
+        resultados['detalle'] = extraer_tickets_detalle_concurrente(
+            carpetas['detalle'], fecha_desde, fecha_hasta, sucursales=pedidos['detalle']
+        )
+    
+    # 4. EXTRAER CONSUMOS
+    if 'consumos' in pedidos:
+        print("\n" + "=" * 70)
+        print("FASE 4: CONSUMOS")
+        print("=" * 70)
+        resultados['consumos'] = extraer_consumos_http(
+            session, carpetas['consumos'], fecha_desde, fecha_hasta, sucursales=pedidos['consumos']
+        )
+    
+    return resultados
+
+
+def crear_navegador(download_dir):
+    """Abre Edge configurado para descargas sin diálogo"""
+    from selenium import webdriver
+    from selenium.webdriver.edge.options import Options
+    from .download_functions import preferencias_descarga
+    
+    edge_options = Options()
+    edge_options.add_argument('--start-maximized')
+    edge_options.add_argument('--disable-blink-features=AutomationControlled')
+    edge_options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
+    edge_options.add_experimental_option('useAutomationExtension', False)
+    # Descargas sin diálogo; cada exportación usa su propia carpeta (download_functions)
+    edge_options.add_experimental_option('prefs', preferencias_descarga(download_dir))
+    
+    print("\n🌐 Iniciando Edge...")
+    return webdriver.Edge(options=edge_options)
+
+
+def login_navegador(driver, wait):
+    """Autentica el navegador reutilizando las cookies cacheadas o con el formulario de login"""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from .session_functions import cargar_cookies_en_driver, guardar_cookies_driver
+    from .wait_functions import esperar_postback
+    
+    print("\n" + "=" * 70)
+    print("FASE 1: LOGIN")
+    print("=" * 70)
+    
+    if cargar_cookies_en_driver(driver):
+        print("   ✓ Sesión reutilizada desde caché")
+        return
+    
+    driver.get("https://datakinga.com/")
+    username_field = wait.until(EC.presence_of_element_located((By.ID, "txtUsuario")))
+    
+    username_field.send_keys(os.getenv('DATAKINGA_USER'))
+    driver.find_element(By.ID, "txtClave").send_keys(os.getenv('DATAKINGA_PASSWORD'))
+    esperar_postback(driver, wait, driver.find_element(By.ID, "Ingresar").click, "Login")
+    guardar_cookies_driver(driver)
+    
+    print("   ✓ Login exitoso")
+
+
+def extraer_con_selenium(fecha_desde, fecha_hasta, pedidos, carpetas, navegador=None):
+    """
+    Extrae los reportes indicados con Selenium (navegador Edge)
+    
+    Args:
+        pedidos: dict reporte → lista de sucursales (None = todas)
+        navegador: función que retorna un driver ya autenticado a reutilizar
+                   (por defecto se abre un Edge solo para esta extracción)
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+    from .extraction_functions import extraer_cinta_testigo, extraer_tickets_detalle, extraer_consumos
+    from .wait_functions import reiniciar_esperas, resumen_esperas
+    
+    # El registro es global del proceso (el trabajador residente hace muchas extracciones)
+    reiniciar_esperas()
+    propio = navegador is None
+    if propio:
+        driver = crear_navegador(carpetas['cinta'])
+    else:
+        driver = navegador()
+    
+    wait = WebDriverWait(driver, 10)
+    resultados = {}
+    
+    try:
+        # 1. LOGIN
+        if propio:
+            login_navegador(driver, wait)
+        
+        # 2. EXTRAER CINTA TESTIGO
+        if 'cinta' in pedidos:
+            print("\n" + "=" * 70)
+            print("FASE 2: CINTA TESTIGO")
+            print("=" * 70)
+            resultados['cinta'] = extraer_cinta_testigo(driver, wait, carpetas['cinta'], fecha_desde, fecha_hasta)
+        
+        # 3. EXTRAER TICKETS CON DETALLE
+        if 'detalle' in pedidos:
+            print("\n" + "=" * 70)
+            print("FASE 3: TICKETS CON DETALLE")
+            print("=" * 70)
+            resultados['detalle'] = extraer_tickets_detalle(
+                driver, wait, carpetas['detalle'], fecha_desde, fecha_hasta, sucursales=pedidos['detalle']
+            )
+        
+        # 4. EXTRAER CONSUMOS
+        if 'consumos' in pedidos:
+            print("\n" + "=" * 70)
+            print("FASE 4: CONSUMOS")
+            print("=" * 70)
+            resultados['consumos'] = extraer_consumos(
+                driver, wait, carpetas['consumos'], fecha_desde, fecha_hasta, sucursales=pedidos['consumos']
+            )
+        
+        resumen_esperas()
+    
+    finally:
+        if propio:
+            driver.quit()
+    
+    return resultados
+
+
+def pedidos_fallidos(unidades, fecha_desde, fecha_hasta, pedidos, resultados):
+    """
+    Unidades a reintentar de una ventana: reportes que fallaron completos y
+    sucursales fallidas según el manifiesto.
+    
+    Returns:
+        dict: reporte → lista de sucursales (None = todas)
+    """
+    desde = fecha_desde.strftime('%d/%m/%Y')
+    hasta = fecha_hasta.strftime('%d/%m/%Y')
+    pendientes = {}
+    
+    for reporte, sucursales in pedidos.items():
+        if reporte not in resultados:
+            # El reporte ni siquiera llegó a recorrer sus sucursales
+            pendientes[reporte] = sucursales
+            continue
+        
+        fallidas = [u['sucursal'] for u in unidades
+                    if u['reporte'] == reporte and u['desde'] == desde and u['hasta'] == hasta and u['estado'] != 'ok']
+        if fallidas:
+            pendientes[reporte] = None if 'TODAS' in fallidas else fallidas
+    
+    return pendientes
+
+
+def planificar_reintento(fallidas):
+    """
+    Agrupa las unidades fallidas de un manifiesto por ventana.
+    
+    Returns:
+        dict: (desde, hasta) en DD/MM/YYYY → {reporte: sucursales o None}
+    """
+    ventanas = {}
+    
+    for unidad in fallidas:
+        pedidos = ventanas.setdefault((unidad['desde'], unidad['hasta']), {})
+        if unidad['sucursal'] == 'TODAS':
+            pedidos[unidad['reporte']] = None
+        elif pedidos.get(unidad['reporte'], []) is not None:
+            pedidos.setdefault(unidad['reporte'], []).append(unidad['sucursal'])
+    
+    return ventanas
+
+
+def extraer_ventana(fecha_desde, fecha_hasta, pedidos, carpetas, motor='http', session=None, navegador=None):
+    """Extrae una ventana con el motor elegido; con HTTP, Selenium reintenta solo lo que falló"""
+    if motor != 'http':
+        return extraer_con_selenium(fecha_desde, fecha_hasta, pedidos, carpetas, navegador=navegador)
+    
+    resultados = {}
+    try:
+        resultados = extraer_con_http(fecha_desde, fecha_hasta, pedidos, carpetas, session=session)
+    except Exception as e:
+        print(f"\n⚠️ Error en motor HTTP: {e}")
+    
+    # Respaldo: Selenium solo para las unidades que no se pudieron obtener
+    pendientes = pedidos_fallidos(list(UNIDADES.values()), fecha_desde, fecha_hasta, pedidos, resultados)
+    if pendientes:
+        print("\n" + "=" * 70)
+        print(f"🔁 RESPALDO SELENIUM: {', '.join(pendientes)}")
+        print("=" * 70)
+        resultados.update(extraer_con_selenium(fecha_desde, fecha_hasta, pendientes, carpetas, navegador=navegador))
+    
+    return resultados
+
+
+def _resultado_extraccion(motor, inicio):
+    """Guarda el manifiesto y arma el resultado de la extracción"""
+    manifiesto = guardar_manifiesto(motor, inicio)
+    if manifiesto['total']:
+        resumen_manifiesto(manifiesto)
+    
+    archivos = {reporte: [] for reporte in REPORTES}
+    for unidad in manifiesto['unidades']:
+        if unidad['estado'] == 'ok':
+            archivos[unidad['reporte']].append(unidad['archivo'])
+    
+    return {
+        'archivos': archivos,
+        'lecturas': dict(LECTURAS),
+        'manifiesto': manifiesto,
+        'fallidas': manifiesto['fallidas'],
+        'segundos': (datetime.now() - inicio).total_seconds(),
+    }
+
+
+def extraer(fecha_desde=None, fecha_hasta=None, reportes=REPORTES, motor='http', carpetas=None,
+            session=None, navegador=None, conservar=False):
+    """
+    Extrae una ventana (por defecto: ayer → hoy) y guarda el manifiesto.
+    
+    Args:
+        reportes: reportes a extraer ('cinta', 'detalle', 'consumos')
+        conservar: dejar en memoria los DataFrames leídos (para ingestar en el mismo proceso)
+    
+    Returns:
+        dict: {'archivos': {reporte: [rutas]}, 'lecturas': {ruta: DataFrame}, 'manifiesto', 'fallidas', 'segundos'}
+    """
+    hoy = datetime.now()
+    fecha_desde = fecha_desde or hoy - timedelta(days=1)
+    fecha_hasta = fecha_hasta or hoy
+    carpetas = carpetas or crear_carpetas()
+    inicio = datetime.now()
+    
+    reiniciar_unidades()
+    conservar_lecturas(conservar)
+    try:
+        extraer_ventana(
+            fecha_desde, fecha_hasta, {reporte: None for reporte in reportes}, carpetas, motor,
+            session=session, navegador=navegador
+        )
+    finally:
+        # El manifiesto se guarda aunque la extracción se corte
+        resultado = _resultado_extraccion(motor, inicio)
+    
+    return resultado
+
+
+def reintentar(motor='http', carpetas=None, session=None, navegador=None, conservar=False):
+    """
+    Vuelve a extraer solo las unidades fallidas del último manifiesto, agrupadas por ventana.
+    
+    Las lecturas que ya estuvieran en memoria (extracción previa del mismo
+    proceso) se mantienen y se suman las nuevas.
+    
+    Returns:
+        dict como extraer(), o None si no había unidades fallidas
+    """
+    manifiesto_previo = cargar_manifiesto()
+    fallidas = unidades_fallidas(manifiesto_previo) if manifiesto_previo else []
+    if not fallidas:
+        return None
+    
+    print(f"\n🔁 Reintentando {len(fallidas)} unidades fallidas")
+    carpetas = carpetas or crear_carpetas()
+    inicio = datetime.now()
+    
+    retomar_manifiesto(manifiesto_previo)
+    conservar_lecturas(conservar)
+    try:
+        for (desde, hasta), pedidos in planificar_reintento(fallidas).items():
+            print(f"\n📅 Ventana {desde} → {hasta}: {pedidos}")
+            extraer_ventana(
+                datetime.strptime(desde, '%d/%m/%Y'), datetime.strptime(hasta, '%d/%m/%Y'), pedidos, carpetas,
+                motor, session=session, navegador=navegador
+            )
+    finally:
+        resultado = _resultado_extraccion(motor, inicio)
+    
+    return resultado
+
+
+def actualizar(conn, motor='http', fecha_desde=None, fecha_hasta=None, session=None, navegador=None,
+               max_workers=None):
+    """
+    Actualización completa en el mismo proceso: extraer → reintentar fallidas → ingestar.
+    
+    Los DataFrames que la extracción ya leyó (para el manifiesto) pasan
+    directo a la ingesta; solo se vuelven a leer del disco los archivos que
+    quedaron de ejecuciones anteriores.
+    
+    Args:
+        max_workers: procesos para parsear esos archivos (ver leer_reportes_paralelo)
+    
+    Returns:
+        dict: {'extraccion': {'archivos', 'fallidas', 'segundos'}, 'ingesta': resultado de ingestar()}
+    """
+    from .ingestion_functions import ingestar
+    
+    carpetas = crear_carpetas()
+    extraccion = extraer(
+        fecha_desde, fecha_hasta, motor=motor, carpetas=carpetas, session=session, navegador=navegador, conservar=True
+    )
+    
+    # Reintentar solo lo que falló (no toda la extracción)
+    if extraccion['fallidas']:
+        extraccion = reintentar(motor, carpetas, session=session, navegador=navegador, conservar=True) or extraccion
+    
+    try:
+        ingesta = ingestar(conn, lecturas=extraccion['lecturas'], max_workers=max_workers)
+    finally:
+        reiniciar_unidades()
+        conservar_lecturas(False)
+    
+    return {
+        'extraccion': {
+            'archivos': extraccion['archivos'],
+            'fallidas': extraccion['fallidas'],
+            'segundos': extraccion['segundos'],
+        },
+        'ingesta': ingesta,
+    }
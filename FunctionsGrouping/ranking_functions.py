@@ -0,0 +1,160 @@
+"""
+Rankings y relaciones de productos desde los resúmenes diarios (usados por el dashboard)
+
+producto_dia guarda cantidad y facturación por (sucursal, Fecha, Turno,
+producto) y la mantiene la ingesta. Una ventana de fechas se resuelve con un
+rango sobre su clave primaria: el costo depende de productos × días, no de
+la cantidad de líneas de ticket. El top-k / bottom-k se ordena y corta en SQL.
+Como en todos los resúmenes diarios, Turno es '' en las líneas sin Turno.
+
+pares_dia y producto_tickets_dia responden "qué se vende con X" con el mismo
+rango (sucursal_id, Fecha) de su clave, sin buscar los tickets del producto:
+cada par está una sola vez (producto_a < producto_b), así que el producto se
+busca en los dos lados.
+"""
+from datetime import date
+
+import pandas as pd
+
+# Medidas por las que se puede ordenar un ranking
+MEDIDAS = ('Cantidad', 'Facturacion')
+
+EPOCA = date(1970, 1, 1)
+
+
+def _filtros_ventana(sucursal, desde, hasta, turno, alias='d'):
+    """Condiciones WHERE y parámetros de una sucursal, rango de fechas y turno ('': líneas sin Turno)"""
+    condiciones = ["s.nombre = ?"]
+    parametros = [sucursal]
+    # Fecha se guarda como número de día
+    if desde is not None:
+        condiciones.append(f"{alias}.Fecha >= ?")
+        parametros.append((desde - EPOCA).days)
+    if hasta is not None:
+        condiciones.append(f"{alias}.Fecha <= ?")
+        parametros.append((hasta - EPOCA).days)
+    if turno is not None:
+        condiciones.append(f"{alias}.Turno = ?")
+        parametros.append(turno)
+    return condiciones, parametros
+
+
+def _consulta_ventana(sucursal, desde, hasta, turno):
+    """SELECT agrupado por producto y sus parámetros para una sucursal, rango de fechas y turno"""
+    condiciones, parametros = _filtros_ventana(sucursal, desde, hasta, turno)
+    
+    consulta = f"""
+        SELECT p."Código", p."Descripción", p.Familia,
+               SUM(d.Cantidad) AS Cantidad, SUM(d.Facturacion) AS Facturacion, SUM(d.Lineas) AS Lineas
+        FROM producto_dia d
+        JOIN dim_sucursal s ON s.id = d.sucursal_id
+        JOIN dim_producto p ON p.id = d.producto_id
+        WHERE {' AND '.join(condiciones)}
+        GROUP BY d.producto_id
+    """
+    return consulta, parametros
+
+
+def ranking_productos(conn, sucursal, desde=None, hasta=None, turno=None):
+    """
+    Todos los productos vendidos en la ventana, de más a menos vendido.
+    
+    Args:
+        sucursal: nombre de la sucursal
+        desde, hasta: date, ambos extremos incluidos (None: sin límite)
+        turno: Turno a incluir (None: todos; '': líneas sin Turno, como se guardan en los resúmenes)
+    
+    Returns:
+        DataFrame: Código, Descripción, Familia, Cantidad, Facturacion, Lineas
+    """
+    consulta, parametros = _consulta_ventana(sucursal, desde, hasta, turno)
+    return pd.read_sql_query(
+        f'{consulta} ORDER BY Cantidad DESC, "Descripción"', conn, params=parametros
+    )
+
+
+def top_productos(conn, sucursal, k, medida='Cantidad', desde=None, hasta=None, turno=None, peores=False):
+    """
+    Los k productos con mayor (o menor) Cantidad o Facturacion en la ventana.
+    
+    Args:
+        k: cantidad de productos
+        medida: 'Cantidad' o 'Facturacion'
+        peores: bottom-k (de menor a mayor) en lugar de top-k
+        sucursal, desde, hasta, turno: ver ranking_productos
+    
+    Returns:
+        DataFrame: Código, Descripción, Familia, Cantidad, Facturacion, Lineas
+    """
+    if medida not in MEDIDAS:
+        raise ValueError(f"Medida inválida: {medida} (opciones: {', '.join(MEDIDAS)})")
+    
+    consulta, parametros = _consulta_ventana(sucursal, desde, hasta, turno)
+    orden = 'ASC' if peores else 'DESC'
+    return pd.read_sql_query(
+        f'{consulta} ORDER BY {medida} {orden}, "Descripción" LIMIT ?', conn, params=[*parametros, int(k)]
+    )
+
+
+def _producto_id(conn, sucursal, codigo):
+    """Clave de dim_producto de un Código en una sucursal (None si no existe)"""
+    fila = conn.execute("""
+        SELECT p.id FROM dim_producto p
+        JOIN dim_sucursal s ON s.id = p.sucursal_id
+        WHERE s.nombre = ? AND p."Código" = ?
+    """, (sucursal, int(codigo))).fetchone()
+    return fila[0] if fila else None
+
+
+def tickets_producto(conn, sucursal, codigo, desde=None, hasta=None, turno=None):
+    """
+    Tickets que tienen el producto en la ventana y en cuántos fue el único producto.
+    
+    Args:
+        codigo: Código del producto
+        sucursal, desde, hasta, turno: ver ranking_productos
+    
+    Returns:
+        dict: {'tickets', 'solo'}
+    """
+    producto_id = _producto_id(conn, sucursal, codigo)
+    condiciones, parametros = _filtros_ventana(sucursal, desde, hasta, turno, alias='t')
+    
+    tickets, solo = conn.execute(f"""
+        SELECT COALESCE(SUM(t.Tickets), 0), COALESCE(SUM(t.TicketsSolo), 0)
+        FROM producto_tickets_dia t
+        JOIN dim_sucursal s ON s.id = t.sucursal_id
+        WHERE t.producto_id = ? AND {' AND '.join(condiciones)}
+    """, [producto_id, *parametros]).fetchone()
+    return {'tickets': tickets, 'solo': solo}
+
+
+def vendidos_con(conn, sucursal, codigo, k=None, desde=None, hasta=None, turno=None):
+    """
+    Productos que se venden con el producto, por cantidad de tickets en común.
+    
+    Args:
+        codigo: Código del producto
+        k: cantidad de productos (None: todos)
+        sucursal, desde, hasta, turno: ver ranking_productos
+    
+    Returns:
+        DataFrame: Código, Descripción, Familia, Tickets (tickets con los dos productos)
+    """
+    producto_id = _producto_id(conn, sucursal, codigo)
+    condiciones, parametros = _filtros_ventana(sucursal, desde, hasta, turno, alias='r')
+    limite = "LIMIT ?" if k is not None else ""
+    if k is not None:
+        parametros.append(int(k))
+    
+    # El otro producto del par es el lado que no coincide con el buscado
+    return pd.read_sql_query(f"""
+        SELECT p."Código", p."Descripción", p.Familia, SUM(r.Tickets) AS Tickets
+        FROM pares_dia r
+        JOIN dim_sucursal s ON s.id = r.sucursal_id
+        JOIN dim_producto p ON p.id = CASE WHEN r.producto_a = ? THEN r.producto_b ELSE r.producto_a END
+        WHERE (r.producto_a = ? OR r.producto_b = ?) AND {' AND '.join(condiciones)}
+        GROUP BY p.id
+        ORDER BY Tickets DESC, p."Descripción"
+        {limite}
+    """, conn, params=[producto_id, producto_id, producto_id, *parametros])
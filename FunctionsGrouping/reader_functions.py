@@ -0,0 +1,338 @@
+"""
+Lectura de los reportes exportados de Datakinga
+
+Los archivos .xls que exporta el sitio pueden ser un .xls real (BIFF), un
+.xlsx o una tabla HTML con extensión .xls. Este módulo detecta el formato
+por los primeros bytes, usa el lector más rápido instalado para ese formato,
+ubica la fila de encabezados y retorna las columnas ya tipadas.
+
+Lectores por formato (en orden de preferencia):
+- xls:  calamine (python-calamine) → xlrd
+- xlsx: calamine (python-calamine) → openpyxl
+- html: parser HTML incremental de la librería estándar
+
+Varios archivos se leen en paralelo con un pool de procesos
+(leer_reportes_paralelo); la cantidad de procesos se configura con
+MAX_WORKERS_PARSEO en .env (por defecto: un proceso por núcleo).
+"""
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from itertools import repeat
+import importlib.util
+import os
+import re
+import time
+
+import pandas as pd
+
+# Fila de encabezados de los reportes exportados si no se puede detectar
+FILA_ENCABEZADO = 3
+# Filas donde se busca el encabezado
+FILAS_BUSQUEDA = 20
+
+FIRMA_XLS = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+FIRMA_XLSX = b'PK\x03\x04'
+
+# Módulo requerido por cada lector
+MODULOS_LECTOR = {
+    'calamine': 'python_calamine',
+    'xlrd': 'xlrd',
+    'openpyxl': 'openpyxl',
+    'html': None,
+}
+
+LECTORES_FORMATO = {
+    'xls': ('calamine', 'xlrd'),
+    'xlsx': ('calamine', 'openpyxl'),
+    'html': ('html',),
+}
+
+PATRON_FECHA = re.compile(r'^\d{1,2}/\d{1,2}/\d{4}')
+
+# Columnas que identifican la fila de encabezados de cada reporte (ver leer_reporte)
+REQUERIDAS_REPORTE = {
+    'cinta': ['Número'],
+    'detalle': ['Número'],
+    'consumos': None,
+}
+
+
+def detectar_formato(ruta):
+    """
+    Formato real del archivo según sus primeros bytes (no la extensión).
+    
+    Returns:
+        str: 'xls', 'xlsx' o 'html'
+    
+    Raises:
+        ValueError: si el contenido no es ninguno de los formatos conocidos
+    """
+    with open(ruta, 'rb') as f:
+        inicio = f.read(2048)
+    
+    if inicio.startswith(FIRMA_XLS):
+        return 'xls'
+    if inicio.startswith(FIRMA_XLSX):
+        return 'xlsx'
+    
+    texto = inicio.decode('latin-1').lower()
+    if '<table' in texto or '<html' in texto or '<!doctype html' in texto:
+        return 'html'
+    
+    raise ValueError(f"Formato no reconocido: {ruta}")
+
+
+def lector_disponible(lector):
+    """Indica si el módulo que necesita el lector está instalado"""
+    modulo = MODULOS_LECTOR[lector]
+    return modulo is None or importlib.util.find_spec(modulo) is not None
+
+
+def lectores_disponibles(formato):
+    """Lectores instalados para el formato, del más rápido al más lento"""
+    return [lector for lector in LECTORES_FORMATO[formato] if lector_disponible(lector)]
+
+
+class _TablaHTML(HTMLParser):
+    """Parser incremental: junta las celdas de cada <tr> del documento"""
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.filas = []
+        self.fila = None
+        self.celda = None
+    
+    def handle_starttag(self, tag, attrs):
+        if tag == 'tr':
+            self.fila = []
+        elif tag in ('td', 'th') and self.fila is not None:
+            self.celda = []
+    
+    def handle_endtag(self, tag):
+        if tag in ('td', 'th') and self.celda is not None:
+            # Texto tal cual (los espacios internos y finales son parte de claves como Articulo)
+            self.fila.append(''.join(self.celda))
+            self.celda = None
+        elif tag == 'tr' and self.fila is not None:
+            self.filas.append(self.fila)
+            self.fila = None
+    
+    def handle_data(self, data):
+        if self.celda is not None:
+            self.celda.append(data)
+
+
+def _leer_html(ruta, bloque=1 << 16):
+    """Lee una tabla HTML en bloques, sin cargar el DOM completo"""
+    parser = _TablaHTML()
+    with open(ruta, 'rb') as f:
+        while True:
+            datos = f.read(bloque)
+            if not datos:
+                break
+            parser.feed(datos.decode('utf-8', errors='replace'))
+    parser.close()
+    return pd.DataFrame(parser.filas)
+
+
+def leer_crudo(ruta, lector=None):
+    """
+    Lee la primera hoja del archivo sin encabezados (como read_excel con header=None).
+    
+    Args:
+        lector: 'calamine', 'xlrd', 'openpyxl' o 'html' (por defecto: el más rápido disponible)
+    
+    Returns:
+        DataFrame con todas las filas del archivo
+    """
+    if lector is None:
+        formato = detectar_formato(ruta)
+        disponibles = lectores_disponibles(formato)
+        if not disponibles:
+            raise ImportError(
+                f"No hay lector instalado para {formato} (instale: {', '.join(LECTORES_FORMATO[formato])})"
+            )
+        lector = disponibles[0]
+    
+    if lector == 'html':
+        df = _leer_html(ruta)
+    else:
+        df = pd.read_excel(ruta, header=None, engine=lector)
+    return _vaciar_blancos(df)
+
+
+def _vaciar_blancos(df):
+    """
+    Celdas de texto vacías o solo con espacios como None; el resto del texto queda tal cual.
+    
+    Es la única normalización de texto y es igual para todos los lectores, así
+    un mismo reporte da las mismas claves (Descripción, Articulo) en cualquier formato.
+    """
+    return df.replace(r'^\s*$', None, regex=True)
+
+
+def _normalizar(texto):
+    """Texto comparable: minúsculas y sin tildes"""
+    texto = str(texto).strip().lower()
+    return texto.translate(str.maketrans('áéíóúü', 'aeiouu'))
+
+
+def ubicar_encabezado(df_raw, requeridas=None):
+    """
+    Índice de la fila de encabezados.
+    
+    Con `requeridas`, es la primera fila que contiene todas esas columnas; si
+    no, la primera fila con al menos dos celdas y todas de texto (los títulos
+    del reporte ocupan una sola celda). Si no encuentra ninguna usa FILA_ENCABEZADO.
+    """
+    requeridas = {_normalizar(col) for col in requeridas} if requeridas else None
+    
+    for indice in range(min(FILAS_BUSQUEDA, len(df_raw))):
+        valores = [valor for valor in df_raw.iloc[indice].tolist() if pd.notna(valor)]
+        
+        if requeridas is not None:
+            if requeridas <= {_normalizar(valor) for valor in valores}:
+                return indice
+        elif len(valores) >= 2 and all(isinstance(valor, str) for valor in valores):
+            return indice
+    
+    return FILA_ENCABEZADO
+
+
+def tipar_columnas(df):
+    """
+    Convierte las columnas de texto a números o fechas cuando todos sus valores lo permiten.
+    
+    Los lectores de Excel ya entregan tipos (solo se infiere el dtype); el HTML
+    llega todo como texto. Las fechas del sitio son DD/MM/YYYY.
+    """
+    df = df.infer_objects()
+    
+    for col in df.columns:
+        if pd.api.types.is_numeric_dtype(df[col]) or pd.api.types.is_datetime64_any_dtype(df[col]):
+            continue
+        
+        valores = df[col].dropna()
+        if valores.empty or not all(isinstance(valor, str) for valor in valores):
+            continue
+        
+        numeros = pd.to_numeric(valores, errors='coerce')
+        if numeros.notna().all():
+            df[col] = pd.to_numeric(df[col])
+        elif valores.str.match(PATRON_FECHA).all():
+            df[col] = pd.to_datetime(df[col], dayfirst=True, errors='coerce')
+    
+    return df
+
+
+def leer_reporte(ruta, requeridas=None, lector=None):
+    """
+    Lee un reporte exportado: detecta formato, ubica encabezados y tipa columnas.
+    
+    Args:
+        requeridas: columnas que identifican la fila de encabezados (ej: ['Número'])
+        lector: forzar un lector (ver leer_crudo)
+    
+    Returns:
+        DataFrame con los encabezados del reporte como columnas
+    """
+    df_raw = leer_crudo(ruta, lector)
+    fila = ubicar_encabezado(df_raw, requeridas)
+    
+    df = df_raw.iloc[fila + 1:].copy()
+    df.columns = df_raw.iloc[fila].tolist()
+    df = df.dropna(how='all').reset_index(drop=True)
+    
+    return tipar_columnas(df)
+
+
+def _leer_con_tiempo(ruta, requeridas):
+    """Lee un reporte y mide el tiempo (se ejecuta en los procesos del pool)"""
+    inicio = time.perf_counter()
+    try:
+        df = leer_reporte(ruta, requeridas)
+        error = None
+    except Exception as e:
+        df = None
+        error = f"{type(e).__name__}: {e}"
+    
+    return {
+        'archivo': ruta,
+        'df': df,
+        'filas': len(df) if df is not None else 0,
+        'segundos': time.perf_counter() - inicio,
+        'error': error,
+    }
+
+
+def leer_reportes_paralelo(archivos, requeridas=None, max_workers=None):
+    """
+    Lee varios reportes en paralelo con un pool de procesos.
+    
+    El parseo es CPU y cada archivo es independiente. Con un solo archivo o
+    un solo worker se lee en el proceso actual (sin costo de arrancar el pool).
+    Los scripts que la llaman deben tener su código bajo `if __name__ == "__main__":`
+    (en Windows cada proceso del pool vuelve a importar el script).
+    
+    Args:
+        archivos: rutas a leer
+        requeridas: columnas que identifican la fila de encabezados (ver leer_reporte)
+        max_workers: procesos (por defecto: MAX_WORKERS_PARSEO en .env o cantidad de núcleos)
+    
+    Returns:
+        list: un dict por archivo, en el mismo orden que `archivos`:
+              {'archivo', 'df', 'filas', 'segundos', 'error'}
+    """
+    archivos = list(archivos)
+    if max_workers is None:
+        max_workers = int(os.getenv('MAX_WORKERS_PARSEO', str(os.cpu_count() or 1)))
+    max_workers = max(1, min(max_workers, len(archivos)))
+    
+    if max_workers == 1:
+        return [_leer_con_tiempo(archivo, requeridas) for archivo in archivos]
+    
+    # map conserva el orden de entrada aunque los archivos terminen en otro orden
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_leer_con_tiempo, archivos, repeat(requeridas)))
+
+
+def comparar_lectores(rutas, repeticiones=3):
+    """
+    Micro-benchmark: tiempo de lectura de cada lector disponible por archivo.
+    
+    Returns:
+        DataFrame con archivo, formato, lector, filas y segundos (mejor de las repeticiones)
+    """
+    resultados = []
+    
+    for ruta in rutas:
+        formato = detectar_formato(ruta)
+        # pandas con el motor por defecto, como se leía antes
+        candidatos = [('read_excel (defecto)', None)] if formato != 'html' else []
+        candidatos += [(lector, lector) for lector in lectores_disponibles(formato)]
+        
+        for nombre, lector in candidatos:
+            tiempos = []
+            filas = None
+            try:
+                for _ in range(repeticiones):
+                    inicio = time.perf_counter()
+                    if lector is None:
+                        df = pd.read_excel(ruta, header=None)
+                    else:
+                        df = leer_crudo(ruta, lector)
+                    tiempos.append(time.perf_counter() - inicio)
+                    filas = len(df)
+            except Exception as e:
+                print(f"   ⚠️ {nombre} no pudo leer {ruta}: {e}")
+                continue
+            
+            resultados.append({
+                'archivo': str(ruta),
+                'formato': formato,
+                'lector': nombre,
+                'filas': filas,
+                'segundos': min(tiempos),
+            })
+    
+    return pd.DataFrame(resultados)
@@ -0,0 +1,237 @@
+"""
+Caché persistente de la sesión autenticada
+
+Las cookies del login se guardan cifradas (Fernet, clave DATAKINGA_SESSION_KEY
+en .env) y se reutilizan entre ejecuciones, workers y el navegador de Selenium.
+Si una respuesta redirige a Login.aspx, la sesión se renueva una sola vez
+(compartida por todos los workers). Un GET se reenvía de forma transparente;
+un POST no (el formulario ASP.NET traía el __VIEWSTATE de la sesión vencida):
+se lanza requests.RequestException con la respuesta del login y quien llama
+recarga la página y vuelve a armar el formulario.
+
+El re-login compartido (_relogin_lock y las cookies en variables del módulo)
+solo coordina los hilos de un mismo proceso. Los procesos aparte, como el
+TrabajadorResidente o cada corrida de backfill, hacen su propio login; entre
+procesos solo se comparte el caché cifrado en disco.
+
+Generar una clave:
+    python -c "from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())"
+"""
+from pathlib import Path
+import json
+import os
+import threading
+import requests
+from dotenv import load_dotenv
+
+from .auth_functions import BASE_URL, login
+
+load_dotenv()
+
+SESSION_CACHE_PATH = Path(os.getenv('DATAKINGA_SESSION_CACHE', 'DataBase/.session_cache'))
+
+# Re-login compartido entre los hilos del proceso: solo un worker renueva la sesión, el resto reutiliza sus cookies
+_relogin_lock = threading.Lock()
+_generacion = 0
+_cookies_actuales = None
+
+
+def _fernet():
+    """Cifrador Fernet con la clave de .env, o None si el caché no está configurado"""
+    clave = os.getenv('DATAKINGA_SESSION_KEY')
+    if not clave:
+        return None
+    
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError:
+        print("   ⚠️ Falta 'cryptography': el caché de sesión está deshabilitado")
+        return None
+    
+    try:
+        return Fernet(clave.encode())
+    except ValueError:
+        print("   ⚠️ DATAKINGA_SESSION_KEY no es una clave Fernet válida: el caché de sesión está deshabilitado")
+        return None
+
+
+def es_pagina_login(url):
+    """Indica si la URL es la página de login (sesión vencida o inexistente)"""
+    return 'login.aspx' in (url or '').lower()
+
+
+def serializar_cookies(cookiejar):
+    """Convierte un cookiejar de requests en una lista de dicts"""
+    return [
+        {'name': c.name, 'value': c.value, 'domain': c.domain, 'path': c.path,
+         'secure': c.secure, 'expires': c.expires}
+        for c in cookiejar
+    ]
+
+
+def aplicar_cookies(session, cookies):
+    """Carga en la sesión una lista de cookies serializadas"""
+    session.cookies.clear()
+    for c in cookies:
+        session.cookies.set(c['name'], c['value'], domain=c.get('domain', ''), path=c.get('path', '/'),
+                            secure=c.get('secure', False), expires=c.get('expires'))
+
+
+def guardar_cookies(cookies):
+    """Guarda las cookies cifradas en disco (si hay clave configurada)"""
+    global _cookies_actuales
+    _cookies_actuales = cookies
+    
+    fernet = _fernet()
+    if fernet is None:
+        return False
+    
+    SESSION_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    SESSION_CACHE_PATH.write_bytes(fernet.encrypt(json.dumps(cookies).encode('utf-8')))
+    return True
+
+
+def cargar_cookies():
+    """Lee las cookies cacheadas (memoria o disco); None si no hay o no se pueden descifrar"""
+    if _cookies_actuales is not None:
+        return _cookies_actuales
+    
+    fernet = _fernet()
+    if fernet is None or not SESSION_CACHE_PATH.exists():
+        return None
+    
+    try:
+        return json.loads(fernet.decrypt(SESSION_CACHE_PATH.read_bytes()).decode('utf-8'))
+    except Exception:
+        print("   ⚠️ Caché de sesión inválido (clave distinta o archivo dañado), se ignora")
+        return None
+
+
+def renovar_sesion(session, generacion_vista):
+    """
+    Vuelve a hacer login una sola vez para todos los workers.
+    
+    Si otro worker ya renovó la sesión después de `generacion_vista`, solo se
+    copian sus cookies.
+    
+    Returns:
+        bool: True si la sesión quedó autenticada
+    """
+    global _generacion
+    
+    with _relogin_lock:
+        if _generacion == generacion_vista:
+            print("   🔑 Login (compartido entre workers)...")
+            nueva = login()
+            if nueva is None:
+                return False
+            guardar_cookies(serializar_cookies(nueva.cookies))
+            _generacion += 1
+        
+        aplicar_cookies(session, _cookies_actuales)
+        session.generacion_login = _generacion
+        return True
+
+
+class _SesionCacheada(requests.Session):
+    """
+    requests.Session que detecta el redirect a Login.aspx y se re-autentica sola.
+    
+    Después del login solo reenvía los GET. Un POST lanza requests.RequestException
+    (con la respuesta del login en `response`) para que se recargue el formulario.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.generacion_login = _generacion
+    
+    def request(self, method, url, *args, **kwargs):
+        response = super().request(method, url, *args, **kwargs)
+        
+        redirigida = es_pagina_login(response.url) or es_pagina_login(response.headers.get('Location'))
+        if redirigida and not es_pagina_login(url):
+            if not renovar_sesion(self, self.generacion_login):
+                return response
+            if method.upper() != 'GET':
+                raise requests.RequestException(
+                    f"Sesión vencida durante {method.upper()} {url}: sesión renovada, hay que recargar la página",
+                    response=response
+                )
+            response = super().request(method, url, *args, **kwargs)
+        
+        return response
+
+
+def sesion_valida(session):
+    """Verifica con un GET a la home que la sesión siga autenticada"""
+    try:
+        # Sin el re-login automático: solo se quiere saber si las cookies sirven
+        response = requests.Session.request(session, 'GET', BASE_URL, timeout=15, allow_redirects=True)
+        return response.ok and not es_pagina_login(response.url)
+    except requests.RequestException:
+        return False
+
+
+def obtener_sesion():
+    """
+    Retorna una sesión autenticada reutilizando las cookies cacheadas.
+    
+    Solo hace login si no hay caché o las cookies vencieron. Es segura para
+    llamar desde varios workers: el login queda compartido.
+    """
+    global _cookies_actuales
+    
+    session = _SesionCacheada()
+    cookies = cargar_cookies()
+    
+    if cookies:
+        aplicar_cookies(session, cookies)
+        
+        # Las cookies ya validadas en este proceso no se vuelven a verificar
+        if cookies is _cookies_actuales:
+            return session
+        
+        if sesion_valida(session):
+            _cookies_actuales = cookies
+            print("✓ Sesión reutilizada desde caché")
+            return session
+    
+    if not renovar_sesion(session, session.generacion_login):
+        return None
+    
+    return session
+
+
+def cargar_cookies_en_driver(driver):
+    """
+    Inyecta las cookies cacheadas en el navegador de Selenium.
+    
+    Returns:
+        bool: True si el navegador quedó autenticado sin pasar por el login
+    """
+    cookies = cargar_cookies()
+    if not cookies:
+        return False
+    
+    driver.get(BASE_URL)
+    for c in cookies:
+        cookie = {'name': c['name'], 'value': c['value'], 'path': c.get('path') or '/'}
+        if c.get('expires'):
+            cookie['expiry'] = int(c['expires'])
+        try:
+            driver.add_cookie(cookie)
+        except Exception:
+            pass
+    
+    driver.get(BASE_URL)
+    return not es_pagina_login(driver.current_url)
+
+
+def guardar_cookies_driver(driver):
+    """Guarda en el caché las cookies del navegador luego de un login con Selenium"""
+    cookies = [
+        {'name': c['name'], 'value': c['value'], 'domain': c.get('domain', ''), 'path': c.get('path', '/'),
+         'secure': c.get('secure', False), 'expires': c.get('expiry')}
+        for c in driver.get_cookies()
+    ]
+    return guardar_cookies(cookies)
@@ -0,0 +1,125 @@
+"""
+Carga de Tickets con Detalle en streaming (memoria acotada)
+
+En lugar de concatenar todos los archivos en un solo DataFrame y escribirlo
+con un to_sql, cada archivo pasa por parsear → enriquecer (Sucursal, Fecha,
+Hora, Linea) → validar → insertar en lotes (insertar_tickets_nuevos), y se
+confirma antes de leer el siguiente. La memoria queda limitada por el archivo
+más grande, no por el historial completo.
+"""
+from pathlib import Path
+import ctypes
+import sys
+import time
+
+from .reader_functions import leer_reporte
+from .database_functions import numerar_lineas, separar_fecha_hora, tipar_tickets, insertar_tickets_nuevos
+
+# Filas por lote de inserción
+TAMANO_LOTE = 5000
+
+
+def memoria_pico_mb():
+    """Pico de memoria residente (RSS) del proceso en MB, o None si no se puede medir"""
+    try:
+        if sys.platform == 'win32':
+            class _Contadores(ctypes.Structure):
+                _fields_ = [
+                    ('cb', ctypes.c_ulong), ('PageFaultCount', ctypes.c_ulong),
+                    ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t),
+                ]
+            
+            contadores = _Contadores()
+            contadores.cb = ctypes.sizeof(contadores)
+            proceso = ctypes.windll.kernel32.GetCurrentProcess()
+            ctypes.windll.psapi.GetProcessMemoryInfo(proceso, ctypes.byref(contadores), contadores.cb)
+            return contadores.PeakWorkingSetSize / (1024 * 1024)
+        
+        import resource
+        
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa KB, macOS bytes
+        return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+    except Exception:
+        return None
+
+
+def sucursal_de_archivo(ruta):
+    """
+    Sucursal según el nombre del archivo de detalle.
+    
+    Formatos soportados:
+    1. tickets_detalle_SUCURSAL_DD_MM_YYYY_HH_MM_SS.xlsx
+    2. SUCURSAL_DD_MM_YYYY.xlsx
+    """
+    partes = Path(ruta).stem.split('_')
+    
+    if partes[0].lower() == 'tickets' and len(partes) > 2:
+        return '_'.join(partes[2:-6])
+    if len(partes) >= 4 and partes[-3].isdigit() and partes[-2].isdigit() and partes[-1].isdigit():
+        return '_'.join(partes[:-3])
+    return '_'.join(partes[1:])
+
+
+def enriquecer_detalle(df, sucursal):
+    """Agrega Sucursal, Fecha, Hora y Linea a las filas de un archivo, tipa las columnas y descarta las inválidas"""
+    if 'Sucursal' in df.columns:
+        df = df.drop(columns=['Sucursal'])
+    df['Sucursal'] = sucursal
+    
+    df = tipar_tickets(df)
+    
+    fcierre_col = next((col for col in df.columns if 'cierre' in str(col).lower()), None)
+    if fcierre_col:
+        df = separar_fecha_hora(df, fcierre_col)
+    
+    return numerar_lineas(df)
+
+
+def cargar_detalle_streaming(conn, archivos, tamano_lote=TAMANO_LOTE):
+    """
+    Carga los archivos de detalle de a uno, en lotes, con commit por archivo.
+    
+    Requiere la base migrada (migrar()): cada lote pasa por
+    insertar_tickets_nuevos (dimensiones + fact_tickets) y las líneas repetidas
+    las descarta la clave primaria. El Turno se asigna después con asignar_turnos().
+    
+    Args:
+        archivos: rutas de los archivos de detalle
+        tamano_lote: filas por lote
+    
+    Returns:
+        dict: {'archivos', 'leidas', 'insertadas', 'segundos', 'memoria_pico_mb'}
+    """
+    resumen = {'archivos': 0, 'leidas': 0, 'insertadas': 0}
+    inicio = time.time()
+    
+    for numero, archivo in enumerate(archivos, 1):
+        inicio_archivo = time.time()
+        sucursal = sucursal_de_archivo(archivo)
+        
+        # Parsear → enriquecer → validar
+        df = enriquecer_detalle(leer_reporte(archivo, ['Número']), sucursal)
+        
+        # Insertar en lotes
+        insertadas = 0
+        for desde in range(0, len(df), tamano_lote):
+            insertadas += sum(insertar_tickets_nuevos(conn, df.iloc[desde:desde + tamano_lote]).values())
+        conn.commit()
+        
+        resumen['archivos'] += 1
+        resumen['leidas'] += len(df)
+        resumen['insertadas'] += insertadas
+        
+        pico = memoria_pico_mb()
+        memoria = f", pico RSS {pico:.0f} MB" if pico is not None else ""
+        print(f"   ✓ [{numero}/{len(archivos)}] {Path(archivo).name} ({sucursal}): "
+              f"{insertadas}/{len(df)} filas en {time.time() - inicio_archivo:.1f}s{memoria}")
+        del df
+    
+    resumen['segundos'] = time.time() - inicio
+    resumen['memoria_pico_mb'] = memoria_pico_mb()
+    return resumen
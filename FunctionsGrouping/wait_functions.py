@@ -0,0 +1,136 @@
+"""
+Esperas por condición para el flujo Selenium
+
+Reemplazan los time.sleep fijos: cada espera termina apenas se cumple la
+condición real de la página (postback terminado, grilla actualizada, valor
+del campo aplicado) y registra cuánto tardó, para conocer la latencia real
+del sitio.
+"""
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+import time
+
+# Registro de esperas de la extracción en curso: [(descripcion, segundos, cumplida), ...]
+TIEMPOS_ESPERA = []
+
+GRILLA_ID = "ctl00_ContentPlaceHolder1_GridView1"
+
+
+def esperar(wait, condicion, descripcion):
+    """
+    Espera una condición con el WebDriverWait dado y registra el tiempo.
+    
+    Returns:
+        El valor retornado por la condición (como wait.until)
+    """
+    inicio = time.perf_counter()
+    try:
+        resultado = wait.until(condicion)
+        TIEMPOS_ESPERA.append((descripcion, time.perf_counter() - inicio, True))
+        return resultado
+    except Exception:
+        TIEMPOS_ESPERA.append((descripcion, time.perf_counter() - inicio, False))
+        raise
+
+
+def documento_listo(driver):
+    """Condición: documento cargado y sin postback asíncrono (UpdatePanel) en curso"""
+    return driver.execute_script(
+        "if (document.readyState !== 'complete') return false;"
+        "if (window.Sys && Sys.WebForms && Sys.WebForms.PageRequestManager) {"
+        "  return !Sys.WebForms.PageRequestManager.getInstance().get_isInAsyncPostBack();"
+        "}"
+        "return true;"
+    )
+
+
+def esperar_postback(driver, wait, accion, descripcion="Postback"):
+    """
+    Ejecuta una acción que dispara un postback ASP.NET y espera a que termine.
+    
+    Se considera terminado cuando la página anterior quedó obsoleta (recarga
+    completa) y el documento nuevo está listo.
+    """
+    pagina_anterior = driver.find_element(By.TAG_NAME, 'html')
+    accion()
+    
+    def postback_terminado(d):
+        return EC.staleness_of(pagina_anterior)(d) and documento_listo(d)
+    
+    return esperar(wait, postback_terminado, descripcion)
+
+
+def esperar_grilla_actualizada(driver, wait, accion, descripcion="Grilla actualizada", grilla_id=GRILLA_ID):
+    """
+    Ejecuta una acción (ej: Procesar) y espera a que el GridView se vuelva a dibujar.
+    
+    Si la grilla ya existía, espera a que la anterior quede obsoleta y aparezca
+    la nueva; si no existía, espera a que aparezca.
+    """
+    grillas = driver.find_elements(By.ID, grilla_id)
+    grilla_anterior = grillas[0] if grillas else None
+    accion()
+    
+    def grilla_nueva(d):
+        if grilla_anterior is not None and not EC.staleness_of(grilla_anterior)(d):
+            return False
+        return documento_listo(d) and bool(d.find_elements(By.ID, grilla_id))
+    
+    return esperar(wait, grilla_nueva, descripcion)
+
+
+def escribir_fecha(driver, wait, field_id, fecha_sin_barras, fecha_barras, descripcion=None):
+    """
+    Escribe una fecha en un campo con máscara y espera a que el valor quede aplicado.
+    """
+    campo = esperar(wait, EC.element_to_be_clickable((By.ID, field_id)), "Campo fecha")
+    campo.click()
+    campo.send_keys('\ue009a\ue000')  # Ctrl+A
+    campo.send_keys(fecha_sin_barras)
+    
+    def valor_aplicado(d):
+        valor = (d.find_element(By.ID, field_id).get_attribute('value') or '').strip()
+        return valor in (fecha_barras, fecha_sin_barras)
+    
+    esperar(wait, valor_aplicado, descripcion or "Fecha aplicada")
+    return campo
+
+
+def esperar_checkbox(driver, wait, checkbox_id, marcado, descripcion=None):
+    """Marca/desmarca un checkbox (si hace falta) y espera a que el estado quede aplicado"""
+    checkbox = driver.find_element(By.ID, checkbox_id)
+    if checkbox.is_selected() != marcado:
+        checkbox.click()
+    
+    return esperar(
+        wait,
+        lambda d: d.find_element(By.ID, checkbox_id).is_selected() == marcado,
+        descripcion or "Checkbox"
+    )
+
+
+def reiniciar_esperas():
+    """Vacía el registro de esperas (al empezar cada extracción, así el resumen es solo de esa ejecución)"""
+    TIEMPOS_ESPERA.clear()
+
+
+def resumen_esperas():
+    """Imprime cuánto tardó realmente cada tipo de espera"""
+    if not TIEMPOS_ESPERA:
+        return
+    
+    print("\n⏱️ TIEMPOS DE ESPERA (condiciones reales de la página)")
+    agrupados = {}
+    for descripcion, segundos, cumplida in TIEMPOS_ESPERA:
+        agrupados.setdefault(descripcion, []).append((segundos, cumplida))
+    
+    for tipo, tiempos in agrupados.items():
+        segundos = [t for t, _ in tiempos]
+        fallidas = sum(1 for _, cumplida in tiempos if not cumplida)
+        linea = f"   {tipo}: {len(segundos)} esperas | total {sum(segundos):.1f}s | máx {max(segundos):.2f}s"
+        if fallidas:
+            linea += f" | ⚠️ {fallidas} sin cumplirse"
+        print(linea)
+    
+    total = sum(t for _, t, _ in TIEMPOS_ESPERA)
+    print(f"   Total esperado: {total:.1f}s")
@@ -0,0 +1,224 @@
+"""
+Worker residente de extracción para el scheduler
+
+En lugar de lanzar `python main.py` en cada horario (arranque de Python,
+imports de pandas/selenium, login y Edge desde cero), el scheduler mantiene un
+proceso worker vivo con los módulos ya cargados, la sesión HTTP autenticada y,
+si hace falta, un Edge abierto. Los trabajos llegan por una cola local
+(multiprocessing.Queue) y antes de cada uno el worker verifica la sesión y la
+recicla si venció o es demasiado vieja.
+
+El trabajo 'actualizacion' también hace la ingesta dentro del worker
+(pipeline_functions.actualizar): los DataFrames de la extracción pasan a la
+base sin volver a leer los archivos y al scheduler solo vuelve el resumen.
+"""
+from datetime import datetime
+import multiprocessing
+import os
+import queue
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Reciclar la sesión HTTP / el navegador pasado este tiempo (segundos)
+MAX_EDAD_SESION = int(os.getenv('WORKER_MAX_EDAD_SESION', str(4 * 3600)))
+# Tiempo máximo de un trabajo antes de considerar al worker colgado (segundos)
+TIMEOUT_TRABAJO = int(os.getenv('WORKER_TIMEOUT', '3600'))
+
+
+class _TrabajadorExtraccion:
+    """Estado del worker: sesión HTTP y navegador reutilizados entre trabajos"""
+    
+    def __init__(self, motor):
+        # Imports pesados una sola vez, al arrancar el worker
+        import pandas
+        from . import ingestion_functions
+        from .pipeline_functions import crear_carpetas
+        
+        self.motor = motor
+        self.carpetas = crear_carpetas()
+        self.session = None
+        self.session_creada = 0.0
+        self.driver = None
+        self.driver_creado = 0.0
+    
+    def obtener_session(self):
+        """Sesión HTTP sana: se valida antes de cada trabajo y se recicla si venció o es vieja"""
+        from .session_functions import obtener_sesion, sesion_valida, renovar_sesion
+        
+        if self.session is not None and time.time() - self.session_creada > MAX_EDAD_SESION:
+            print("   ♻️ Sesión HTTP reciclada por antigüedad")
+            self.session.close()
+            self.session = None
+        
+        if self.session is None:
+            self.session = obtener_sesion()
+            self.session_creada = time.time()
+        elif not sesion_valida(self.session):
+            print("   ♻️ Sesión HTTP vencida, renovando")
+            renovar_sesion(self.session, self.session.generacion_login)
+            self.session_creada = time.time()
+        
+        if self.session is None:
+            raise RuntimeError("Login HTTP fallido")
+        
+        return self.session
+    
+    def obtener_navegador(self):
+        """Edge abierto y autenticado; se recrea si se cerró, se colgó o es viejo"""
+        from selenium.webdriver.support.ui import WebDriverWait
+        from .pipeline_functions import crear_navegador, login_navegador
+        from .session_functions import es_pagina_login
+        
+        if self.driver is not None:
+            try:
+                vencido = time.time() - self.driver_creado > MAX_EDAD_SESION
+                if vencido or es_pagina_login(self.driver.current_url):
+                    raise RuntimeError("navegador vencido")
+                return self.driver
+            except Exception:
+                print("   ♻️ Navegador reciclado")
+                self.cerrar_navegador()
+        
+        self.driver = crear_navegador(self.carpetas['cinta'])
+        self.driver_creado = time.time()
+        login_navegador(self.driver, WebDriverWait(self.driver, 10))
+        return self.driver
+    
+    def cerrar_navegador(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+    
+    def ejecutar(self, trabajo):
+        """
+        Ejecuta un trabajo (el manifiesto lo guarda la extracción).
+        
+        Args:
+            trabajo: {'tipo': 'extraccion' | 'reintento' | 'actualizacion', 'desde': 'DD/MM/YYYY', 'hasta': 'DD/MM/YYYY'}
+        
+        Returns:
+            dict: {'ok', 'fallidas', 'segundos', 'error'} y, en 'actualizacion', 'ingesta' (ver ingestar())
+        """
+        from .connection_functions import conectar
+        from .pipeline_functions import extraer, reintentar, actualizar
+        
+        inicio = datetime.now()
+        session = self.obtener_session() if self.motor == 'http' else None
+        desde = datetime.strptime(trabajo['desde'], '%d/%m/%Y') if trabajo.get('desde') else None
+        hasta = datetime.strptime(trabajo['hasta'], '%d/%m/%Y') if trabajo.get('hasta') else None
+        ingesta = None
+        
+        if trabajo.get('tipo') == 'actualizacion':
+            conn = conectar()
+            try:
+                # El worker es un proceso daemon (no puede tener hijos): los archivos
+                # que no están en memoria se parsean en este mismo proceso
+                resultado = actualizar(
+                    conn, self.motor, desde, hasta, session=session, navegador=self.obtener_navegador, max_workers=1
+                )
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+            fallidas = resultado['extraccion']['fallidas']
+            ingesta = resultado['ingesta']
+        elif trabajo.get('tipo') == 'reintento':
+            resultado = reintentar(self.motor, self.carpetas, session=session, navegador=self.obtener_navegador)
+            fallidas = resultado['fallidas'] if resultado else 0
+        else:
+            resultado = extraer(
+                desde, hasta, motor=self.motor, carpetas=self.carpetas, session=session, navegador=self.obtener_navegador
+            )
+            fallidas = resultado['fallidas']
+        
+        return {
+            'ok': fallidas == 0,
+            'fallidas': fallidas,
+            'segundos': (datetime.now() - inicio).total_seconds(),
+            'error': None,
+            'ingesta': ingesta,
+        }
+
+
+def proceso_trabajador(cola_trabajos, cola_resultados, motor):
+    """Loop del worker residente (corre en su propio proceso hasta recibir None)"""
+    print(f"🔥 Worker de extracción listo (PID {os.getpid()}, motor {motor.upper()})")
+    trabajador = _TrabajadorExtraccion(motor)
+    
+    try:
+        while True:
+            trabajo = cola_trabajos.get()
+            if trabajo is None:
+                break
+            
+            try:
+                resultado = trabajador.ejecutar(trabajo)
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                resultado = {'ok': False, 'fallidas': None, 'segundos': None, 'error': str(e)}
+            
+            cola_resultados.put(resultado)
+    finally:
+        trabajador.cerrar_navegador()
+
+
+class TrabajadorResidente:
+    """Lado del scheduler: arranca el worker, le envía trabajos y lo reinicia si muere o se cuelga"""
+    
+    def __init__(self, motor='http'):
+        self.motor = motor
+        self.contexto = multiprocessing.get_context('spawn')
+        self.proceso = None
+        self.cola_trabajos = None
+        self.cola_resultados = None
+    
+    def iniciar(self):
+        self.cola_trabajos = self.contexto.Queue()
+        self.cola_resultados = self.contexto.Queue()
+        self.proceso = self.contexto.Process(
+            target=proceso_trabajador,
+            args=(self.cola_trabajos, self.cola_resultados, self.motor),
+            daemon=True
+        )
+        self.proceso.start()
+    
+    def esta_vivo(self):
+        return self.proceso is not None and self.proceso.is_alive()
+    
+    def enviar(self, trabajo, timeout=TIMEOUT_TRABAJO):
+        """Envía un trabajo y espera su resultado (reinicia el worker si no está vivo o no responde)"""
+        if not self.esta_vivo():
+            print("   ⚠️ Worker no disponible, iniciando uno nuevo")
+            self.iniciar()
+        
+        self.cola_trabajos.put(trabajo)
+        limite = time.time() + timeout
+        
+        while time.time() < limite:
+            try:
+                return self.cola_resultados.get(timeout=5)
+            except queue.Empty:
+                if not self.esta_vivo():
+                    return {'ok': False, 'fallidas': None, 'segundos': None, 'error': 'El worker terminó inesperadamente'}
+        
+        print("   ⚠️ Worker sin respuesta, se reinicia")
+        self.proceso.terminate()
+        self.proceso.join()
+        self.proceso = None
+        return {'ok': False, 'fallidas': None, 'segundos': None, 'error': f'Timeout de {timeout}s'}
+    
+    def detener(self):
+        if self.esta_vivo():
+            self.cola_trabajos.put(None)
+            self.proceso.join(timeout=30)
+            if self.proceso.is_alive():
+                self.proceso.terminate()
+        self.proceso = None
@@ -0,0 +1,65 @@
+"""
+DATAKINGA - Comparación de lectores de reportes
+=================================================
+Mide cuánto tarda cada lector disponible (read_excel por defecto, calamine,
+xlrd, openpyxl, HTML) en leer los reportes exportados.
+
+Uso:
+    python benchmark_readers.py                      # Archivos en DataBase/Detalle, Cinta y Consumos
+    python benchmark_readers.py archivo1.xls ...     # Archivos indicados
+    python benchmark_readers.py --repeticiones=5     # Mejor de 5 lecturas (por defecto: 3)
+"""
+
+import sys
+import glob
+from pathlib import Path
+
+from FunctionsGrouping.reader_functions import comparar_lectores, lectores_disponibles, LECTORES_FORMATO
+
+CARPETAS = [Path('DataBase/Detalle'), Path('DataBase/Cinta'), Path('DataBase/Consumos')]
+
+if __name__ == "__main__":
+    repeticiones = 3
+    archivos = []
+    for arg in sys.argv[1:]:
+        if arg.startswith('--repeticiones='):
+            repeticiones = int(arg.split('=', 1)[1])
+        else:
+            archivos.append(arg)
+    
+    if not archivos:
+        for carpeta in CARPETAS:
+            archivos.extend(glob.glob(str(carpeta / '*.xls')))
+            archivos.extend(glob.glob(str(carpeta / '*.xlsx')))
+    
+    print("=" * 70)
+    print("COMPARACIÓN DE LECTORES DE REPORTES")
+    print("=" * 70)
+    
+    print("\n📦 Lectores instalados:")
+    for formato in LECTORES_FORMATO:
+        print(f"   • {formato}: {', '.join(lectores_disponibles(formato)) or 'ninguno'}")
+    
+    if not archivos:
+        print("\n⚠️ No se encontraron archivos para comparar")
+        sys.exit(1)
+    
+    print(f"\n⏱️ Midiendo {len(archivos)} archivos (mejor de {repeticiones} lecturas)...\n")
+    resultados = comparar_lectores(archivos, repeticiones)
+    
+    if resultados.empty:
+        print("⚠️ Ningún lector pudo leer los archivos")
+        sys.exit(1)
+    
+    for archivo, grupo in resultados.groupby('archivo', sort=False):
+        grupo = grupo.sort_values('segundos')
+        print(f"📄 {Path(archivo).name} ({grupo['formato'].iloc[0]}, {grupo['filas'].iloc[0]} filas)")
+        mas_lento = grupo['segundos'].max()
+        for _, fila in grupo.iterrows():
+            print(f"   {fila['lector']:<22} {fila['segundos']:.3f}s  (x{mas_lento / fila['segundos']:.1f})")
+    
+    print("\n" + "=" * 70)
+    print("TOTAL POR LECTOR")
+    print("=" * 70)
+    for lector, segundos in resultados.groupby('lector')['segundos'].sum().sort_values().items():
+        print(f"   {lector:<22} {segundos:.3f}s")
@@ -1,127 +1,124 @@
 """
 DATAKINGA - Extracción Automática de Datos
-Modo: Selenium (Navegador Edge)
+Motores:
+- http (por defecto): requests, sin navegador
+- selenium: Navegador Edge (también se usa como respaldo si falla HTTP)
+
+Uso:
+    python main.py                                  # Ayer → hoy, motor de .env (MOTOR_EXTRACCION)
+    python main.py 01/01/2026 18/01/2026            # Rango manual
+    python main.py --motor=selenium                 # Forzar Selenium
+    python main.py --retry-failed                   # Solo las unidades fallidas del último manifiesto
+
+Cada ejecución deja DataBase/extraction_manifest.json con una unidad por
+reporte × sucursal × ventana (estado, archivo, tamaño, filas y duración).
+
+La lógica está en FunctionsGrouping/pipeline_functions.py (extraer / reintentar);
+este script solo interpreta los argumentos y muestra el resultado.
 """
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.edge.options import Options
-from pathlib import Path
-import time
 import os
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 import sys
 
-# Importar funciones de extracción
-from FunctionsGrouping.extraction_functions import extraer_cinta_testigo, extraer_tickets_detalle, extraer_consumos
-
-load_dotenv()
-
-# Configuración de fechas
-# Verificar si se pasaron argumentos de línea de comandos
-if len(sys.argv) >= 3:
-    # Modo: python main.py FECHA_DESDE FECHA_HASTA
-    # Formato esperado: DD/MM/YYYY DD/MM/YYYY
-    try:
-        fecha_desde_str = sys.argv[1]
-        fecha_hasta_str = sys.argv[2]
-        fecha_desde = datetime.strptime(fecha_desde_str, '%d/%m/%Y')
-        fecha_hasta = datetime.strptime(fecha_hasta_str, '%d/%m/%Y')
-        print(f"📅 Modo manual: Descargando desde {fecha_desde_str} hasta {fecha_hasta_str}")
-    except ValueError:
-        print("❌ Error: Formato de fecha inválido. Use: DD/MM/YYYY DD/MM/YYYY")
-        print("   Ejemplo: python main.py 01/01/2026 18/01/2026")
-        sys.exit(1)
-else:
-    # Por defecto: desde ayer hasta hoy (siempre)
-    ayer = datetime.now() - timedelta(days=1)
-    hoy = datetime.now()
-    fecha_desde = ayer
-    fecha_hasta = hoy
-    print(f"📅 Modo automático: Descargando desde {ayer.strftime('%d/%m/%Y')} hasta {hoy.strftime('%d/%m/%Y')}")
-
-# Configuración de Edge
-edge_options = Options()
-edge_options.add_argument('--start-maximized')
-edge_options.add_argument('--disable-blink-features=AutomationControlled')
-edge_options.add_experimental_option("excludeSwitches", ["enable-automation", "enable-logging"])
-edge_options.add_experimental_option('useAutomationExtension', False)
+from FunctionsGrouping.manifest_functions import MANIFEST_PATH
+from FunctionsGrouping.pipeline_functions import crear_carpetas, extraer, reintentar
 
-# Crear directorios
-download_dir_cinta = str(Path('DataBase/Cinta').absolute())
-download_dir_detalle = str(Path('DataBase/Detalle').absolute())
-download_dir_consumos = str(Path('DataBase/Consumos').absolute())
-Path(download_dir_cinta).mkdir(parents=True, exist_ok=True)
-Path(download_dir_detalle).mkdir(parents=True, exist_ok=True)
-Path(download_dir_consumos).mkdir(parents=True, exist_ok=True)
 
-print("=" * 70)
-print("DATAKINGA - EXTRACCIÓN AUTOMÁTICA COMPLETA")
-print("=" * 70)
-print("\n🌐 Iniciando Edge...")
-
-driver = webdriver.Edge(options=edge_options)
-
-try:
-    # 1. LOGIN
-    print("\n" + "=" * 70)
-    print("FASE 1: LOGIN")
-    print("=" * 70)
-    driver.get("https://datakinga.com/")
-    
-    wait = WebDriverWait(driver, 10)
-    username_field = wait.until(EC.presence_of_element_located((By.ID, "txtUsuario")))
+def parsear_argumentos(argv):
+    """
+    Motor, reintento y ventana de fechas desde la línea de comandos.
     
-    username_field.send_keys(os.getenv('DATAKINGA_USER'))
-    driver.find_element(By.ID, "txtClave").send_keys(os.getenv('DATAKINGA_PASSWORD'))
-    driver.find_element(By.ID, "Ingresar").click()
+    Returns:
+        tuple: (motor, reintentar_fallidas, fecha_desde, fecha_hasta)
+    """
+    # Motor de extracción: --motor=http|selenium o MOTOR_EXTRACCION en .env
+    motor = os.getenv('MOTOR_EXTRACCION', 'http').lower()
+    reintentar_fallidas = False
+    argumentos = []
+    for arg in argv:
+        if arg.startswith('--motor='):
+            motor = arg.split('=', 1)[1].lower()
+        elif arg == '--retry-failed':
+            reintentar_fallidas = True
+        else:
+            argumentos.append(arg)
     
-    print("   ✓ Login exitoso")
-    time.sleep(3)
-    
-    # 2. EXTRAER CINTA TESTIGO
-    print("\n" + "=" * 70)
-    print("FASE 2: CINTA TESTIGO")
-    print("=" * 70)
-    archivo_cinta = extraer_cinta_testigo(driver, wait, download_dir_cinta, fecha_desde, fecha_hasta)
+    if motor not in ('http', 'selenium'):
+        print(f"❌ Error: Motor inválido '{motor}'. Use: --motor=http o --motor=selenium")
+        sys.exit(1)
     
-    # 3. EXTRAER TICKETS CON DETALLE
-    print("\n" + "=" * 70)
-    print("FASE 3: TICKETS CON DETALLE")
-    print("=" * 70)
-    archivos_tickets = extraer_tickets_detalle(driver, wait, download_dir_detalle, fecha_desde, fecha_hasta)
+    # Formato esperado: DD/MM/YYYY DD/MM/YYYY
+    if len(argumentos) >= 2:
+        try:
+            fecha_desde = datetime.strptime(argumentos[0], '%d/%m/%Y')
+            fecha_hasta = datetime.strptime(argumentos[1], '%d/%m/%Y')
+            print(f"📅 Modo manual: Descargando desde {argumentos[0]} hasta {argumentos[1]}")
+        except ValueError:
+            print("❌ Error: Formato de fecha inválido. Use: DD/MM/YYYY DD/MM/YYYY")
+            print("   Ejemplo: python main.py 01/01/2026 18/01/2026")
+            sys.exit(1)
+    else:
+        # Por defecto: desde ayer hasta hoy (siempre)
+        fecha_hasta = datetime.now()
+        fecha_desde = fecha_hasta - timedelta(days=1)
+        print(f"📅 Modo automático: Descargando desde {fecha_desde.strftime('%d/%m/%Y')} hasta {fecha_hasta.strftime('%d/%m/%Y')}")
     
-    # 4. EXTRAER CONSUMOS
-    print("\n" + "=" * 70)
-    print("FASE 4: CONSUMOS")
-    print("=" * 70)
-    archivo_consumos = extraer_consumos(driver, wait, download_dir_consumos, fecha_desde, fecha_hasta)
+    return motor, reintentar_fallidas, fecha_desde, fecha_hasta
+
+
+def mostrar_resultado(resultado):
+    """Imprime los archivos extraídos por reporte"""
+    archivos = resultado['archivos']
     
-    # RESUMEN FINAL
     print("\n" + "=" * 70)
     print("✅ PROCESO COMPLETO FINALIZADO")
     print("=" * 70)
     print(f"\n📊 Cinta Testigo:")
-    print(f"   {archivo_cinta}")
-    print(f"\n📄 Tickets con Detalle ({len(archivos_tickets)} archivos):")
-    for archivo in archivos_tickets:
+    for archivo in archivos['cinta'] or ['No se pudo descargar']:
+        print(f"   {archivo}")
+    print(f"\n📄 Tickets con Detalle ({len(archivos['detalle'])} archivos):")
+    for archivo in archivos['detalle']:
         print(f"   - {archivo}")
-    print(f"\n💰 Consumos:")
-    print(f"   {archivo_consumos if archivo_consumos else 'No se pudo descargar'}")
+    print(f"\n💰 Consumos ({len(archivos['consumos'])} archivos):")
+    for archivo in archivos['consumos'] or ['No se pudo descargar']:
+        print(f"   {archivo}")
     
-    print("\n⏳ El navegador se cerrará en 5 segundos...")
-    time.sleep(5)
+    print(f"\n   💾 {MANIFEST_PATH}")
+    if resultado['fallidas']:
+        print("   💡 Reintentar solo las fallidas: python main.py --retry-failed")
 
-except Exception as e:
-    print(f"\n❌ ERROR: {e}")
-    import traceback
-    traceback.print_exc()
-    print("\n⏳ Presiona ENTER para cerrar...")
-    input()
 
-
-finally:
-    driver.quit()
-    print("\n" + "=" * 70)
+if __name__ == "__main__":
+    load_dotenv()
+    motor, reintentar_fallidas, fecha_desde, fecha_hasta = parsear_argumentos(sys.argv[1:])
+    
+    # Crear directorios
+    carpetas = crear_carpetas()
+    
+    print("=" * 70)
+    print("DATAKINGA - EXTRACCIÓN AUTOMÁTICA COMPLETA")
+    print("=" * 70)
+    print(f"\n⚙️ Motor de extracción: {motor.upper()}")
+    
+    try:
+        if reintentar_fallidas:
+            # Solo las unidades fallidas del último manifiesto, agrupadas por ventana
+            resultado = reintentar(motor, carpetas)
+            if resultado is None:
+                print("\n✅ No hay unidades fallidas en el último manifiesto")
+                sys.exit(0)
+        else:
+            resultado = extraer(fecha_desde, fecha_hasta, motor=motor, carpetas=carpetas)
+        
+        mostrar_resultado(resultado)
+    
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        print("\n⏳ Presiona ENTER para cerrar...")
+        input()
+    
+    finally:
+        print("\n" + "=" * 70)
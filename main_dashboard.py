@@ -4,7 +4,6 @@ Visualización de datos con Streamlit
 """
 import streamlit as st
 import pandas as pd
-import sqlite3
 import os
 from pathlib import Path
 from datetime import datetime
@@ -12,6 +11,10 @@ from dotenv import load_dotenv
 import plotly.express as px
 import plotly.graph_objects as go
 
+from FunctionsGrouping.connection_functions import conectar
+from FunctionsGrouping.parquet_functions import leer_tickets
+from FunctionsGrouping import ranking_functions
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -49,75 +52,135 @@ def get_database_path():
     
     return None
 
-# Cargar datos
+# Sucursales y su rango de fechas (consulta chica: los tickets se cargan después de filtrar)
 @st.cache_data
-def cargar_datos():
-    """Carga los datos de la base de datos SQLite"""
+def cargar_sucursales():
+    """Sucursales con la primera y la última fecha de sus tickets"""
     db_path = get_database_path()
     
-    # Crear conexión dentro de la función (mejor para el caché de Streamlit)
-    conn = sqlite3.connect(db_path, check_same_thread=False)
+    # Solo lectura sobre la base en WAL: lee una foto consistente aunque la ingesta esté escribiendo
+    conn = conectar(db_path, solo_lectura=True, check_same_thread=False)
     
     try:
-        # Cargar tickets_detalle
-        df_tickets = pd.read_sql_query("SELECT * FROM tickets_detalle", conn)
-        
-        # Cargar consumos - solo la versión más reciente de cada Codigo+Sucursal
-        df_consumos = pd.read_sql_query("""
-            SELECT c1.* 
-            FROM consumos c1
-            INNER JOIN (
-                SELECT Codigo, Sucursal, MAX(Fecha_Carga) as max_fecha
-                FROM consumos
-                GROUP BY Codigo, Sucursal
-        ) c2 ON c1.Codigo = c2.Codigo 
-            AND c1.Sucursal = c2.Sucursal 
-            AND c1.Fecha_Carga = c2.max_fecha
+        df_sucursales = pd.read_sql_query("""
+            SELECT s.nombre AS Sucursal, MIN(f.Fecha) AS desde, MAX(f.Fecha) AS hasta
+            FROM fact_tickets f
+            JOIN dim_sucursal s ON s.id = f.sucursal_id
+            GROUP BY s.nombre
+            ORDER BY s.nombre
         """, conn)
         
-        # Convertir columnas numéricas
-        if 'Cantidad' in df_tickets.columns:
-            df_tickets['Cantidad'] = pd.to_numeric(df_tickets['Cantidad'], errors='coerce')
-        if 'Importe' in df_tickets.columns:
-            df_tickets['Importe'] = pd.to_numeric(df_tickets['Importe'], errors='coerce')
+        # Fecha se guarda como número de día
+        df_sucursales['desde'] = pd.to_datetime(df_sucursales['desde'], unit='D')
+        df_sucursales['hasta'] = pd.to_datetime(df_sucursales['hasta'], unit='D')
         
-        return df_tickets, df_consumos
+        return df_sucursales
         
     except Exception as e:
         st.error(f"❌ Error al cargar datos de la base de datos: {str(e)}")
-        st.info("Verifica que la base de datos tenga las tablas 'tickets_detalle' y 'consumos'")
+        st.info("Verifica que la base de datos esté migrada (python migrate_database.py)")
         raise
     finally:
         conn.close()
 
-df_tickets, df_consumos = cargar_datos()
+# Cargar datos
+@st.cache_data
+def cargar_datos(sucursal, fecha_desde=None, fecha_hasta=None):
+    """
+    Carga los tickets de una sucursal en un rango de fechas.
+    
+    Lee del dataset Parquet (solo la carpeta de la sucursal y los meses del
+    rango); si no está al día, de la vista tickets_detalle en SQLite.
+    """
+    return leer_tickets(
+        sucursales=[sucursal], desde=fecha_desde, hasta=fecha_hasta, db_path=get_database_path()
+    )
+
+# Resumen diario de ventas (tabla chica que mantiene la ingesta: no recorre las líneas de ticket)
+@st.cache_data
+def cargar_ventas_diarias(sucursal, fecha_desde=None, fecha_hasta=None):
+    """Facturación, cantidad, líneas y tickets por (Fecha, Turno) de una sucursal"""
+    db_path = get_database_path()
+    conn = conectar(db_path, solo_lectura=True, check_same_thread=False)
+    
+    try:
+        condiciones = ["s.nombre = ?"]
+        parametros = [sucursal]
+        # Fecha se guarda como número de día
+        if fecha_desde is not None:
+            condiciones.append("v.Fecha >= ?")
+            parametros.append((pd.Timestamp(fecha_desde) - pd.Timestamp(0)).days)
+        if fecha_hasta is not None:
+            condiciones.append("v.Fecha <= ?")
+            parametros.append((pd.Timestamp(fecha_hasta) - pd.Timestamp(0)).days)
+        
+        # Los resúmenes guardan '' para "sin Turno"; acá vuelve a NULL como en las líneas de ticket
+        df_ventas = pd.read_sql_query(f"""
+            SELECT v.Fecha, NULLIF(v.Turno, '') AS Turno, v.Facturacion, v.Cantidad, v.Lineas, v.Tickets
+            FROM ventas_diarias v
+            JOIN dim_sucursal s ON s.id = v.sucursal_id
+            WHERE {' AND '.join(condiciones)}
+            ORDER BY v.Fecha
+        """, conn, params=parametros)
+        
+        df_ventas['Fecha'] = pd.to_datetime(df_ventas['Fecha'], unit='D')
+        return df_ventas
+    finally:
+        conn.close()
+
+# Rankings de productos desde producto_dia (tabla que mantiene la ingesta: costo productos × días)
+@st.cache_data
+def cargar_ranking_productos(sucursal, fecha_desde=None, fecha_hasta=None, turno=None):
+    """Cantidad y facturación de cada producto en la ventana, de más a menos vendido"""
+    conn = conectar(get_database_path(), solo_lectura=True, check_same_thread=False)
+    try:
+        return ranking_functions.ranking_productos(conn, sucursal, fecha_desde, fecha_hasta, turno)
+    finally:
+        conn.close()
+
+@st.cache_data
+def cargar_top_productos(sucursal, k, medida, peores=False, fecha_desde=None, fecha_hasta=None, turno=None):
+    """Top-k (o bottom-k) de productos por Cantidad o Facturacion en la ventana"""
+    conn = conectar(get_database_path(), solo_lectura=True, check_same_thread=False)
+    try:
+        return ranking_functions.top_productos(conn, sucursal, k, medida, fecha_desde, fecha_hasta, turno, peores)
+    finally:
+        conn.close()
+
+# Relaciones entre productos desde pares_dia / producto_tickets_dia (tablas que mantiene la ingesta)
+@st.cache_data
+def cargar_relaciones(sucursal, codigo, fecha_desde=None, fecha_hasta=None, turno=None):
+    """Productos que se venden con un producto (por tickets en común) y los tickets del producto"""
+    conn = conectar(get_database_path(), solo_lectura=True, check_same_thread=False)
+    try:
+        combos = ranking_functions.vendidos_con(conn, sucursal, codigo, None, fecha_desde, fecha_hasta, turno)
+        tickets = ranking_functions.tickets_producto(conn, sucursal, codigo, fecha_desde, fecha_hasta, turno)
+        return combos, tickets
+    finally:
+        conn.close()
+
+df_sucursales = cargar_sucursales()
 
 # Sidebar - Filtros globales
 st.sidebar.header("🔍 Filtros")
 
 # Filtro por sucursal (OBLIGATORIO - solo una)
-if 'Sucursal' in df_tickets.columns:
-    sucursales = sorted(df_tickets['Sucursal'].dropna().unique().tolist())
-    if len(sucursales) > 0:
-        sucursal_seleccionada = st.sidebar.selectbox(
-            "Sucursal",
-            sucursales,
-            index=0
-        )
-        df_tickets_filtrado = df_tickets[df_tickets['Sucursal'] == sucursal_seleccionada]
-    else:
-        st.sidebar.error("⚠️ No hay sucursales disponibles")
-        df_tickets_filtrado = df_tickets
-else:
-    st.sidebar.error("⚠️ No hay columna Sucursal")
-    df_tickets_filtrado = df_tickets
+sucursales = df_sucursales['Sucursal'].tolist()
+if len(sucursales) == 0:
+    st.sidebar.error("⚠️ No hay sucursales disponibles")
+    st.stop()
+
+sucursal_seleccionada = st.sidebar.selectbox(
+    "Sucursal",
+    sucursales,
+    index=0
+)
+rango_sucursal = df_sucursales.set_index('Sucursal').loc[sucursal_seleccionada]
 
 # Filtro por rango de fechas
-if 'Fecha' in df_tickets_filtrado.columns:
-    df_tickets_filtrado = df_tickets_filtrado.copy()
-    df_tickets_filtrado['Fecha_dt'] = pd.to_datetime(df_tickets_filtrado['Fecha'])
-    fecha_min = df_tickets_filtrado['Fecha_dt'].min().date()
-    fecha_max = df_tickets_filtrado['Fecha_dt'].max().date()
+if pd.notna(rango_sucursal['desde']):
+    fecha_min = rango_sucursal['desde'].date()
+    fecha_max = rango_sucursal['hasta'].date()
     
     st.sidebar.markdown("**Rango de Fechas**")
     col1, col2 = st.sidebar.columns(2)
@@ -138,15 +201,17 @@ if 'Fecha' in df_tickets_filtrado.columns:
             max_value=fecha_max
         )
     
-    # Aplicar filtro de fechas
-    df_tickets_filtrado = df_tickets_filtrado[
-        (df_tickets_filtrado['Fecha_dt'].dt.date >= fecha_desde) & 
-        (df_tickets_filtrado['Fecha_dt'].dt.date <= fecha_hasta)
-    ]
+    # El filtro de fechas se aplica al leer: solo se cargan las particiones del rango
+    df_tickets_filtrado = cargar_datos(sucursal_seleccionada, fecha_desde, fecha_hasta)
+    df_ventas_filtrado = cargar_ventas_diarias(sucursal_seleccionada, fecha_desde, fecha_hasta)
 else:
-    st.sidebar.warning("⚠️ No hay columna Fecha")
+    st.sidebar.warning("⚠️ No hay fechas para esta sucursal")
+    fecha_desde = fecha_hasta = None
+    df_tickets_filtrado = cargar_datos(sucursal_seleccionada)
+    df_ventas_filtrado = cargar_ventas_diarias(sucursal_seleccionada)
 
 # Filtro por turno (desplegable con opción Todos)
+turno_filtro = None
 if 'Turno' in df_tickets_filtrado.columns:
     turnos_disponibles = sorted(df_tickets_filtrado['Turno'].dropna().unique().tolist())
     if len(turnos_disponibles) > 0:
@@ -161,7 +226,9 @@ if 'Turno' in df_tickets_filtrado.columns:
         
         # Aplicar filtro de turnos solo si no es "Todos"
         if turno_seleccionado != "Todos":
+            turno_filtro = turno_seleccionado
             df_tickets_filtrado = df_tickets_filtrado[df_tickets_filtrado['Turno'] == turno_seleccionado]
+            df_ventas_filtrado = df_ventas_filtrado[df_ventas_filtrado['Turno'] == turno_seleccionado]
 
 # Última actualización (pequeño, debajo del filtro de turno)
 st.sidebar.markdown("---")
@@ -225,18 +292,13 @@ else:
 if menu_opcion == "Facturación":
     st.header("💰 Facturación")
     
-    # Calcular métricas del periodo
-    if 'Importe' in df_tickets_filtrado.columns and 'Cantidad' in df_tickets_filtrado.columns:
+    # Calcular métricas del periodo (desde ventas_diarias)
+    if not df_ventas_filtrado.empty:
         # Facturación total del periodo
-        df_temp_metricas = df_tickets_filtrado.copy()
-        df_temp_metricas['Importe_Total'] = df_temp_metricas['Cantidad'] * df_temp_metricas['Importe']
-        facturacion_total_periodo = df_temp_metricas['Importe_Total'].sum()
+        facturacion_total_periodo = df_ventas_filtrado['Facturacion'].sum()
         
         # Cantidad de días facturados (días con al menos una venta)
-        if 'Fecha' in df_tickets_filtrado.columns:
-            dias_facturados = df_tickets_filtrado['Fecha'].nunique()
-        else:
-            dias_facturados = 0
+        dias_facturados = df_ventas_filtrado['Fecha'].nunique()
         
         # Mostrar métricas
         col1, col2 = st.columns(2)
@@ -249,15 +311,11 @@ if menu_opcion == "Facturación":
     
     # Gráfico de barras: Facturación por día
     st.subheader("📊 Facturación Diaria")
-    if 'Fecha' in df_tickets_filtrado.columns and 'Importe' in df_tickets_filtrado.columns:
-        if 'Turno' in df_tickets_filtrado.columns:
-            # Calcular importe total (Cantidad * Importe unitario)
-            df_temp = df_tickets_filtrado.copy()
-            df_temp['Importe_Total'] = df_temp['Cantidad'] * df_temp['Importe']
-            # Facturación por día y turno (barras apiladas)
-            facturacion_diaria_turno = df_temp.groupby(['Fecha', 'Turno'])['Importe_Total'].sum().reset_index()
-            facturacion_diaria_turno = facturacion_diaria_turno.rename(columns={'Importe_Total': 'Importe'})
-            facturacion_diaria_turno['Fecha'] = pd.to_datetime(facturacion_diaria_turno['Fecha'])
+    if not df_ventas_filtrado.empty:
+        if df_ventas_filtrado['Turno'].notna().any():
+            # Facturación por día y turno (barras apiladas; ventas_diarias ya trae Cantidad * Importe sumado)
+            facturacion_diaria_turno = df_ventas_filtrado.dropna(subset=['Turno'])[['Fecha', 'Turno', 'Facturacion']]
+            facturacion_diaria_turno = facturacion_diaria_turno.rename(columns={'Facturacion': 'Importe'})
             facturacion_diaria_turno = facturacion_diaria_turno.sort_values('Fecha')
             
             # Crear rango completo de fechas (incluyendo días faltantes)
@@ -328,13 +386,9 @@ if menu_opcion == "Facturación":
                 textfont=dict(color='#1C2833', size=11, family='Arial', weight='bold')
             )
         else:
-            # Calcular importe total (Cantidad * Importe unitario)
-            df_temp = df_tickets_filtrado.copy()
-            df_temp['Importe_Total'] = df_temp['Cantidad'] * df_temp['Importe']
             # Facturación sin turno
-            facturacion_diaria = df_temp.groupby('Fecha')['Importe_Total'].sum().reset_index()
-            facturacion_diaria = facturacion_diaria.rename(columns={'Importe_Total': 'Importe'})
-            facturacion_diaria['Fecha'] = pd.to_datetime(facturacion_diaria['Fecha'])
+            facturacion_diaria = df_ventas_filtrado.groupby('Fecha')['Facturacion'].sum().reset_index()
+            facturacion_diaria = facturacion_diaria.rename(columns={'Facturacion': 'Importe'})
             facturacion_diaria = facturacion_diaria.sort_values('Fecha')
             
             # Crear rango completo de fechas (incluyendo días faltantes)
@@ -400,29 +454,8 @@ if menu_opcion == "Facturación":
     # Gráfico de torta: % de facturación por familia
     st.subheader("🥧 Facturación por Familia")
     if 'Código' in df_tickets_filtrado.columns and 'Importe' in df_tickets_filtrado.columns:
-        # Convertir columnas a string para el merge
-        df_tickets_temp = df_tickets_filtrado.copy()
-        df_consumos_temp = df_consumos.copy()
-        
-        # Limpiar y normalizar columnas
-        df_tickets_temp['Código'] = df_tickets_temp['Código'].astype(str).str.strip().str.upper()
-        df_tickets_temp['Sucursal'] = df_tickets_temp['Sucursal'].astype(str).str.strip().str.upper()
-        df_consumos_temp['Codigo'] = df_consumos_temp['Codigo'].astype(str).str.strip().str.upper()
-        df_consumos_temp['Sucursal'] = df_consumos_temp['Sucursal'].astype(str).str.strip().str.upper()
-        
-        # Eliminar duplicados en consumos (mismo Codigo+Sucursal, mantener el primero)
-        df_consumos_unique = df_consumos_temp.drop_duplicates(subset=['Codigo', 'Sucursal'], keep='first')
-        
-        # Hacer merge con consumos para obtener la familia (usando Código y Sucursal)
-        df_con_familia = df_tickets_temp.merge(
-            df_consumos_unique[['Codigo', 'Familia', 'Sucursal']],
-            left_on=['Código', 'Sucursal'],
-            right_on=['Codigo', 'Sucursal'],
-            how='left'
-        )
-        
         # Filtrar valores nulos en Familia antes de agrupar
-        df_con_familia = df_con_familia.dropna(subset=['Familia'])
+        df_con_familia = df_tickets_filtrado.dropna(subset=['Familia']).copy()
         
         # Calcular importe total (Cantidad * Importe unitario)
         df_con_familia['Importe_Total'] = df_con_familia['Cantidad'] * df_con_familia['Importe']
@@ -552,9 +585,7 @@ elif menu_opcion == "Buscador de Productos en Tickets":
                 
                 # Ordenar por fecha y hora
                 if 'Fecha' in df_tickets_completos.columns and 'Hora' in df_tickets_completos.columns:
-                    df_tickets_completos['Fecha_dt'] = pd.to_datetime(df_tickets_completos['Fecha'])
-                    df_tickets_completos['Hora_str'] = df_tickets_completos['Hora'].astype(str)
-                    df_tickets_completos = df_tickets_completos.sort_values(['Fecha_dt', 'Hora_str'], ascending=[False, False])
+                    df_tickets_completos = df_tickets_completos.sort_values(['Fecha', 'Hora'], ascending=[False, False])
                 
                 # Agrupar por ticket y mostrar
                 st.subheader("📋 Detalle de Tickets")
@@ -563,8 +594,11 @@ elif menu_opcion == "Buscador de Productos en Tickets":
                     df_ticket = df_tickets_completos[df_tickets_completos['Número'] == numero_ticket].copy()
                     
                     # Información del ticket
-                    fecha = df_ticket['Fecha'].iloc[0] if 'Fecha' in df_ticket.columns else "N/A"
-                    hora = df_ticket['Hora'].iloc[0] if 'Hora' in df_ticket.columns else "N/A"
+                    dia = df_ticket['Fecha'].iloc[0] if 'Fecha' in df_ticket.columns else None
+                    fecha = dia.strftime('%Y-%m-%d') if pd.notna(dia) else "N/A"
+                    # Hora se guarda como minuto del día
+                    minuto = df_ticket['Hora'].iloc[0] if 'Hora' in df_ticket.columns else None
+                    hora = f"{int(minuto) // 60:02d}:{int(minuto) % 60:02d}" if pd.notna(minuto) else "N/A"
                     turno = df_ticket['Turno'].iloc[0] if 'Turno' in df_ticket.columns else "N/A"
                     
                     # Calcular total del ticket
@@ -638,8 +672,9 @@ elif menu_opcion == "Productos mas vendidos":
     if 'Descripción' in df_tickets_filtrado.columns:
         
         if 'Cantidad' in df_tickets_filtrado.columns:
-            top_cantidad = df_tickets_filtrado.groupby('Descripción')['Cantidad'].sum().reset_index()
-            top_cantidad = top_cantidad.sort_values('Cantidad', ascending=False).head(cantidad_productos)
+            top_cantidad = cargar_top_productos(
+                sucursal_seleccionada, cantidad_productos, 'Cantidad', False, fecha_desde, fecha_hasta, turno_filtro
+            )[['Descripción', 'Cantidad']]
             
             col1, col2 = st.columns([2, 1])
             
@@ -678,8 +713,9 @@ elif menu_opcion == "Productos menos vendidos":
     if 'Descripción' in df_tickets_filtrado.columns:
         
         if 'Cantidad' in df_tickets_filtrado.columns:
-            bottom_cantidad = df_tickets_filtrado.groupby('Descripción')['Cantidad'].sum().reset_index()
-            bottom_cantidad = bottom_cantidad.sort_values('Cantidad', ascending=True).head(cantidad_productos)
+            bottom_cantidad = cargar_top_productos(
+                sucursal_seleccionada, cantidad_productos, 'Cantidad', True, fecha_desde, fecha_hasta, turno_filtro
+            )[['Descripción', 'Cantidad']]
             
             col1, col2 = st.columns([2, 1])
             
@@ -718,16 +754,11 @@ elif menu_opcion == "Productos mejor facturacion":
     if 'Descripción' in df_tickets_filtrado.columns:
         
         if 'Importe' in df_tickets_filtrado.columns and 'Cantidad' in df_tickets_filtrado.columns:
-            # Calcular importe total (Cantidad * Importe unitario)
-            df_temp = df_tickets_filtrado.copy()
-            df_temp['Importe_Total'] = df_temp['Cantidad'] * df_temp['Importe']
-            
-            top_facturacion = df_temp.groupby('Descripción').agg({
-                'Cantidad': 'sum',
-                'Importe_Total': 'sum'
-            }).reset_index()
-            top_facturacion = top_facturacion.rename(columns={'Importe_Total': 'Importe'})
-            top_facturacion = top_facturacion.sort_values('Importe', ascending=False).head(cantidad_productos)
+            # Facturación (Cantidad * Importe unitario) ya sumada por producto y día en producto_dia
+            top_facturacion = cargar_top_productos(
+                sucursal_seleccionada, cantidad_productos, 'Facturacion', False, fecha_desde, fecha_hasta, turno_filtro
+            )[['Descripción', 'Cantidad', 'Facturacion']]
+            top_facturacion = top_facturacion.rename(columns={'Facturacion': 'Importe'})
             
             col1, col2 = st.columns([2, 1])
             
@@ -766,16 +797,11 @@ elif menu_opcion == "Productos peor facturacion":
     if 'Descripción' in df_tickets_filtrado.columns:
         
         if 'Importe' in df_tickets_filtrado.columns and 'Cantidad' in df_tickets_filtrado.columns:
-            # Calcular importe total (Cantidad * Importe unitario)
-            df_temp = df_tickets_filtrado.copy()
-            df_temp['Importe_Total'] = df_temp['Cantidad'] * df_temp['Importe']
-            
-            bottom_facturacion = df_temp.groupby('Descripción').agg({
-                'Cantidad': 'sum',
-                'Importe_Total': 'sum'
-            }).reset_index()
-            bottom_facturacion = bottom_facturacion.rename(columns={'Importe_Total': 'Importe'})
-            bottom_facturacion = bottom_facturacion.sort_values('Importe', ascending=True).head(cantidad_productos)
+            # Facturación (Cantidad * Importe unitario) ya sumada por producto y día en producto_dia
+            bottom_facturacion = cargar_top_productos(
+                sucursal_seleccionada, cantidad_productos, 'Facturacion', True, fecha_desde, fecha_hasta, turno_filtro
+            )[['Descripción', 'Cantidad', 'Facturacion']]
+            bottom_facturacion = bottom_facturacion.rename(columns={'Facturacion': 'Importe'})
             
             col1, col2 = st.columns([2, 1])
             
@@ -804,7 +830,10 @@ elif menu_opcion == "Productos peor facturacion":
 elif menu_opcion == "Relaciones por producto":
     st.header("🎯 Relaciones por producto")
     
-    if 'Número' in df_tickets_filtrado.columns and 'Descripción' in df_tickets_filtrado.columns:
+    # Productos vendidos en el periodo (producto_dia, ordenados por cantidad)
+    df_productos = cargar_ranking_productos(sucursal_seleccionada, fecha_desde, fecha_hasta, turno_filtro)
+    
+    if len(df_productos) > 0:
         
         # Análisis por Producto
         st.subheader("🔍 Análisis de Combos por Producto")
@@ -817,12 +846,16 @@ elif menu_opcion == "Relaciones por producto":
             key="cantidad_combos_producto"
         )
         
-        productos_disponibles = sorted(df_tickets_filtrado['Descripción'].dropna().unique().tolist())
-        producto_seleccionado = st.selectbox(
+        # Productos por Código (se muestra la Descripción)
+        df_opciones = df_productos.dropna(subset=['Descripción']).sort_values('Descripción')
+        descripciones = dict(zip(df_opciones['Código'], df_opciones['Descripción']))
+        codigo_seleccionado = st.selectbox(
             "Selecciona un producto para ver con qué se vende",
-            productos_disponibles,
+            list(descripciones),
+            format_func=lambda codigo: descripciones[codigo],
             key="producto_combo"
         )
+        producto_seleccionado = descripciones.get(codigo_seleccionado)
         
         # Checkbox para omitir productos de la misma familia
         omitir_misma_familia = st.checkbox(
@@ -832,124 +865,47 @@ elif menu_opcion == "Relaciones por producto":
         )
         
         # Multiselect para omitir familias específicas
-        if 'Código' in df_tickets_filtrado.columns:
-            df_tickets_temp = df_tickets_filtrado.copy()
-            df_consumos_temp = df_consumos.copy()
-            df_tickets_temp['Código'] = df_tickets_temp['Código'].astype(str)
-            df_tickets_temp['Sucursal'] = df_tickets_temp['Sucursal'].astype(str)
-            df_consumos_temp['Codigo'] = df_consumos_temp['Codigo'].astype(str)
-            df_consumos_temp['Sucursal'] = df_consumos_temp['Sucursal'].astype(str)
-            
-            df_temp_familias = df_tickets_temp.merge(
-                df_consumos_temp[['Codigo', 'Familia', 'Sucursal']],
-                left_on=['Código', 'Sucursal'],
-                right_on=['Codigo', 'Sucursal'],
-                how='left'
-            )
-            familias_disponibles_filtro = sorted(df_temp_familias['Familia'].dropna().unique().tolist())
-            
-            familias_omitir = st.multiselect(
-                "Omitir productos de las siguientes familias",
-                familias_disponibles_filtro,
-                default=[],
-                key="familias_omitir"
-            )
-        else:
-            familias_omitir = []
+        familias_disponibles_filtro = sorted(df_productos['Familia'].dropna().unique().tolist())
+        
+        familias_omitir = st.multiselect(
+            "Omitir productos de las siguientes familias",
+            familias_disponibles_filtro,
+            default=[],
+            key="familias_omitir"
+        )
         
         if producto_seleccionado:
-            # Encontrar todos los tickets que contienen el producto seleccionado
-            tickets_con_producto = df_tickets_filtrado[
-                df_tickets_filtrado['Descripción'] == producto_seleccionado
-            ]['Número'].unique()
-            
-            # Calcular cuántos tickets tienen SOLO este producto (solo en el ticket)
-            tickets_solo = 0
-            for ticket_num in tickets_con_producto:
-                productos_en_ticket = df_tickets_filtrado[
-                    df_tickets_filtrado['Número'] == ticket_num
-                ]['Descripción'].nunique()
-                if productos_en_ticket == 1:
-                    tickets_solo += 1
+            # Tickets del producto y productos vendidos en esos tickets (pares_dia, sin recorrer las líneas)
+            df_combos, tickets_con_producto = cargar_relaciones(
+                sucursal_seleccionada, codigo_seleccionado, fecha_desde, fecha_hasta, turno_filtro
+            )
             
             # Mostrar métrica de tickets solo
             col_metric1, col_metric2 = st.columns(2)
             with col_metric1:
-                st.metric("Total de tickets con este producto", len(tickets_con_producto))
+                st.metric("Total de tickets con este producto", tickets_con_producto['tickets'])
             with col_metric2:
-                st.metric("Solo en el ticket", tickets_solo)
+                st.metric("Solo en el ticket", tickets_con_producto['solo'])
             
             st.markdown("---")
             
-            # Obtener todos los productos en esos tickets (excepto el producto seleccionado)
-            df_combos = df_tickets_filtrado[
-                (df_tickets_filtrado['Número'].isin(tickets_con_producto)) &
-                (df_tickets_filtrado['Descripción'] != producto_seleccionado)
-            ].copy()
-            
             # Si el checkbox está marcado, filtrar por familia
-            if omitir_misma_familia and 'Código' in df_tickets_filtrado.columns:
-                # Merge para obtener familia del producto seleccionado
-                df_tickets_temp = df_tickets_filtrado[df_tickets_filtrado['Descripción'] == producto_seleccionado].copy()
-                df_consumos_temp = df_consumos.copy()
-                df_tickets_temp['Código'] = df_tickets_temp['Código'].astype(str)
-                df_tickets_temp['Sucursal'] = df_tickets_temp['Sucursal'].astype(str)
-                df_consumos_temp['Codigo'] = df_consumos_temp['Codigo'].astype(str)
-                df_consumos_temp['Sucursal'] = df_consumos_temp['Sucursal'].astype(str)
-                
-                df_temp = df_tickets_temp.merge(
-                    df_consumos_temp[['Codigo', 'Familia', 'Sucursal']],
-                    left_on=['Código', 'Sucursal'],
-                    right_on=['Codigo', 'Sucursal'],
-                    how='left'
-                )
+            if omitir_misma_familia:
+                # Familia del producto seleccionado
+                familia_producto = df_productos.loc[df_productos['Código'] == codigo_seleccionado, 'Familia'].iloc[0]
                 
-                if len(df_temp) > 0 and 'Familia' in df_temp.columns:
-                    familia_producto = df_temp['Familia'].iloc[0]
-                    
-                    # Merge para obtener familia de los combos
-                    df_combos_temp = df_combos.copy()
-                    df_consumos_temp2 = df_consumos.copy()
-                    df_combos_temp['Código'] = df_combos_temp['Código'].astype(str)
-                    df_combos_temp['Sucursal'] = df_combos_temp['Sucursal'].astype(str)
-                    df_consumos_temp2['Codigo'] = df_consumos_temp2['Codigo'].astype(str)
-                    df_consumos_temp2['Sucursal'] = df_consumos_temp2['Sucursal'].astype(str)
-                    
-                    df_combos = df_combos_temp.merge(
-                        df_consumos_temp2[['Codigo', 'Familia', 'Sucursal']],
-                        left_on=['Código', 'Sucursal'],
-                        right_on=['Codigo', 'Sucursal'],
-                        how='left'
-                    )
-                    
-                    # Filtrar productos de diferente familia
-                    df_combos = df_combos[df_combos['Familia'] != familia_producto]
+                # Filtrar productos de diferente familia
+                df_combos = df_combos[df_combos['Familia'] != familia_producto]
             
             # Aplicar filtro de familias a omitir
-            if len(familias_omitir) > 0 and 'Código' in df_tickets_filtrado.columns:
-                # Si aún no se hizo merge, hacerlo ahora
-                if 'Familia' not in df_combos.columns:
-                    df_combos_temp = df_combos.copy()
-                    df_consumos_temp3 = df_consumos.copy()
-                    df_combos_temp['Código'] = df_combos_temp['Código'].astype(str)
-                    df_combos_temp['Sucursal'] = df_combos_temp['Sucursal'].astype(str)
-                    df_consumos_temp3['Codigo'] = df_consumos_temp3['Codigo'].astype(str)
-                    df_consumos_temp3['Sucursal'] = df_consumos_temp3['Sucursal'].astype(str)
-                    
-                    df_combos = df_combos_temp.merge(
-                        df_consumos_temp3[['Codigo', 'Familia', 'Sucursal']],
-                        left_on=['Código', 'Sucursal'],
-                        right_on=['Codigo', 'Sucursal'],
-                        how='left'
-                    )
-                
+            if len(familias_omitir) > 0:
                 # Filtrar productos que NO estén en las familias a omitir
                 df_combos = df_combos[~df_combos['Familia'].isin(familias_omitir)]
             
             if len(df_combos) > 0:
-                # Contar frecuencia de cada producto
-                combos_frecuencia = df_combos.groupby('Descripción').size().reset_index(name='Veces')
-                combos_frecuencia = combos_frecuencia.sort_values('Veces', ascending=False).head(cantidad_combos_producto)
+                # Tickets en los que se vende cada producto junto al seleccionado (ya ordenado)
+                combos_frecuencia = df_combos[['Descripción', 'Tickets']].rename(columns={'Tickets': 'Veces'})
+                combos_frecuencia = combos_frecuencia.head(cantidad_combos_producto)
                 
                 col1, col2 = st.columns([2, 1])
                 
@@ -974,13 +930,16 @@ elif menu_opcion == "Relaciones por producto":
             else:
                 st.info(f"No se encontraron combinaciones para '{producto_seleccionado}'")
     else:
-        st.warning("⚠️ Faltan columnas necesarias para análisis de combos")
+        st.warning("⚠️ No hay productos vendidos en el periodo seleccionado")
 
 # ========== VISTA: RELACIONES POR FAMILIA ==========
 elif menu_opcion == "Relaciones por familia":
     st.header("📊 Relaciones por familia")
     
-    if 'Número' in df_tickets_filtrado.columns and 'Descripción' in df_tickets_filtrado.columns:
+    # Productos vendidos en el periodo (producto_dia, ordenados por cantidad)
+    df_productos = cargar_ranking_productos(sucursal_seleccionada, fecha_desde, fecha_hasta, turno_filtro)
+    
+    if len(df_productos) > 0:
         
         # Análisis por Familia
         st.subheader("📊 Análisis de Combos por Familia")
@@ -993,110 +952,71 @@ elif menu_opcion == "Relaciones por familia":
             key="cantidad_combos_familia"
         )
         
-        if 'Código' in df_tickets_filtrado.columns:
-            # Hacer merge con consumos para obtener familia (usando Código y Sucursal)
-            df_tickets_temp = df_tickets_filtrado.copy()
-            df_consumos_temp = df_consumos.copy()
-            df_tickets_temp['Código'] = df_tickets_temp['Código'].astype(str)
-            df_tickets_temp['Sucursal'] = df_tickets_temp['Sucursal'].astype(str)
-            df_consumos_temp['Codigo'] = df_consumos_temp['Codigo'].astype(str)
-            df_consumos_temp['Sucursal'] = df_consumos_temp['Sucursal'].astype(str)
+        # La Familia viene de dim_producto
+        familias_disponibles = sorted(df_productos['Familia'].dropna().unique().tolist())
+        familia_combo_seleccionada = st.selectbox(
+            "Selecciona una familia para análisis de combos",
+            familias_disponibles,
+            key="familia_combo"
+        )
+        
+        if familia_combo_seleccionada:
+            # Top 5 más vendidos de la familia (el ranking ya viene ordenado por cantidad)
+            top5_familia_combo = df_productos[df_productos['Familia'] == familia_combo_seleccionada].head(5)
             
-            df_con_familia = df_tickets_temp.merge(
-                df_consumos_temp[['Codigo', 'Familia', 'Sucursal']],
-                left_on=['Código', 'Sucursal'],
-                right_on=['Codigo', 'Sucursal'],
-                how='left'
-            )
+            st.write(f"**Top 5 Productos de {familia_combo_seleccionada}:**")
+            for producto in top5_familia_combo['Descripción'].tolist():
+                st.write(f"• {producto}")
             
-            familias_disponibles = sorted(df_con_familia['Familia'].dropna().unique().tolist())
-            familia_combo_seleccionada = st.selectbox(
-                "Selecciona una familia para análisis de combos",
-                familias_disponibles,
-                key="familia_combo"
-            )
+            st.markdown("---")
             
-            if familia_combo_seleccionada:
-                # Obtener productos de la familia seleccionada
-                df_familia_combo = df_con_familia[df_con_familia['Familia'] == familia_combo_seleccionada]
-                
-                # Encontrar top 5 más vendidos de la familia
-                top5_familia_combo = df_familia_combo.groupby('Descripción')['Cantidad'].sum().reset_index()
-                top5_familia_combo = top5_familia_combo.sort_values('Cantidad', ascending=False).head(5)
-                
-                st.write(f"**Top 5 Productos de {familia_combo_seleccionada}:**")
-                for producto in top5_familia_combo['Descripción'].tolist():
-                    st.write(f"• {producto}")
-                
-                st.markdown("---")
-                
-                # Analizar combinaciones para cada producto del top 5
-                st.write(f"**Combinaciones de los Top 5 de {familia_combo_seleccionada}:**")
-                
-                for producto in top5_familia_combo['Descripción'].tolist():
-                    with st.expander(f"🔗 Combinaciones de: {producto}"):
-                        # Encontrar tickets con este producto
-                        tickets_producto = df_con_familia[
-                            df_con_familia['Descripción'] == producto
-                        ]['Número'].unique()
+            # Analizar combinaciones para cada producto del top 5
+            st.write(f"**Combinaciones de los Top 5 de {familia_combo_seleccionada}:**")
+            
+            for codigo, producto in zip(top5_familia_combo['Código'], top5_familia_combo['Descripción']):
+                with st.expander(f"🔗 Combinaciones de: {producto}"):
+                    # Productos que aparecen en los tickets del producto (pares_dia)
+                    df_combos_familia, _ = cargar_relaciones(
+                        sucursal_seleccionada, codigo, fecha_desde, fecha_hasta, turno_filtro
+                    )
+                    
+                    if len(df_combos_familia) > 0:
+                        # Contar por producto (sin importar la familia)
+                        combos_por_producto = df_combos_familia[['Descripción', 'Tickets']].rename(columns={'Tickets': 'Veces'})
+                        combos_por_producto = combos_por_producto.head(cantidad_combos_familia)
                         
-                        # Productos que aparecen en esos tickets (excepto el producto actual)
-                        df_combos_familia = df_con_familia[
-                            (df_con_familia['Número'].isin(tickets_producto)) &
-                            (df_con_familia['Descripción'] != producto)
-                        ]
+                        col1, col2 = st.columns([2, 1])
                         
-                        if len(df_combos_familia) > 0:
-                            # Contar por producto (sin importar la familia)
-                            combos_por_producto = df_combos_familia.groupby('Descripción').size().reset_index(name='Veces')
-                            combos_por_producto = combos_por_producto.sort_values('Veces', ascending=False).head(cantidad_combos_familia)
-                            
-                            col1, col2 = st.columns([2, 1])
-                            
-                            with col1:
-                                fig = px.bar(
-                                    combos_por_producto,
-                                    x='Veces',
-                                    y='Descripción',
-                                    orientation='h',
-                                    title=f'Productos que se Combinan con {producto}',
-                                    color='Veces',
-                                    color_continuous_scale='Purp'
-                                )
-                                st.plotly_chart(fig, use_container_width=True)
-                            
-                            with col2:
-                                st.dataframe(
-                                    combos_por_producto.rename(columns={'Veces': 'Veces Juntos'}),
-                                    use_container_width=True,
-                                    hide_index=True
-                                )
-                        else:
-                            st.info("No se encontraron combinaciones")
-        else:
-            st.warning("⚠️ No hay datos de código para vincular con familias")
+                        with col1:
+                            fig = px.bar(
+                                combos_por_producto,
+                                x='Veces',
+                                y='Descripción',
+                                orientation='h',
+                                title=f'Productos que se Combinan con {producto}',
+                                color='Veces',
+                                color_continuous_scale='Purp'
+                            )
+                            st.plotly_chart(fig, use_container_width=True)
+                        
+                        with col2:
+                            st.dataframe(
+                                combos_por_producto.rename(columns={'Veces': 'Veces Juntos'}),
+                                use_container_width=True,
+                                hide_index=True
+                            )
+                    else:
+                        st.info("No se encontraron combinaciones")
     else:
-        st.warning("⚠️ Faltan columnas necesarias para análisis de combos")
+        st.warning("⚠️ No hay productos vendidos en el periodo seleccionado")
 
 # ========== VISTA: ANÁLISIS POR FAMILIA ==========
 elif menu_opcion == "Análisis por Familia":
     st.header("📊 Análisis por Familia")
     
     if 'Código' in df_tickets_filtrado.columns and 'Importe' in df_tickets_filtrado.columns:
-        # Hacer merge con consumos para obtener la familia (usando Código y Sucursal)
-        df_tickets_temp = df_tickets_filtrado.copy()
-        df_consumos_temp = df_consumos.copy()
-        df_tickets_temp['Código'] = df_tickets_temp['Código'].astype(str)
-        df_tickets_temp['Sucursal'] = df_tickets_temp['Sucursal'].astype(str)
-        df_consumos_temp['Codigo'] = df_consumos_temp['Codigo'].astype(str)
-        df_consumos_temp['Sucursal'] = df_consumos_temp['Sucursal'].astype(str)
-        
-        df_con_familia = df_tickets_temp.merge(
-            df_consumos_temp[['Codigo', 'Familia', 'Articulo', 'Sucursal']],
-            left_on=['Código', 'Sucursal'],
-            right_on=['Codigo', 'Sucursal'],
-            how='left'
-        )
+        # La Familia viene de dim_producto (vista tickets_detalle)
+        df_con_familia = df_tickets_filtrado.copy()
         
         # Gráfico de torta: % de facturación por familia (fijo)
         st.subheader("💰 Distribución de Facturación por Familia")
@@ -1254,15 +1174,11 @@ elif menu_opcion == "Ranking de productos":
     st.header("🏆 Ranking de productos")
     
     if 'Descripción' in df_tickets_filtrado.columns and 'Cantidad' in df_tickets_filtrado.columns and 'Importe' in df_tickets_filtrado.columns:
-        # Calcular importe total por producto
-        df_temp = df_tickets_filtrado.copy()
-        df_temp['Importe_Total'] = df_temp['Cantidad'] * df_temp['Importe']
-        
-        # Agrupar por producto
-        ranking_productos = df_temp.groupby('Descripción').agg({
-            'Cantidad': 'sum',
-            'Importe_Total': 'sum'
-        }).reset_index()
+        # Cantidad e importe total por producto (producto_dia, sin recorrer las líneas)
+        ranking_productos = cargar_ranking_productos(
+            sucursal_seleccionada, fecha_desde, fecha_hasta, turno_filtro
+        )[['Descripción', 'Cantidad', 'Facturacion']]
+        ranking_productos = ranking_productos.rename(columns={'Facturacion': 'Importe_Total'})
         
         # Calcular porcentaje de facturación
         facturacion_total_periodo = ranking_productos['Importe_Total'].sum()
@@ -1341,20 +1257,8 @@ elif menu_opcion == "Creación de Combos":
     if 'Código' in df_tickets_filtrado.columns and 'Descripción' in df_tickets_filtrado.columns:
         st.write("Selecciona una o más familias para ver los productos más y menos vendidos de cada una.")
         
-        # Hacer merge con consumos para obtener familias
-        df_tickets_temp = df_tickets_filtrado.copy()
-        df_consumos_temp = df_consumos.copy()
-        df_tickets_temp['Código'] = df_tickets_temp['Código'].astype(str).str.strip().str.upper()
-        df_tickets_temp['Sucursal'] = df_tickets_temp['Sucursal'].astype(str).str.strip().str.upper()
-        df_consumos_temp['Codigo'] = df_consumos_temp['Codigo'].astype(str).str.strip().str.upper()
-        df_consumos_temp['Sucursal'] = df_consumos_temp['Sucursal'].astype(str).str.strip().str.upper()
-        
-        df_con_familia = df_tickets_temp.merge(
-            df_consumos_temp[['Codigo', 'Familia', 'Sucursal']],
-            left_on=['Código', 'Sucursal'],
-            right_on=['Codigo', 'Sucursal'],
-            how='left'
-        )
+        # La Familia viene de dim_producto (vista tickets_detalle)
+        df_con_familia = df_tickets_filtrado.copy()
         
         # Obtener lista de familias disponibles
         familias_disponibles = sorted(df_con_familia['Familia'].dropna().unique().tolist())
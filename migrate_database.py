@@ -0,0 +1,68 @@
+"""
+DATAKINGA - Migración del esquema de la base de datos
+======================================================
+Aplica las migraciones pendientes (FunctionsGrouping/migration_functions.py)
+sobre la base existente, sin perder datos: reescribe las tablas con tipos
+definidos y restricciones CHECK y registra cada versión en schema_migrations.
+
+Uso:
+    python migrate_database.py                      # DataBase/datakinga.db
+    python migrate_database.py ruta/a/otra.db       # Otra base
+    python migrate_database.py --estado             # Solo muestra la versión y las pendientes
+"""
+
+import sys
+from pathlib import Path
+
+from FunctionsGrouping.connection_functions import conectar, checkpoint, DB_PATH
+from FunctionsGrouping.migration_functions import migrar, migraciones_pendientes, version_actual, MIGRACIONES
+
+if __name__ == "__main__":
+    solo_estado = '--estado' in sys.argv[1:]
+    rutas = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    db_path = Path(rutas[0]) if rutas else DB_PATH
+    
+    print("=" * 70)
+    print("MIGRACIÓN DEL ESQUEMA")
+    print("=" * 70)
+    print(f"\n📁 Base de datos: {db_path}")
+    
+    if not db_path.exists():
+        print(f"\n⚠️ No existe la base de datos {db_path}")
+        sys.exit(1)
+    
+    conn = conectar(db_path)
+    
+    try:
+        pendientes = migraciones_pendientes(conn)
+        print(f"\n📌 Versión actual: {version_actual(conn)} (última disponible: {MIGRACIONES[-1][0]})")
+        
+        if not pendientes:
+            print("✅ El esquema está al día")
+        elif solo_estado:
+            print("\n⏳ Migraciones pendientes:")
+            for version, nombre, _ in pendientes:
+                print(f"   • {version:03d} {nombre}")
+        else:
+            print(f"\n🔧 Aplicando {len(pendientes)} migraciones...")
+            migrar(conn)
+            
+            # Reescribir las tablas deja páginas libres: se compacta el archivo
+            conn.execute("VACUUM")
+            checkpoint(conn)
+            print(f"\n✅ Esquema en versión {version_actual(conn)}")
+        
+        print("\n📊 Historial:")
+        for version, nombre, aplicada in conn.execute(
+            "SELECT version, nombre, aplicada FROM schema_migrations ORDER BY version"
+        ):
+            print(f"   {version:03d} {nombre:<28} {aplicada}")
+    
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    
+    finally:
+        conn.close()
@@ -2,13 +2,28 @@
 DATAKINGA - ACTUALIZACIÓN DIARIA AUTOMÁTICA
 ============================================
 Este script ejecuta el proceso completo de extracción y actualización de datos:
-1. Extrae datos de Datakinga (main.py)
-2. Actualiza la base de datos de forma incremental (main_database_incremental.py)
+1. Extrae datos de Datakinga (pipeline_functions.extraer, lo mismo que main.py)
+2. Actualiza la base de datos de forma incremental (ingestion_functions.ingestar,
+   lo mismo que main_database_incremental.py)
+
+Los dos pasos corren en el mismo proceso (pipeline_functions.actualizar): sin
+lanzar los scripts como subprocesos y pasando a la ingesta los DataFrames que
+la extracción ya leyó, en lugar de volver a leer los archivos del disco.
 
 Puede ejecutarse de dos formas:
 - Manual: python run_daily_update.py
 - Automática: python run_daily_update.py --schedule
   (se ejecutará en los horarios configurados en .env)
+
+Motor de extracción: --motor=http (por defecto) o --motor=selenium
+(también configurable con MOTOR_EXTRACCION en .env)
+
+Si el manifiesto de extracción (DataBase/extraction_manifest.json) tiene
+unidades fallidas, se reintentan solo esas antes de la ingesta.
+
+En modo programado la actualización la hace un worker residente
+(FunctionsGrouping/worker_functions.py) que queda vivo entre horarios con los
+módulos cargados y la sesión ya autenticada.
 """
 
 import subprocess
@@ -20,6 +35,10 @@ from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv, set_key
 
+from FunctionsGrouping.connection_functions import conectar
+from FunctionsGrouping.pipeline_functions import actualizar
+from FunctionsGrouping.worker_functions import TrabajadorResidente
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -29,6 +48,9 @@ ENV_FILE = Path(".env")
 # Archivo de log
 LOG_FILE = Path("DataBase") / "execution_log.txt"
 
+# Motor de extracción (http o selenium)
+MOTOR_EXTRACCION = os.getenv('MOTOR_EXTRACCION', 'http').lower()
+
 def log_execution(message, execution_type="MANUAL"):
     """Registra la ejecución en el archivo de log"""
     timestamp = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
@@ -130,30 +152,42 @@ def print_header(text):
     print(text.center(70))
     print("=" * 70 + "\n")
 
-def run_script(script_name, description):
-    """Ejecuta un script de Python y retorna el código de salida"""
-    print_header(f"PASO: {description}")
-    print(f"⏳ Ejecutando {script_name}...\n")
+def run_update(execution_type="MANUAL", trabajador=None):
+    """
+    Extrae, reintenta las unidades fallidas e ingesta en un solo proceso
+    (el actual o el worker residente). Retorna True si la base se actualizó.
+    """
+    print_header("PASO: EXTRACCIÓN Y ACTUALIZACIÓN DE BASE DE DATOS")
     
-    try:
-        # Ejecutar el script
-        result = subprocess.run(
-            [sys.executable, script_name],
-            check=True,
-            capture_output=False,
-            text=True
-        )
-        
-        print(f"\n✅ {description} completado exitosamente")
-        return True
-        
-    except subprocess.CalledProcessError as e:
-        print(f"\n❌ ERROR en {description}")
-        print(f"   Código de salida: {e.returncode}")
-        return False
-    except Exception as e:
-        print(f"\n❌ ERROR inesperado en {description}: {str(e)}")
-        return False
+    if trabajador is not None:
+        print("⏳ Ejecutando en el worker residente...\n")
+        resultado = trabajador.enviar({'tipo': 'actualizacion'})
+        if resultado['error']:
+            print(f"\n❌ ERROR en la actualización: {resultado['error']}")
+            return False
+        fallidas = resultado['fallidas']
+        ingesta = resultado['ingesta']
+    else:
+        conn = conectar()
+        try:
+            resultado = actualizar(conn, MOTOR_EXTRACCION)
+        except Exception as e:
+            conn.rollback()
+            print(f"\n❌ ERROR en la actualización: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+        finally:
+            conn.close()
+        fallidas = resultado['extraccion']['fallidas']
+        ingesta = resultado['ingesta']
+    
+    if fallidas:
+        log_execution("Advertencia: Quedaron unidades fallidas (ver extraction_manifest.json)", execution_type)
+    
+    print(f"\n✅ Base de datos actualizada: {ingesta['detalle']['insertados']} líneas de ticket nuevas, "
+          f"{ingesta['consumos']['insertados']} productos nuevos, {ingesta['turnos']} turnos asignados")
+    return True
 
 def main():
     """Función principal que orquesta todo el proceso"""
@@ -164,18 +198,11 @@ def main():
     
     log_execution("Iniciando proceso de actualización", "MANUAL")
     
-    # Paso 1: Extraer datos
-    if not run_script("main.py", "EXTRACCIÓN DE DATOS"):
-        print("\n⚠️ Proceso detenido debido a errores en la extracción")
-        save_last_run(success=False)
-        log_execution("ERROR: Fallo en extracción de datos", "MANUAL")
-        return False
-    
-    # Paso 2: Actualizar base de datos
-    if not run_script("main_database_incremental.py", "ACTUALIZACIÓN DE BASE DE DATOS"):
+    # Pasos 1 y 2: extraer y actualizar la base de datos (mismo proceso)
+    if not run_update("MANUAL"):
         print("\n⚠️ Proceso detenido debido a errores en la actualización")
         save_last_run(success=False)
-        log_execution("ERROR: Fallo en actualización de base de datos", "MANUAL")
+        log_execution("ERROR: Fallo en extracción o actualización de base de datos", "MANUAL")
         return False
     
     # Resumen final
@@ -202,7 +229,7 @@ def main():
     
     return True
 
-def run_scheduled():
+def run_scheduled(trabajador=None):
     """Ejecuta el proceso completo y registra en log"""
     print(f"\n{'='*70}")
     print(f"🔔 EJECUCIÓN PROGRAMADA - {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
@@ -212,7 +239,7 @@ def run_scheduled():
     inicio = datetime.now()
     
     # Ejecutar main
-    success = main_without_log()
+    success = main_without_log(trabajador)
     
     fin = datetime.now()
     duracion = fin - inicio
@@ -225,21 +252,15 @@ def run_scheduled():
     
     return success
 
-def main_without_log():
+def main_without_log(trabajador=None):
     """Versión de main sin logging redundante para ejecuciones programadas"""
     inicio = datetime.now()
     
     print_header("DATAKINGA - ACTUALIZACIÓN DIARIA AUTOMÁTICA")
     print(f"🕐 Inicio: {inicio.strftime('%d/%m/%Y %H:%M:%S')}\n")
     
-    # Paso 1: Extraer datos
-    if not run_script("main.py", "EXTRACCIÓN DE DATOS"):
-        print("\n⚠️ Proceso detenido debido a errores en la extracción")
-        save_last_run(success=False)
-        return False
-    
-    # Paso 2: Actualizar base de datos
-    if not run_script("main_database_incremental.py", "ACTUALIZACIÓN DE BASE DE DATOS"):
+    # Pasos 1 y 2: extraer y actualizar la base de datos (worker residente si existe, si no este proceso)
+    if not run_update("SCHEDULED", trabajador):
         print("\n⚠️ Proceso detenido debido a errores en la actualización")
         save_last_run(success=False)
         return False
@@ -285,10 +306,14 @@ def setup_schedule():
     # Registrar inicio del scheduler
     log_execution(f"Scheduler iniciado - Horarios: {time_1}, {time_2}, {time_3}", "SYSTEM")
     
+    # Worker residente: queda vivo entre ejecuciones (imports, sesión y navegador en caliente)
+    trabajador = TrabajadorResidente(MOTOR_EXTRACCION)
+    trabajador.iniciar()
+    
     # Programar las 3 ejecuciones diarias
-    schedule.every().day.at(time_1).do(run_scheduled)
-    schedule.every().day.at(time_2).do(run_scheduled)
-    schedule.every().day.at(time_3).do(run_scheduled)
+    schedule.every().day.at(time_1).do(run_scheduled, trabajador)
+    schedule.every().day.at(time_2).do(run_scheduled, trabajador)
+    schedule.every().day.at(time_3).do(run_scheduled, trabajador)
     
     print(f"\n✅ Programación configurada exitosamente")
     print(f"⏳ Esperando siguiente ejecución...\n")
@@ -302,10 +327,17 @@ def setup_schedule():
         log_execution("Scheduler detenido por el usuario", "SYSTEM")
         print("\n\n⚠️ Programación detenida por el usuario")
         print("=" * 70 + "\n")
+    finally:
+        trabajador.detener()
 
 if __name__ == "__main__":
+    # Motor de extracción elegido por línea de comandos
+    for arg in sys.argv[1:]:
+        if arg.startswith('--motor='):
+            MOTOR_EXTRACCION = arg.split('=', 1)[1].lower()
+    
     # Verificar si se ejecuta en modo programado
-    if len(sys.argv) > 1 and sys.argv[1] == "--schedule":
+    if "--schedule" in sys.argv[1:]:
         setup_schedule()
     else:
         # Ejecución manual única
@@ -0,0 +1,55 @@
+"""
+Fixtures compartidas de los tests
+
+Cada test trabaja sobre una base SQLite nueva en una carpeta temporal, con el
+esquema migrado a la última versión (igual que la ingesta).
+"""
+from pathlib import Path
+import sys
+
+import pandas as pd
+import pytest
+
+# Los tests importan FunctionsGrouping desde la raíz del repositorio
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from FunctionsGrouping.connection_functions import conectar
+from FunctionsGrouping.database_functions import (
+    tipar_tickets, numerar_lineas, separar_fecha_hora, asegurar_registro_ingesta
+)
+from FunctionsGrouping.migration_functions import migrar
+
+COLUMNAS_DETALLE = [
+    'Número', 'Tipo', 'F. Cierre', 'Mesa', 'Mozo', 'Nombre', 'Código', 'Descripción', 'Cantidad', 'Importe',
+]
+
+
+@pytest.fixture
+def conn(tmp_path):
+    """Conexión a una base vacía migrada a la última versión"""
+    conexion = conectar(tmp_path / 'datakinga.db')
+    migrar(conexion, verbose=False)
+    asegurar_registro_ingesta(conexion)
+    yield conexion
+    conexion.close()
+
+
+def detalle(filas):
+    """
+    DataFrame como lo entrega el lector de Ticket con Detalle.
+    
+    Args:
+        filas: tuplas (Número, 'YYYY-MM-DD HH:MM', Código, Descripción, Cantidad, Importe)
+    """
+    return pd.DataFrame(
+        [(numero, None, pd.Timestamp(cierre), 1, 1, 'MOZO', codigo, descripcion, cantidad, importe)
+         for numero, cierre, codigo, descripcion, cantidad, importe in filas],
+        columns=COLUMNAS_DETALLE,
+    )
+
+
+def preparar_detalle(df, sucursal):
+    """Mismos pasos que ingestar_detalle antes de insertar (tipos, Linea, Fecha y Hora)"""
+    df = df.assign(Sucursal=sucursal)
+    df = numerar_lineas(tipar_tickets(df))
+    return separar_fecha_hora(df, 'F. Cierre')
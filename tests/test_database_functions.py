@@ -0,0 +1,145 @@
+"""
+Carga de tickets: clave por línea, reingesta, ventanas solapadas y resúmenes diarios
+"""
+import pandas as pd
+
+from FunctionsGrouping.database_functions import (
+    insertar_tickets_nuevos, actualizar_resumenes_diarios, preparar_cinta, upsert_cinta, asignar_turnos
+)
+from FunctionsGrouping.ingestion_functions import ingestar_detalle
+
+from conftest import detalle, preparar_detalle
+
+DIA = pd.Timestamp('2026-01-02')
+NUMERO_DIA = (DIA - pd.Timestamp('1970-01-01')).days
+
+
+def contar(conn, tabla):
+    return conn.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+
+
+def test_mismo_producto_dos_veces_en_un_ticket(conn):
+    df = preparar_detalle(detalle([
+        (100, '2026-01-02 09:00', 5, 'CAFE', 1, 5400),
+        (100, '2026-01-02 09:00', 5, 'CAFE', 1, 5400),
+        (100, '2026-01-02 09:00', 7, 'MEDIALUNA', 2, 1500),
+    ]), 'PASADENA')
+    
+    assert df['Linea'].tolist() == [1, 2, 1]
+    assert insertar_tickets_nuevos(conn, df) == {'PASADENA': 3}
+    actualizar_resumenes_diarios(conn)
+    
+    # Las dos líneas del mismo producto suman en producto_dia
+    cafe = conn.execute("""
+        SELECT d.Cantidad, d.Lineas FROM producto_dia d
+        JOIN dim_producto p ON p.id = d.producto_id WHERE p."Código" = 5
+    """).fetchone()
+    assert cafe == (2.0, 2)
+    
+    # ...pero el ticket cuenta una vez por producto
+    tickets = conn.execute("""
+        SELECT t.Tickets FROM producto_tickets_dia t
+        JOIN dim_producto p ON p.id = t.producto_id WHERE p."Código" = 5
+    """).fetchone()
+    assert tickets == (1,)
+    assert conn.execute("SELECT Tickets FROM pares_dia").fetchall() == [(1,)]
+
+
+def test_reinsertar_las_mismas_lineas_no_agrega_nada(conn):
+    df = preparar_detalle(detalle([
+        (100, '2026-01-02 09:00', 5, 'CAFE', 1, 5400),
+        (100, '2026-01-02 09:00', 5, 'CAFE', 1, 5400),
+        (101, '2026-01-02 09:10', 7, 'MEDIALUNA', 1, 1500),
+    ]), 'PASADENA')
+    
+    insertar_tickets_nuevos(conn, df)
+    assert insertar_tickets_nuevos(conn, df.copy()) == {}
+    assert contar(conn, 'fact_tickets') == 3
+
+
+def test_reingestar_el_mismo_archivo_no_agrega_nada(conn, tmp_path, monkeypatch):
+    monkeypatch.setenv('MAX_WORKERS_PARSEO', '1')
+    df = detalle([
+        (100, '2026-01-02 09:00', 5, 'CAFE', 1, 5400),
+        (100, '2026-01-02 09:00', 5, 'CAFE', 1, 5400),
+        (101, '2026-01-02 09:10', 7, 'MEDIALUNA', 1, 1500),
+    ])
+    archivo = tmp_path / 'PASADENA_02_01_2026.xlsx'
+    df.to_excel(archivo, index=False)
+    
+    assert ingestar_detalle(conn, [str(archivo)])['insertados'] == 3
+    
+    # Mismo archivo: se omite por su hash sin leerlo
+    assert ingestar_detalle(conn, [str(archivo)])['archivos'] == 0
+    
+    # Mismo contenido exportado de nuevo con un título arriba (otro hash): la clave por línea descarta todo
+    reexportado = tmp_path / 'PASADENA_03_01_2026.xlsx'
+    filas = [['Ticket con Detalle'] + [None] * 9, list(df.columns)] + df.values.tolist()
+    pd.DataFrame(filas).to_excel(reexportado, index=False, header=False)
+    resumen = ingestar_detalle(conn, [str(reexportado)])
+    assert resumen['leidos'] == 3
+    assert resumen['insertados'] == 0
+    assert contar(conn, 'fact_tickets') == 3
+
+
+def test_ventanas_solapadas(conn):
+    # Ventana 1: días 1 y 2; ventana 2: días 2 y 3 (el ticket 11 está en las dos)
+    ventana_1 = preparar_detalle(detalle([
+        (10, '2026-01-01 10:00', 5, 'CAFE', 1, 5400),
+        (11, '2026-01-02 10:00', 5, 'CAFE', 1, 5400),
+        (11, '2026-01-02 10:00', 5, 'CAFE', 1, 5400),
+    ]), 'PASADENA')
+    ventana_2 = preparar_detalle(detalle([
+        (11, '2026-01-02 10:00', 5, 'CAFE', 1, 5400),
+        (11, '2026-01-02 10:00', 5, 'CAFE', 1, 5400),
+        (12, '2026-01-03 10:00', 7, 'MEDIALUNA', 1, 1500),
+    ]), 'PASADENA')
+    
+    assert insertar_tickets_nuevos(conn, ventana_1) == {'PASADENA': 3}
+    assert insertar_tickets_nuevos(conn, ventana_2) == {'PASADENA': 1}
+    assert contar(conn, 'fact_tickets') == 4
+    
+    actualizar_resumenes_diarios(conn)
+    por_dia = conn.execute("SELECT Fecha, Lineas, Tickets FROM ventas_diarias ORDER BY Fecha").fetchall()
+    assert por_dia == [(NUMERO_DIA - 1, 1, 1), (NUMERO_DIA, 2, 1), (NUMERO_DIA + 1, 1, 1)]
+
+
+def test_resumenes_despues_de_una_cinta_tardia(conn):
+    df = preparar_detalle(detalle([
+        (100, '2026-01-02 09:00', 5, 'CAFE', 1, 5400),
+        (100, '2026-01-02 09:00', 7, 'MEDIALUNA', 2, 1500),
+        (200, '2026-01-02 21:00', 5, 'CAFE', 1, 5400),
+    ]), 'PASADENA')
+    insertar_tickets_nuevos(conn, df)
+    asignar_turnos(conn)
+    actualizar_resumenes_diarios(conn)
+    
+    # Sin Cinta: todo el día queda con Turno ''
+    assert conn.execute("SELECT Turno, Tickets, Facturacion FROM ventas_diarias").fetchall() == [('', 2, 13800.0)]
+    for tabla in ('producto_dia', 'pares_dia', 'producto_tickets_dia'):
+        assert {turno for (turno,) in conn.execute(f"SELECT DISTINCT Turno FROM {tabla}")} == {''}
+    
+    # La Cinta llega en una carga posterior
+    cinta = preparar_cinta(pd.DataFrame({
+        'Número': [100, 200], 'Turno': ['MAÑANA', 'NOCHE'], 'Sucursal': ['PASADENA', 'PASADENA'],
+    }))
+    upsert_cinta(conn, cinta)
+    assert asignar_turnos(conn) == 3
+    assert actualizar_resumenes_diarios(conn) == 1
+    
+    ventas = conn.execute("SELECT Turno, Tickets, Facturacion FROM ventas_diarias ORDER BY Turno").fetchall()
+    assert ventas == [('MAÑANA', 1, 8400.0), ('NOCHE', 1, 5400.0)]
+    
+    producto_dia = conn.execute("""
+        SELECT d.Turno, p."Código", d.Cantidad FROM producto_dia d
+        JOIN dim_producto p ON p.id = d.producto_id ORDER BY d.Turno, p."Código"
+    """).fetchall()
+    assert producto_dia == [('MAÑANA', 5, 1.0), ('MAÑANA', 7, 2.0), ('NOCHE', 5, 1.0)]
+    
+    assert conn.execute("SELECT Turno, Tickets FROM pares_dia").fetchall() == [('MAÑANA', 1)]
+    tickets = conn.execute("""
+        SELECT t.Turno, p."Código", t.Tickets, t.TicketsSolo FROM producto_tickets_dia t
+        JOIN dim_producto p ON p.id = t.producto_id ORDER BY t.Turno, p."Código"
+    """).fetchall()
+    assert tickets == [('MAÑANA', 5, 1, 0), ('MAÑANA', 7, 1, 0), ('NOCHE', 5, 1, 1)]
+    assert contar(conn, 'ventas_pendientes') == 0
@@ -0,0 +1,86 @@
+"""
+migrar() sobre una base anterior a las migraciones (tablas de texto sin Linea)
+"""
+import sqlite3
+
+from FunctionsGrouping.migration_functions import migrar, version_actual, MIGRACIONES
+
+# Esquema de la base antes de las migraciones (como la escribía pandas.to_sql)
+ESQUEMA_ANTERIOR = [
+    """
+    CREATE TABLE "tickets_detalle" (
+        "Número" INTEGER, "Tipo" TEXT, "F. Cierre" TIMESTAMP, "Mesa" INTEGER, "Mozo" INTEGER,
+        "Nombre" TEXT, "Código" INTEGER, "Descripción" TEXT, "Cantidad" TEXT, "Importe" INTEGER,
+        "Sucursal" TEXT, "Turno" TEXT, "Fecha" DATE, "Hora" TIME
+    )
+    """,
+    """
+    CREATE TABLE "consumos" (
+        "Familia" TEXT, "Codigo" INTEGER, "Articulo" TEXT, "Sucursal" TEXT, "Fecha_Carga" TEXT
+    )
+    """,
+    "CREATE INDEX idx_consumos_lookup ON consumos(Codigo, Sucursal, Fecha_Carga)",
+]
+
+TICKETS = [
+    # Mismo producto dos veces en el ticket 1 (sin Linea: la migración las numera)
+    (1, None, '2026-01-02 08:46:00', 12, 3, 'DANIEL', 5, 'CAFE C/LEC  //LATTE', '1', 5400, 'COSTAVERDE',
+     'ALMUERZO', '2026-01-02', '08:46:00.000000'),
+    (1, None, '2026-01-02 08:46:00', 12, 3, 'DANIEL', 5, 'CAFE C/LEC  //LATTE', '1', 5400, 'COSTAVERDE',
+     'ALMUERZO', '2026-01-02', '08:46:00.000000'),
+    (1, None, '2026-01-02 08:46:00', 12, 3, 'DANIEL', 31, 'MEDIALUNA', '2,5', 1500, 'COSTAVERDE',
+     'ALMUERZO', '2026-01-02', '08:46:00.000000'),
+    (2, None, '2026-01-03 21:10:00', 4, 2, 'ANA', 5, 'CAFE C/LEC  //LATTE', '1', 5400, 'PASADENA',
+     None, '2026-01-03', '21:10:00.000000'),
+]
+
+CONSUMOS = [
+    (' BEBIDAS', 5, 'CAFE C/LEC  //LATTE', 'COSTAVERDE', '2026-01-01 04:00:00'),
+    (' BEBIDAS', 5, 'CAFE C/LEC  //LATTE', 'COSTAVERDE', '2026-01-23 04:00:00'),
+    (' PANADERIA', 31, 'MEDIALUNA', 'COSTAVERDE', '2026-01-23 04:00:00'),
+]
+
+
+def base_anterior(ruta):
+    conn = sqlite3.connect(ruta)
+    for sql in ESQUEMA_ANTERIOR:
+        conn.execute(sql)
+    conn.executemany(f"INSERT INTO tickets_detalle VALUES ({', '.join('?' * 14)})", TICKETS)
+    conn.executemany("INSERT INTO consumos VALUES (?, ?, ?, ?, ?)", CONSUMOS)
+    conn.commit()
+    return conn
+
+
+def test_migrar_base_anterior_conserva_las_filas(tmp_path):
+    conn = base_anterior(tmp_path / 'anterior.db')
+    
+    aplicadas = migrar(conn, verbose=False)
+    
+    assert [version for version, _, _ in aplicadas] == [version for version, _, _ in MIGRACIONES]
+    assert version_actual(conn) == MIGRACIONES[-1][0]
+    assert conn.execute("SELECT COUNT(*) FROM tickets_detalle").fetchone()[0] == len(TICKETS)
+    assert conn.execute("SELECT COUNT(*) FROM fact_tickets").fetchone()[0] == len(TICKETS)
+    # consumos queda con una fila por (Codigo, Articulo, Sucursal)
+    assert conn.execute("SELECT COUNT(*) FROM consumos").fetchone()[0] == 2
+    
+    lineas = conn.execute("""
+        SELECT Linea, Cantidad, Fecha, Hora FROM tickets_detalle
+        WHERE Sucursal = 'COSTAVERDE' AND "Número" = 1 ORDER BY "Código", Linea
+    """).fetchall()
+    assert lineas == [(1, 1.0, 20455, 526), (2, 1.0, 20455, 526), (1, 2.5, 20455, 526)]
+    
+    # El texto de Descripción no cambia y Familia llega desde consumos
+    assert conn.execute("""
+        SELECT "Descripción", Familia FROM dim_producto p JOIN dim_sucursal s ON s.id = p.sucursal_id
+        WHERE s.nombre = 'COSTAVERDE' AND p."Código" = 5
+    """).fetchone() == ('CAFE C/LEC  //LATTE', ' BEBIDAS')
+    
+    # Resúmenes completos desde la migración, con '' para el ticket sin Turno
+    ventas = conn.execute("SELECT Turno, Lineas, Tickets FROM ventas_diarias ORDER BY Fecha").fetchall()
+    assert ventas == [('ALMUERZO', 3, 1), ('', 1, 1)]
+    assert conn.execute("SELECT SUM(Lineas) FROM producto_dia").fetchone()[0] == len(TICKETS)
+    assert conn.execute("SELECT COUNT(*), SUM(Tickets) FROM pares_dia").fetchone() == (1, 1)
+    
+    # Volver a migrar no hace nada
+    assert migrar(conn, verbose=False) == []
+    conn.close()